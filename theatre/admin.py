@@ -3,17 +3,44 @@ from django.contrib import admin
 from theatre.models import (
     Artist,
     Genre,
+    IdempotencyKey,
     Play,
     Performance,
     TheatreHall,
     Reservation,
-    Ticket
+    SeatHold,
+    Ticket,
+    TicketValidationContext,
 )
 
+
+class TicketInline(admin.TabularInline):
+    model = Ticket
+    extra = 1
+
+
+@admin.register(Reservation)
+class ReservationAdmin(admin.ModelAdmin):
+    inlines = (TicketInline,)
+
+    def changeform_view(
+            self, request, object_id=None, form_url="", extra_context=None
+    ):
+        """
+        Validate and save the inline tickets in one validation context,
+        so hall dimensions are loaded once per performance.
+        """
+        with TicketValidationContext():
+            return super().changeform_view(
+                request, object_id, form_url, extra_context
+            )
+
+
 admin.site.register(Artist)
 admin.site.register(Genre)
 admin.site.register(Play)
 admin.site.register(Performance)
 admin.site.register(TheatreHall)
-admin.site.register(Reservation)
 admin.site.register(Ticket)
+admin.site.register(SeatHold)
+admin.site.register(IdempotencyKey)
@@ -0,0 +1,168 @@
+import bisect
+import re
+import threading
+import time
+import unicodedata
+from typing import Iterable
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+
+from theatre.caching import get_validators
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Casefolded words without diacritics, separated by single spaces."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    )
+    return " ".join(WORD_PATTERN.findall(stripped.casefold()))
+
+
+class AutocompleteIndex:
+    """
+    Process-local prefix index of the names of a model.
+
+    Every object is indexed under its normalized name from each
+    word on, "the tempest" under "the tempest" and "tempest",
+    in a sorted list searched with bisect, so lookups never touch
+    the database. The list is replaced, never modified, so readers
+    need no lock. Writes in this process are applied incrementally
+    through model signals after commit. Writes of other processes
+    are seen through the shared version (the same version names
+    the response cache uses), checked at most every
+    THEATRE_REGISTRY_CHECK_INTERVAL seconds, and the index is rebuilt
+    from scratch at least every THEATRE_AUTOCOMPLETE_MAX_AGE seconds.
+
+    Usage:
+        plays_autocomplete = AutocompleteIndex("Play", "plays", ("title",))
+        plays_autocomplete.lookup("tem")
+    """
+
+    def __init__(
+            self, model_name: str, version_name: str, fields: tuple[str, ...]
+    ) -> None:
+        self.model_name = model_name
+        self.version_name = version_name
+        self.fields = fields
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._built_at = 0.0
+        self._keys: list[tuple[str, int]] = []
+        self._names: dict[int, str] = {}
+
+    @property
+    def model(self) -> type[models.Model]:
+        return apps.get_model("theatre", self.model_name)
+
+    def _shared_version(self) -> int:
+        versions, _ = get_validators([self.version_name])
+        return versions[self.version_name]
+
+    @staticmethod
+    def _index_keys(pk: int, name: str) -> list[tuple[str, int]]:
+        words = normalize(name).split()
+        return [(" ".join(words[i:]), pk) for i in range(len(words))]
+
+    def _reload(self, version: int) -> None:
+        names, keys = {}, []
+        for pk, *values in self.model.objects.values_list(
+            "id", *self.fields
+        ):
+            names[pk] = " ".join(values)
+            keys += self._index_keys(pk, names[pk])
+        keys.sort()
+        self._keys, self._names = keys, names
+        self._version = version
+        self._built_at = time.monotonic()
+
+    def _ensure_loaded(self) -> None:
+        now = time.monotonic()
+        if (
+            self._version is not None
+            and now - self._checked_at
+            < settings.THEATRE_REGISTRY_CHECK_INTERVAL
+        ):
+            return
+        with self._lock:
+            version = self._shared_version()
+            if (
+                version != self._version
+                or now - self._built_at > settings.THEATRE_AUTOCOMPLETE_MAX_AGE
+            ):
+                self._reload(version)
+            self._checked_at = now
+
+    def update(self, instance: models.Model) -> None:
+        """Index the current name of a saved object."""
+        name = " ".join(getattr(instance, field) for field in self.fields)
+        self._replace(instance.pk, name)
+
+    def remove(self, pk: int) -> None:
+        self._replace(pk, None)
+
+    def _replace(self, pk: int, name: str | None) -> None:
+        with self._lock:
+            if self._version is None:
+                # Loaded with the change on the first lookup.
+                return
+            keys, names = self._keys, dict(self._names)
+            if pk in names:
+                stale = set(self._index_keys(pk, names.pop(pk)))
+                keys = [key for key in keys if key not in stale]
+            else:
+                keys = list(keys)
+            if name is not None:
+                names[pk] = name
+                for key in self._index_keys(pk, name):
+                    bisect.insort(keys, key)
+            self._keys, self._names = keys, names
+            # The versions bumped by this write are already applied,
+            # so they do not cause a reload.
+            self._version = self._shared_version()
+            self._checked_at = time.monotonic()
+
+    def lookup(self, query: str, limit: int = 10) -> list[tuple[int, str]]:
+        """
+        Ids and names of up to limit objects with a word starting
+        with every word of the query, ordered by the matched words.
+        """
+        words = normalize(query).split()
+        if not words:
+            return []
+        self._ensure_loaded()
+        keys, names = self._keys, self._names
+        # Candidates come from the longest, most selective word.
+        prefix = max(words, key=len)
+        results, seen = [], set()
+        position = bisect.bisect_left(keys, (prefix,))
+        while position < len(keys) and len(results) < limit:
+            key, pk = keys[position]
+            position += 1
+            if not key.startswith(prefix):
+                break
+            if pk in seen:
+                continue
+            seen.add(pk)
+            if self._matches(words, names[pk]):
+                results.append((pk, names[pk]))
+        return results
+
+    @staticmethod
+    def _matches(words: Iterable[str], name: str) -> bool:
+        name_words = normalize(name).split()
+        return all(
+            any(name_word.startswith(word) for name_word in name_words)
+            for word in words
+        )
+
+
+plays_autocomplete = AutocompleteIndex("Play", "plays", ("title",))
+artists_autocomplete = AutocompleteIndex(
+    "Artist", "artists", ("first_name", "last_name")
+)
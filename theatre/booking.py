@@ -0,0 +1,369 @@
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import timedelta
+from typing import Iterable
+
+from django.conf import settings
+from django.contrib.auth.models import AbstractUser
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, OperationalError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+
+from theatre.exceptions import SeatConflict
+from theatre.models import Performance, Reservation, SeatHold, Ticket
+from theatre.seating import SeatMap
+
+
+def load_seat_maps(tickets: list[dict]) -> dict[int, SeatMap]:
+    """
+    Load every referenced performance once and build their seat maps,
+    halls come from the in-process registry. Costs two queries
+    for any number of tickets and performances.
+    """
+    performance_ids = {ticket["performance_id"] for ticket in tickets}
+    performances = Performance.objects.only(
+        "id", "theatre_hall"
+    ).in_bulk(performance_ids)
+
+    missing_ids = performance_ids - set(performances)
+    if missing_ids:
+        raise ValidationError(
+            {
+                "tickets": [
+                    f"Invalid performance id {performance_id}"
+                    for performance_id in sorted(missing_ids)
+                ]
+            }
+        )
+
+    return SeatMap.for_performances(performances.values())
+
+
+def validate_seats(
+        tickets: list[dict],
+        seat_maps: dict[int, SeatMap],
+        field_name: str = "tickets",
+) -> None:
+    """
+    Validate every requested seat in memory.
+    Seats outside of the hall or repeated in the request are reported
+    per ticket as a validation error, taken seats as a conflict.
+    """
+    errors, conflicts, requested = [], [], set()
+    for ticket in tickets:
+        seat_map = seat_maps[ticket["performance_id"]]
+        key = (ticket["performance_id"], ticket["row"], ticket["seat"])
+        try:
+            Ticket.validate_tickets(
+                ticket["row"], ticket["seat"], seat_map, ValidationError
+            )
+        except ValidationError as error:
+            if seat_map.contains(ticket["row"], ticket["seat"]):
+                conflicts.append(ticket)
+                errors.append({})
+            else:
+                errors.append(error.detail)
+            continue
+
+        if key in requested:
+            errors.append({"seat": ["Seat is duplicated in the request"]})
+            continue
+        requested.add(key)
+        errors.append({})
+
+    if any(errors):
+        raise ValidationError({field_name: errors})
+    if conflicts:
+        raise SeatConflict(conflicts)
+
+
+def find_held(tickets: list[dict]) -> list[dict]:
+    """Return requested seats held by active seat holds."""
+    performance_ids = {ticket["performance_id"] for ticket in tickets}
+    held = set(
+        SeatHold.objects.filter(
+            performance_id__in=performance_ids, expires_at__gt=timezone.now()
+        ).values_list("performance_id", "row", "seat")
+    )
+    return [
+        ticket
+        for ticket in tickets
+        if (ticket["performance_id"], ticket["row"], ticket["seat"]) in held
+    ]
+
+
+def find_conflicts(tickets: list[dict]) -> list[dict]:
+    """Return requested seats that are taken according to the database."""
+    seat_maps = load_seat_maps(tickets)
+    return [
+        ticket
+        for ticket in tickets
+        if seat_maps[ticket["performance_id"]].is_taken(
+            ticket["row"], ticket["seat"]
+        )
+    ]
+
+
+PESSIMISTIC = "pessimistic"
+OPTIMISTIC = "optimistic"
+
+
+def _insert_tickets(user: AbstractUser, tickets: list[dict]) -> Reservation:
+    """Insert the reservation, its tickets and update sold counters."""
+    reservation = Reservation.objects.create(user=user)
+    Ticket.objects.bulk_create(
+        [
+            Ticket(
+                row=ticket["row"],
+                seat=ticket["seat"],
+                performance_id=ticket["performance_id"],
+                reservation=reservation,
+            )
+            for ticket in tickets
+        ]
+    )
+    Performance.shift_counter(
+        "tickets_sold",
+        Counter(ticket["performance_id"] for ticket in tickets),
+    )
+    return reservation
+
+
+def _lock_performances(tickets: list[dict]) -> None:
+    """Lock the performances of the tickets in id order."""
+    list(
+        Performance.objects.select_for_update()
+        .filter(id__in={ticket["performance_id"] for ticket in tickets})
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+
+def _book_locked(user: AbstractUser, tickets: list[dict]) -> Reservation:
+    """
+    Pessimistic booking: lock the referenced performances in id order,
+    so bookings and seat holds of the same performance are serialized
+    and validation can not be outdated by the time of the insert.
+    """
+    with transaction.atomic():
+        _lock_performances(tickets)
+        validate_seats(tickets, load_seat_maps(tickets))
+        try:
+            with transaction.atomic():
+                return _insert_tickets(user, tickets)
+        except IntegrityError:
+            raise SeatConflict(find_conflicts(tickets) or tickets)
+
+
+def _book_optimistic(user: AbstractUser, tickets: list[dict]) -> Reservation:
+    """
+    Optimistic booking: validate without locks and let the unique_together
+    index detect races. A collision with seats that turn out to be free
+    (the competing transaction rolled back) and transient database errors
+    such as deadlocks are retried with exponential backoff.
+    Seat holds live in another table, so they are checked again after
+    the counter update has locked the performances: holds committed
+    in the meantime are visible then, later ones wait for the lock.
+    """
+    max_retries = settings.THEATRE_BOOKING_MAX_RETRIES
+    can_retry = not transaction.get_connection().in_atomic_block
+
+    for attempt in range(max_retries + 1):
+        validate_seats(tickets, load_seat_maps(tickets))
+        try:
+            with transaction.atomic():
+                reservation = _insert_tickets(user, tickets)
+                held = find_held(tickets)
+                if held:
+                    raise SeatConflict(held)
+                return reservation
+        except IntegrityError:
+            conflicts = find_conflicts(tickets)
+            if conflicts or not can_retry or attempt == max_retries:
+                raise SeatConflict(conflicts or tickets)
+        except OperationalError:
+            if not can_retry or attempt == max_retries:
+                raise
+        time.sleep(
+            settings.THEATRE_BOOKING_RETRY_BACKOFF
+            * 2 ** attempt
+            * random.uniform(0.5, 1.5)
+        )
+
+
+def book_tickets(
+        user: AbstractUser, tickets: list[dict], concurrency: str = None
+) -> Reservation:
+    """
+    Create a reservation with all requested tickets.
+
+    Performances and halls are loaded once, seats are validated
+    in memory and tickets are inserted with a single bulk_create,
+    so the number of queries does not depend on the number of tickets.
+    Races between bookings of the same seats are handled according
+    to the concurrency mode, THEATRE_BOOKING_CONCURRENCY by default.
+    Seats taken by a concurrent booking are reported as a SeatConflict.
+    """
+    concurrency = concurrency or settings.THEATRE_BOOKING_CONCURRENCY
+    if concurrency == PESSIMISTIC:
+        return _book_locked(user, tickets)
+    if concurrency == OPTIMISTIC:
+        return _book_optimistic(user, tickets)
+    raise ImproperlyConfigured(
+        f"Unknown booking concurrency mode {concurrency!r}, "
+        f"expected {PESSIMISTIC!r} or {OPTIMISTIC!r}"
+    )
+
+
+def allocate_best_seats(performance: Performance, count: int) -> list[dict]:
+    """Pick the best free seats of a performance from its seat map."""
+    seat_map = SeatMap.for_performance(performance)
+    seats = seat_map.best_seats(count)
+    if seats is None:
+        raise ValidationError(
+            {"count": [f"Only {seat_map.available} seats are available"]}
+        )
+    return [{"row": row, "seat": seat} for row, seat in seats]
+
+
+def hold_seats(
+        user: AbstractUser,
+        performance: Performance,
+        seats: list[dict],
+        ttl: int,
+) -> list[SeatHold]:
+    """
+    Hold seats of a performance for ttl seconds under a single token.
+    Expired holds of the performance are released first,
+    so they do not block their seats until the next sweep.
+    Seats are validated under the performance lock bookings take,
+    so a hold and a ticket can not claim the same seat.
+    """
+    release_expired_holds([performance.id])
+    tickets = [
+        {
+            "performance_id": performance.id,
+            "row": seat["row"],
+            "seat": seat["seat"],
+        }
+        for seat in seats
+    ]
+
+    token = uuid.uuid4()
+    expires_at = timezone.now() + timedelta(seconds=ttl)
+    holds = [
+        SeatHold(
+            token=token,
+            row=ticket["row"],
+            seat=ticket["seat"],
+            performance=performance,
+            user=user,
+            expires_at=expires_at,
+        )
+        for ticket in tickets
+    ]
+    with transaction.atomic():
+        _lock_performances(tickets)
+        validate_seats(
+            tickets, SeatMap.for_performances([performance]), "seats"
+        )
+        try:
+            with transaction.atomic():
+                SeatHold.objects.bulk_create(holds)
+        except IntegrityError:
+            raise SeatConflict(find_conflicts(tickets) or tickets)
+
+        # bulk_create sends no post_save, deletes are counted by signals.
+        Performance.shift_counter("seats_held", {performance.id: len(holds)})
+
+    return holds
+
+
+def confirm_hold(
+        user: AbstractUser, performance_id: int, token: uuid.UUID
+) -> Reservation:
+    """Turn an active seat hold of the user into a reservation."""
+    with transaction.atomic():
+        holds = list(
+            SeatHold.objects.select_for_update()
+            .filter(
+                token=token,
+                user=user,
+                performance_id=performance_id,
+                expires_at__gt=timezone.now(),
+            )
+            .values_list("id", "performance_id", "row", "seat")
+        )
+        if not holds:
+            raise NotFound("Seat hold does not exist or has expired.")
+
+        SeatHold.objects.filter(id__in=[hold[0] for hold in holds]).delete()
+        return book_tickets(
+            user,
+            [
+                {"performance_id": hold[1], "row": hold[2], "seat": hold[3]}
+                for hold in holds
+            ],
+        )
+
+
+def release_hold(
+        user: AbstractUser, performance_id: int, token: uuid.UUID
+) -> None:
+    """Release all seats of a hold of the user."""
+    with transaction.atomic():
+        holds = list(
+            SeatHold.objects.select_for_update()
+            .filter(token=token, user=user, performance_id=performance_id)
+            .values_list("id", flat=True)
+        )
+        if not holds:
+            raise NotFound("Seat hold does not exist.")
+        SeatHold.objects.filter(id__in=holds).delete()
+
+
+def release_expired_seats(performances: Iterable[Performance]) -> None:
+    """
+    Release expired holds of performances holding seats and refresh
+    their seats_held, so tickets_available agrees with seat maps,
+    which ignore expired holds, before the sweep gets to them.
+    Costs no query when no seats are held.
+    """
+    holding = {
+        performance.id: performance
+        for performance in performances
+        if performance.seats_held
+    }
+    if not holding or not release_expired_holds(list(holding)):
+        return
+    for performance_id, seats_held in Performance.objects.filter(
+        id__in=holding
+    ).values_list("id", "seats_held"):
+        holding[performance_id].seats_held = seats_held
+
+
+def release_expired_holds(
+        performance_ids: list[int] = None, batch_size: int = 1000
+) -> int:
+    """
+    Delete expired seat holds in batches and return how many were released.
+    Locked rows are skipped, so several sweepers can run at the same time.
+    """
+    released = 0
+    while True:
+        with transaction.atomic():
+            queryset = SeatHold.objects.filter(expires_at__lte=timezone.now())
+            if performance_ids is not None:
+                queryset = queryset.filter(performance_id__in=performance_ids)
+            expired = list(
+                queryset.select_for_update(skip_locked=True)
+                .order_by()
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not expired:
+                return released
+            SeatHold.objects.filter(id__in=expired).delete()
+        released += len(expired)
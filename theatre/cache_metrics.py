@@ -0,0 +1,208 @@
+import atexit
+import threading
+import time
+from collections import Counter
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+STATS_KEY_PREFIX = "theatre:stats"
+CACHE_EVENTS = ("hit", "miss", "stale")
+# Namespaces and the prefix of the keys of their entries.
+CACHE_NAMESPACES = {
+    "catalog": "theatre:catalog:",
+    "performances": "theatre:performances:",
+    "fragments": "theatre:fragment:",
+    "counts": "theatre:count:",
+    "facets": "theatre:facets:",
+    "reservations": "theatre:reservations:",
+}
+
+
+def _incr(key: str, delta: int) -> None:
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        pass
+
+
+class StatsBuffer:
+    """
+    Process-local counts of cache events, added to the shared
+    counters at most every THEATRE_CACHE_STATS_FLUSH_INTERVAL seconds,
+    so counting a hit costs no cache round trip. Reports flush
+    the buffer of their own process, counts of other processes
+    show up within the interval, and on exit.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+        self._flushed_at = time.monotonic()
+
+    def add(self, key: str, delta: int) -> None:
+        with self._lock:
+            self._counts[key] += delta
+            due = (
+                time.monotonic() - self._flushed_at
+                >= settings.THEATRE_CACHE_STATS_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._flushed_at = time.monotonic()
+        for key, delta in counts.items():
+            if delta:
+                _incr(key, delta)
+
+    def discard(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._counts.pop(key, None)
+
+
+stats_buffer = StatsBuffer()
+atexit.register(stats_buffer.flush)
+
+
+def count_cache_event(namespace: str, event: str, count: int = 1) -> None:
+    """Count hit, miss or stale events of a cache namespace."""
+    stats_buffer.add(f"{STATS_KEY_PREFIX}:{namespace}:{event}", count)
+
+
+def count_cache_miss(namespace: str, duration: float, count: int = 1) -> None:
+    """Count misses together with the seconds spent computing them."""
+    count_cache_event(namespace, "miss", count)
+    stats_buffer.add(
+        f"{STATS_KEY_PREFIX}:{namespace}:miss_us", int(duration * 1e6)
+    )
+
+
+def reset_cache_stats(namespaces: Iterable[str]) -> None:
+    """Reset shared counters and counts buffered by this process."""
+    keys = [
+        f"{STATS_KEY_PREFIX}:{namespace}:{event}"
+        for namespace in namespaces
+        for event in CACHE_EVENTS + ("miss_us",)
+    ]
+    stats_buffer.discard(keys)
+    cache.delete_many(keys)
+
+
+def _locmem_usage(
+        backend: LocMemCache, prefixes: dict[str, str]
+) -> tuple[dict[str, dict[str, int]], None]:
+    """Live entries and their pickled size, counted exactly."""
+    made = {
+        namespace: backend.make_key(prefix)
+        for namespace, prefix in prefixes.items()
+    }
+    usage = {namespace: {"entries": 0, "memory": 0} for namespace in made}
+    now = time.time()
+    with backend._lock:
+        for key, value in backend._cache.items():
+            expires_at = backend._expire_info.get(key)
+            if expires_at is not None and expires_at < now:
+                continue
+            for namespace, prefix in made.items():
+                if key.startswith(prefix):
+                    usage[namespace]["entries"] += 1
+                    usage[namespace]["memory"] += len(key) + len(value)
+                    break
+    # Culled entries are dropped silently, so evictions are unknown.
+    return usage, None
+
+
+def _redis_usage(
+        backend: RedisCache, prefixes: dict[str, str]
+) -> tuple[dict[str, dict[str, int]], int]:
+    """
+    Entries counted by SCAN, memory measured on up to
+    THEATRE_CACHE_STATS_MEMORY_SAMPLE keys and extrapolated.
+    Redis reports evictions for the whole instance only.
+    """
+    client = backend._cache.get_client()
+    sample_size = settings.THEATRE_CACHE_STATS_MEMORY_SAMPLE
+    usage = {}
+    for namespace, prefix in prefixes.items():
+        entries, sampled = 0, 0
+        for key in client.scan_iter(
+            match=f"{backend.make_key(prefix)}*", count=1000
+        ):
+            entries += 1
+            if entries <= sample_size:
+                sampled += client.memory_usage(key) or 0
+        measured = min(entries, sample_size)
+        usage[namespace] = {
+            "entries": entries,
+            "memory": sampled * entries // measured if measured else 0,
+        }
+    return usage, client.info("stats").get("evicted_keys")
+
+
+def get_cache_usage(
+        namespaces: Iterable[str],
+) -> tuple[dict[str, dict[str, int | None]], int | None]:
+    """
+    Entry count and approximate memory in bytes per namespace,
+    and evictions of the cache backend. Only the local memory
+    and Redis backends can be inspected, None is reported otherwise.
+    """
+    prefixes = {
+        namespace: CACHE_NAMESPACES[namespace] for namespace in namespaces
+    }
+    backend = caches["default"]
+    if isinstance(backend, LocMemCache):
+        return _locmem_usage(backend, prefixes)
+    if isinstance(backend, RedisCache):
+        return _redis_usage(backend, prefixes)
+    unknown = {"entries": None, "memory": None}
+    return {namespace: dict(unknown) for namespace in prefixes}, None
+
+
+def collect_cache_stats(namespaces: Iterable[str] = None) -> dict:
+    """
+    Report of the given namespaces (all by default) with hit ratio
+    (stale responses count as served), average miss latency
+    in milliseconds, entry count and memory, and backend evictions.
+    """
+    namespaces = list(namespaces or CACHE_NAMESPACES)
+    stats_buffer.flush()
+    keys = [
+        f"{STATS_KEY_PREFIX}:{namespace}:{event}"
+        for namespace in namespaces
+        for event in CACHE_EVENTS + ("miss_us",)
+    ]
+    stored = cache.get_many(keys)
+    usage, evictions = get_cache_usage(namespaces)
+    report = {}
+    for namespace in namespaces:
+        counts = {
+            event: stored.get(f"{STATS_KEY_PREFIX}:{namespace}:{event}", 0)
+            for event in CACHE_EVENTS
+        }
+        miss_us = stored.get(f"{STATS_KEY_PREFIX}:{namespace}:miss_us", 0)
+        total = sum(counts.values())
+        served = counts["hit"] + counts["stale"]
+        report[namespace] = {
+            **counts,
+            "hit_ratio": round(served / total, 4) if total else None,
+            "miss_latency_ms": (
+                round(miss_us / counts["miss"] / 1000, 2)
+                if counts["miss"]
+                else None
+            ),
+            **usage[namespace],
+        }
+    return {
+        "backend": type(caches["default"]).__name__,
+        "evictions": evictions,
+        "namespaces": report,
+    }
@@ -0,0 +1,597 @@
+import hashlib
+import math
+import random
+import sys
+import time
+from typing import Callable, Iterable
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.db.models import Model, prefetch_related_objects
+from django.db.models.manager import BaseManager
+from django.http import HttpResponseBase
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
+from rest_framework import serializers, status
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from theatre.cache_metrics import count_cache_event, count_cache_miss
+
+VERSION_KEY_PREFIX = "theatre:version"
+MODIFIED_KEY_PREFIX = "theatre:modified"
+FRAGMENT_KEY_PREFIX = "theatre:fragment"
+LOCK_POLL_INTERVAL = 0.05
+
+
+def _initial_version() -> int:
+    """
+    Versions start from the current time in milliseconds,
+    so a flushed cache never hands out a version that was used before.
+    """
+    return int(time.time() * 1000)
+
+
+def get_validators(names: Iterable[str]) -> tuple[dict[str, int], int]:
+    """
+    Return current versions of the given names, e.g. "plays" or "play:1",
+    and the latest time (in seconds) any of them was bumped.
+    Missing versions are initialized and, like bumped ones, kept for
+    THEATRE_CACHE_VERSION_TTL seconds. A version that expired restarts
+    from the current time, so it never repeats an earlier one.
+    """
+    names = list(names)
+    keys = [
+        f"{prefix}:{name}"
+        for name in names
+        for prefix in (VERSION_KEY_PREFIX, MODIFIED_KEY_PREFIX)
+    ]
+    stored = cache.get_many(keys)
+    versions, last_modified = {}, 0
+    for name in names:
+        version_key = f"{VERSION_KEY_PREFIX}:{name}"
+        modified_key = f"{MODIFIED_KEY_PREFIX}:{name}"
+        if version_key not in stored:
+            cache.add(
+                version_key,
+                _initial_version(),
+                timeout=settings.THEATRE_CACHE_VERSION_TTL,
+            )
+            stored[version_key] = cache.get(version_key)
+        if modified_key not in stored:
+            cache.add(
+                modified_key,
+                int(time.time()),
+                timeout=settings.THEATRE_CACHE_VERSION_TTL,
+            )
+            stored[modified_key] = cache.get(modified_key)
+        versions[name] = stored[version_key]
+        last_modified = max(last_modified, stored[modified_key])
+    return versions, last_modified
+
+
+def _bump(names: set[str]) -> None:
+    for name in names:
+        key = f"{VERSION_KEY_PREFIX}:{name}"
+        try:
+            cache.incr(key)
+            cache.touch(key, timeout=settings.THEATRE_CACHE_VERSION_TTL)
+        except ValueError:
+            cache.set(
+                key,
+                _initial_version(),
+                timeout=settings.THEATRE_CACHE_VERSION_TTL,
+            )
+    cache.set_many(
+        {f"{MODIFIED_KEY_PREFIX}:{name}": int(time.time()) for name in names},
+        timeout=settings.THEATRE_CACHE_VERSION_TTL,
+    )
+
+
+def bump_versions(names: Iterable[str]) -> None:
+    """
+    Invalidate everything cached under the given version names.
+    Inside a transaction versions are bumped once more after commit,
+    so responses built from not yet committed data are not kept.
+    """
+    names = set(names)
+    if not names:
+        return
+    _bump(names)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(names))
+
+
+def require_shared_cache() -> None:
+    """
+    Management commands run in a process of their own, warming,
+    invalidating or inspecting a cache local to that process
+    has no effect on the web processes, so they refuse to run.
+    """
+    backend = caches["default"]
+    if isinstance(backend, (LocMemCache, DummyCache)):
+        raise CommandError(
+            f"The default cache ({type(backend).__name__}) is local "
+            "to this process. Configure a cache shared with the web "
+            "processes, e.g. Redis or FileBasedCache, in CACHES."
+        )
+
+
+def request_digest(request: Request) -> str:
+    """Digest of the absolute path and sorted query parameters."""
+    raw_key = "|".join(
+        [
+            request.build_absolute_uri(request.path),
+            "&".join(
+                f"{name}={value}"
+                for name, value in sorted(request.query_params.lists())
+            ),
+        ]
+    )
+    return hashlib.md5(raw_key.encode()).hexdigest()
+
+
+class ConditionalGetMixin:
+    """
+    Mixin class for conditional GETs of list and detail views.
+
+    Strong ETags and Last-Modified dates are built from version
+    counters of the data a response depends on, so
+    If-None-Match and If-Modified-Since are answered with 304
+    before the main query and serializers run.
+
+    Attributes:
+        list_cache_versions: version names the list depends on;
+        detail_cache_version: prefix of the per-object version name,
+            "play" makes the detail of play 1 depend on "play:1";
+        shared_cache_versions: version names both list
+            and detail depend on.
+
+    Usage:
+        def list(self, request, *args, **kwargs):
+            return self.conditional_response(super().list, request, ...)
+    """
+
+    cache_namespace = "catalog"
+    list_cache_versions: tuple[str, ...] = ()
+    detail_cache_version: str = None
+    shared_cache_versions: tuple[str, ...] = ()
+
+    def get_cache_versions(self) -> list[str]:
+        if self.action == "retrieve":
+            versions = [f"{self.detail_cache_version}:{self.get_cache_pk()}"]
+        else:
+            versions = list(self.list_cache_versions)
+        return versions + list(self.shared_cache_versions)
+
+    def get_cache_pk(self) -> int:
+        """
+        Primary key of the requested object, normalized so "/plays/01/"
+        depends on the version of play 1. Lookups that are no primary
+        key are not found before any version is read or created.
+        """
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            return int(lookup)
+        except ValueError:
+            raise NotFound()
+
+    def get_request_digest(self, request: Request) -> str:
+        return request_digest(request)
+
+    def get_version_digest(
+            self, request: Request, versions: dict[str, int]
+    ) -> str:
+        raw_key = "|".join(
+            [
+                self.get_request_digest(request),
+                ",".join(
+                    f"{name}={version}"
+                    for name, version in sorted(versions.items())
+                ),
+            ]
+        )
+        return hashlib.md5(raw_key.encode()).hexdigest()
+
+    def conditional_response(
+            self, handler: Callable, request: Request, *args, **kwargs
+    ) -> HttpResponseBase:
+        versions, last_modified = get_validators(self.get_cache_versions())
+        digest = self.get_version_digest(request, versions)
+        etag = f'"{digest}"'
+
+        not_modified = get_conditional_response(
+            request._request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            response = not_modified
+        else:
+            response = self.build_response(
+                digest, handler, request, *args, **kwargs
+            )
+        # Stale responses carry the ETag of the versions they were built of.
+        if "ETag" not in response and response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED
+        ):
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def build_response(
+            self, digest: str, handler: Callable, request: Request,
+            *args, **kwargs
+    ) -> Response:
+        return handler(request, *args, **kwargs)
+
+
+class CachedResponseMixin(ConditionalGetMixin):
+    """
+    Mixin class for caching serialized GET responses
+    with stale-while-revalidate semantics.
+
+    Every path and query (including page) keeps a single entry
+    that remembers the versions it was built of. An entry is fresh
+    while those versions are current and its timeout has not passed,
+    otherwise it is stale. Stale entries are kept for another
+    THEATRE_CACHE_STALE_TTL seconds and served while exactly one
+    request, holding a lock for up to THEATRE_CACHE_LOCK_TIMEOUT
+    seconds, recomputes the response. Fresh entries are recomputed
+    early with a probability growing towards their expiry
+    (scaled by THEATRE_CACHE_EARLY_EXPIRY_BETA and the time the
+    response took to build), so hot entries rarely expire at all.
+    Hits, misses (with the time they took) and stale responses
+    are counted per namespace and marked with an X-Cache header,
+    304 responses answered from versions alone count as hits.
+    Conditional GETs are supported as in ConditionalGetMixin.
+
+    Usage:
+        def list(self, request, *args, **kwargs):
+            return self.cached_response(super().list, request, ...)
+    """
+
+    def get_cache_timeout(self) -> int:
+        return settings.THEATRE_CATALOG_CACHE_TTL
+
+    def cached_response(
+            self, handler: Callable, request: Request, *args, **kwargs
+    ) -> HttpResponseBase:
+        response = self.conditional_response(
+            handler, request, *args, **kwargs
+        )
+        if response.status_code == status.HTTP_304_NOT_MODIFIED:
+            self.count_cache_event("hit")
+            response["X-Cache"] = "HIT"
+        return response
+
+    def build_response(
+            self, digest: str, handler: Callable, request: Request,
+            *args, **kwargs
+    ) -> Response:
+        request_digest = self.get_request_digest(request)
+        key = f"theatre:{self.cache_namespace}:{request_digest}"
+        lock_key = f"{key}:lock"
+        entry = cache.get(key)
+        fresh = entry is not None and entry["digest"] == digest
+        if fresh and not self.expires_early(entry):
+            return self.entry_response(entry, digest, "hit")
+
+        locked = self.acquire_lock(lock_key)
+        if not locked:
+            if entry is None:
+                entry = self.wait_for_entry(key, lock_key, digest)
+                fresh = entry is not None
+            if entry is not None:
+                expired = not fresh or time.time() >= entry["expires_at"]
+                return self.entry_response(
+                    entry, digest, "stale" if expired else "hit"
+                )
+
+        try:
+            started = time.monotonic()
+            response = handler(request, *args, **kwargs)
+            delta = time.monotonic() - started
+            count_cache_miss(self.cache_namespace, delta)
+            response["X-Cache"] = "MISS"
+            if response.status_code == status.HTTP_200_OK:
+                timeout = self.get_cache_timeout()
+                cache.set(
+                    key,
+                    {
+                        "digest": digest,
+                        "data": response.data,
+                        "expires_at": time.time() + timeout,
+                        "delta": delta,
+                    },
+                    timeout=timeout + settings.THEATRE_CACHE_STALE_TTL,
+                )
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        return response
+
+    @staticmethod
+    def acquire_lock(lock_key: str) -> bool:
+        """Single-flight lock, only its holder recomputes the response."""
+        return cache.add(
+            lock_key, True, timeout=settings.THEATRE_CACHE_LOCK_TIMEOUT
+        )
+
+    def entry_response(self, entry: dict, digest: str, event: str) -> Response:
+        self.count_cache_event(event)
+        response = Response(entry["data"], status=status.HTTP_200_OK)
+        response["X-Cache"] = event.upper()
+        if entry["digest"] != digest:
+            response["ETag"] = f'"{entry["digest"]}"'
+        return response
+
+    @staticmethod
+    def expires_early(entry: dict) -> bool:
+        """
+        Probabilistic early expiration (XFetch), an entry expires
+        when now - delta * beta * ln(random) reaches its expiry.
+        """
+        gap = -entry["delta"] * settings.THEATRE_CACHE_EARLY_EXPIRY_BETA * (
+            math.log(random.random() or sys.float_info.min)
+        )
+        return time.time() + gap >= entry["expires_at"]
+
+    @staticmethod
+    def wait_for_entry(key: str, lock_key: str, digest: str) -> dict | None:
+        """
+        Poll for the entry another request is computing,
+        None when the lock was released without storing it
+        (e.g. 404 responses are never cached) or timed out.
+        """
+        deadline = time.monotonic() + settings.THEATRE_CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            stored = cache.get_many([key, lock_key])
+            entry = stored.get(key)
+            if entry is not None and entry["digest"] == digest:
+                return entry
+            if lock_key not in stored:
+                return None
+        return None
+
+    def count_cache_event(self, event: str) -> None:
+        count_cache_event(self.cache_namespace, event)
+
+
+class UserCachedResponseMixin:
+    """
+    Mixin class for caching serialized GET responses per user.
+
+    Entries are stored with the version of the user they were built
+    of and read together with the current version in one round trip.
+    Bumping the version of a user, e.g. "reservations:1", invalidates
+    all their pages. Entries also remember the versions of shared
+    objects they show, e.g. "performance:1", passed to
+    embed_cache_versions while the response is built, and are only
+    served while those are current. A change of a shared object thus
+    costs one bump however many users show it, and a repeated view
+    costs a second cache read of the embedded versions.
+    Hits and misses are counted and marked as in CachedResponseMixin.
+
+    Attributes:
+        user_cache_version: prefix of the per-user version name.
+
+    Usage:
+        def list(self, request, *args, **kwargs):
+            return self.user_cached_response(super().list, request, ...)
+    """
+
+    cache_namespace = "reservations"
+    user_cache_version: str = None
+    _embedded_versions: dict[str, int] = {}
+
+    def get_cache_versions(self) -> list[str]:
+        return [f"{self.user_cache_version}:{self.request.user.pk}"]
+
+    def get_cache_timeout(self) -> int:
+        return settings.THEATRE_USER_CACHE_TTL
+
+    def embed_cache_versions(self, names: Iterable[str]) -> None:
+        """
+        Remember current versions of shared objects shown by the response
+        being built, call it right after the objects are loaded.
+        """
+        self._embedded_versions = get_validators(names)[0]
+
+    @staticmethod
+    def embedded_versions_current(embedded: dict[str, int]) -> bool:
+        if not embedded:
+            return True
+        keys = {name: f"{VERSION_KEY_PREFIX}:{name}" for name in embedded}
+        current = cache.get_many(keys.values())
+        return all(
+            current.get(keys[name]) == version
+            for name, version in embedded.items()
+        )
+
+    def user_cached_response(
+            self, handler: Callable, request: Request, *args, **kwargs
+    ) -> Response:
+        version_name = self.get_cache_versions()[0]
+        version_key = f"{VERSION_KEY_PREFIX}:{version_name}"
+        key = (
+            f"theatre:{self.cache_namespace}:{request.user.pk}:"
+            f"{request_digest(request)}"
+        )
+        stored = cache.get_many([version_key, key])
+        version = stored.get(version_key)
+        if version is None:
+            version = get_validators([version_name])[0][version_name]
+        entry = stored.get(key)
+        if (
+            entry is not None
+            and entry["version"] == version
+            and self.embedded_versions_current(entry["embedded"])
+        ):
+            count_cache_event(self.cache_namespace, "hit")
+            response = Response(entry["data"], status=status.HTTP_200_OK)
+            response["X-Cache"] = "HIT"
+            return response
+
+        self._embedded_versions = {}
+        started = time.monotonic()
+        response = handler(request, *args, **kwargs)
+        count_cache_miss(self.cache_namespace, time.monotonic() - started)
+        response["X-Cache"] = "MISS"
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(
+                key,
+                {
+                    "version": version,
+                    "embedded": self._embedded_versions,
+                    "data": response.data,
+                },
+                timeout=self.get_cache_timeout(),
+            )
+        return response
+
+
+class HttpCachePolicyMixin:
+    """
+    Mixin class for Cache-Control, Vary and Surrogate-Key headers.
+
+    Policies are named entries of THEATRE_HTTP_CACHE_POLICIES,
+    chosen per action with "*" as a fallback. Public policies apply
+    to anonymous successful reads only, authenticated readers
+    get the policy as private without s-maxage, so shared caches
+    never store their responses. Responses vary on Authorization
+    and Accept. Views with version names (see ConditionalGetMixin)
+    also send them as Surrogate-Key, so a proxy can purge e.g.
+    every response showing play 1 by the "play:1" key.
+
+    Attributes:
+        cache_policies: action name to policy name mapping.
+    """
+
+    cache_policies: dict[str, str] = {}
+
+    def get_cache_policy(self) -> dict | None:
+        name = self.cache_policies.get(
+            self.action, self.cache_policies.get("*")
+        )
+        if name is None:
+            return None
+        return dict(settings.THEATRE_HTTP_CACHE_POLICIES[name])
+
+    def finalize_response(
+            self, request: Request, response: HttpResponseBase,
+            *args, **kwargs
+    ) -> HttpResponseBase:
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        policy = self.get_cache_policy()
+        if policy is None:
+            return response
+
+        patch_vary_headers(response, ("Authorization", "Accept"))
+        if policy.get("public"):
+            cacheable = request.method in ("GET", "HEAD") and (
+                response.status_code
+                in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED)
+            )
+            if not cacheable:
+                return response
+            if "HTTP_AUTHORIZATION" in request.META:
+                policy.pop("public")
+                policy.pop("s_maxage", None)
+                policy["private"] = True
+            elif hasattr(self, "get_cache_versions"):
+                response["Surrogate-Key"] = " ".join(
+                    self.get_cache_versions()
+                )
+        patch_cache_control(response, **policy)
+        return response
+
+
+class FragmentCacheMixin:
+    """
+    Mixin class for model serializers caching the representation
+    of every object, keyed by model, pk, serializer and the version
+    of the object, so the same version names used for responses
+    invalidate fragments as well.
+
+    Attributes:
+        fragment_version: prefix of the per-object version name,
+            "play" makes the fragment of play 1 depend on "play:1";
+        fragment_prefetch: lookups prefetched for cache misses only,
+            so the view queryset should not prefetch them itself.
+
+    Usage:
+        class Meta:
+            list_serializer_class = FragmentListSerializer
+    """
+
+    fragment_version: str = None
+    fragment_prefetch: tuple[str, ...] = ()
+
+    def get_fragment_key(self, instance: Model, version: int) -> str:
+        request = self.context.get("request")
+        # Image urls are absolute, so fragments differ between hosts.
+        host = request.build_absolute_uri("/") if request else ""
+        return (
+            f"{FRAGMENT_KEY_PREFIX}:{instance._meta.label_lower}:"
+            f"{instance.pk}:{type(self).__name__}:{version}:{host}"
+        )
+
+    def to_representation_many(self, instances: list[Model]) -> list[dict]:
+        versions, _ = get_validators(
+            f"{self.fragment_version}:{instance.pk}" for instance in instances
+        )
+        keys = [
+            self.get_fragment_key(
+                instance, versions[f"{self.fragment_version}:{instance.pk}"]
+            )
+            for instance in instances
+        ]
+        fragments = cache.get_many(keys)
+        missing = [
+            (key, instance)
+            for key, instance in zip(keys, instances)
+            if key not in fragments
+        ]
+        if fragments:
+            count_cache_event("fragments", "hit", len(fragments))
+        if missing:
+            started = time.monotonic()
+            self.prefetch_fragments([instance for _, instance in missing])
+            fetched = {}
+            for key, instance in missing:
+                fetched[key] = super().to_representation(instance)
+            count_cache_miss(
+                "fragments", time.monotonic() - started, len(missing)
+            )
+            cache.set_many(
+                fetched, timeout=settings.THEATRE_FRAGMENT_CACHE_TTL
+            )
+            fragments.update(fetched)
+        return [fragments[key] for key in keys]
+
+    def prefetch_fragments(self, instances: list[Model]) -> None:
+        """Load relations of objects missing in the cache."""
+        prefetch_related_objects(instances, *self.fragment_prefetch)
+
+    def to_representation(self, instance: Model) -> dict:
+        return self.to_representation_many([instance])[0]
+
+
+class FragmentListSerializer(serializers.ListSerializer):
+    """List serializer reading all fragments of a page at once."""
+
+    def to_representation(self, data) -> list[dict]:
+        if isinstance(data, BaseManager):
+            data = data.all()
+        return self.child.to_representation_many(list(data))
@@ -0,0 +1,26 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class SeatConflict(APIException):
+    """Raised when requested seats are already taken by other bookings."""
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the requested seats are already taken."
+    default_code = "seat_conflict"
+
+    def __init__(self, seats: list[dict]) -> None:
+        super().__init__()
+        # Seat coordinates are kept as integers instead of ErrorDetail
+        # strings so clients can match them against their request.
+        self.detail = {
+            "detail": self.detail,
+            "conflicts": [
+                {
+                    "performance": seat["performance_id"],
+                    "row": seat["row"],
+                    "seat": seat["seat"],
+                }
+                for seat in seats
+            ],
+        }
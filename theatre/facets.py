@@ -0,0 +1,97 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, QuerySet
+
+from theatre.cache_metrics import count_cache_event, count_cache_miss
+from theatre.caching import get_validators
+from theatre.models import Play
+from theatre.registry import genres
+
+FACETS_KEY_PREFIX = "theatre:facets"
+# Version names the facets depend on, counts and names.
+FACET_VERSIONS = ("plays", "genres", "artists")
+FACET_LIMIT = 50
+
+
+def genre_facet(play_ids: QuerySet) -> list[dict]:
+    counts = (
+        Play.genres.through.objects.filter(play_id__in=play_ids)
+        .values("genre_id")
+        .annotate(count=Count("play_id"))
+        .order_by("-count", "genre_id")[:FACET_LIMIT]
+    )
+    return [
+        {
+            "id": row["genre_id"],
+            "name": genres.get(row["genre_id"]).name,
+            "count": row["count"],
+        }
+        for row in counts
+    ]
+
+
+def artist_facet(play_ids: QuerySet) -> list[dict]:
+    counts = (
+        Play.artists.through.objects.filter(play_id__in=play_ids)
+        .values("artist_id", "artist__first_name", "artist__last_name")
+        .annotate(count=Count("play_id"))
+        .order_by("-count", "artist_id")[:FACET_LIMIT]
+    )
+    return [
+        {
+            "id": row["artist_id"],
+            "full_name": (
+                f"{row['artist__first_name']} {row['artist__last_name']}"
+            ),
+            "count": row["count"],
+        }
+        for row in counts
+    ]
+
+
+FACETS = {"genres": genre_facet, "artists": artist_facet}
+
+
+def play_facets(
+        queryset: QuerySet, dimensions: list[str], filters: dict
+) -> dict[str, list[dict]]:
+    """
+    Number of plays of the filtered queryset per genre and per artist,
+    the FACET_LIMIT most frequent values of every requested dimension.
+
+    Every dimension is one grouped query over the through table,
+    restricted to the ids of the filtered plays. Results are cached
+    per normalized filter set (so all pages and orderings of the same
+    filters share them) and the versions of plays, genres and artists.
+    """
+    versions, _ = get_validators(FACET_VERSIONS)
+    raw_key = json.dumps(
+        {"filters": filters, "versions": versions}, sort_keys=True
+    )
+    digest = hashlib.md5(raw_key.encode()).hexdigest()
+    keys = {
+        dimension: f"{FACETS_KEY_PREFIX}:{dimension}:{digest}"
+        for dimension in dimensions
+    }
+    stored = cache.get_many(keys.values())
+    play_ids = queryset.order_by().values("id")
+    facets = {}
+    for dimension in dimensions:
+        facet = stored.get(keys[dimension])
+        if facet is None:
+            started = time.monotonic()
+            facet = FACETS[dimension](play_ids)
+            count_cache_miss("facets", time.monotonic() - started)
+            cache.set(
+                keys[dimension],
+                facet,
+                timeout=settings.THEATRE_CATALOG_CACHE_TTL,
+            )
+        else:
+            count_cache_event("facets", "hit")
+        facets[dimension] = facet
+    return facets
@@ -0,0 +1,163 @@
+import random
+import statistics
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from theatre.booking import OPTIMISTIC, PESSIMISTIC, book_tickets
+from theatre.exceptions import SeatConflict
+from theatre.models import Performance, Play, TheatreHall
+
+
+class Command(BaseCommand):
+    """
+    Custom management command to benchmark booking concurrency modes.
+
+    For every mode a temporary performance is created and booked
+    by several threads at once, each thread picks random seats so
+    bookings collide more and more as the hall fills up.
+    Reports bookings/sec, conflicts, database errors and latencies.
+    All benchmark data is deleted afterwards.
+    """
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--mode",
+            choices=[PESSIMISTIC, OPTIMISTIC],
+            action="append",
+            help="Concurrency mode to benchmark, all modes by default.",
+        )
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument(
+            "--rows", type=int, default=50, help="Rows of the benchmark hall."
+        )
+        parser.add_argument(
+            "--seats-in-row",
+            type=int,
+            default=60,
+            help="Seats in every row of the benchmark hall.",
+        )
+        parser.add_argument(
+            "--tickets-per-booking",
+            type=int,
+            default=2,
+            help="Adjacent seats booked by every request.",
+        )
+        parser.add_argument(
+            "--attempts",
+            type=int,
+            default=None,
+            help="Booking attempts per thread, "
+            "enough to oversell the hall by default.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        modes = options["mode"] or [PESSIMISTIC, OPTIMISTIC]
+        for mode in modes:
+            self.run_mode(mode, options)
+
+    def run_mode(self, mode: str, options: dict) -> None:
+        rows, seats_in_row = options["rows"], options["seats_in_row"]
+        threads_count = options["threads"]
+        tickets_per_booking = options["tickets_per_booking"]
+        attempts = options["attempts"] or (
+            rows * seats_in_row // tickets_per_booking // threads_count + 1
+        ) * 2
+
+        theatre_hall = TheatreHall.objects.create(
+            name=f"Benchmark hall {uuid.uuid4()}",
+            rows=rows,
+            seats_in_row=seats_in_row,
+        )
+        play = Play.objects.create(title="Benchmark", description="Benchmark")
+        performance = Performance.objects.create(
+            play=play, theatre_hall=theatre_hall, show_time=datetime.now()
+        )
+        users = [
+            get_user_model().objects.create_user(
+                f"benchmark-{uuid.uuid4()}@example.com"
+            )
+            for _ in range(threads_count)
+        ]
+
+        latencies, results = [], {"booked": 0, "conflicts": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def worker(user) -> None:
+            local_latencies, local_results = [], dict.fromkeys(results, 0)
+            try:
+                for _ in range(attempts):
+                    row = random.randint(1, rows)
+                    first_seat = random.randint(
+                        1, seats_in_row - tickets_per_booking + 1
+                    )
+                    tickets = [
+                        {
+                            "performance_id": performance.id,
+                            "row": row,
+                            "seat": seat,
+                        }
+                        for seat in range(
+                            first_seat, first_seat + tickets_per_booking
+                        )
+                    ]
+                    started = time.perf_counter()
+                    try:
+                        book_tickets(user, tickets, concurrency=mode)
+                        local_results["booked"] += 1
+                    except SeatConflict:
+                        local_results["conflicts"] += 1
+                    except DatabaseError:
+                        local_results["errors"] += 1
+                    local_latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(local_latencies)
+                for key, value in local_results.items():
+                    results[key] += value
+
+        threads = [
+            threading.Thread(target=worker, args=(user,)) for user in users
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        performance.refresh_from_db()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{mode}: {threads_count} threads, "
+                f"{len(latencies)} attempts in {elapsed:.2f}s"
+            )
+        )
+        self.stdout.write(
+            f"  bookings/sec: {results['booked'] / elapsed:.1f}\n"
+            f"  booked: {results['booked']} "
+            f"({performance.tickets_sold} of {rows * seats_in_row} seats)\n"
+            f"  conflicts: {results['conflicts']}\n"
+            f"  errors: {results['errors']}\n"
+            f"  p50 latency: {self.percentile(latencies, 50):.1f}ms\n"
+            f"  p99 latency: {self.percentile(latencies, 99):.1f}ms"
+        )
+
+        performance.delete()
+        play.delete()
+        theatre_hall.delete()
+        get_user_model().objects.filter(
+            id__in=[user.id for user in users]
+        ).delete()
+
+    @staticmethod
+    def percentile(latencies: list[float], percent: int) -> float:
+        if len(latencies) < 2:
+            return sum(latencies) * 1000
+        return statistics.quantiles(latencies, n=100)[percent - 1] * 1000
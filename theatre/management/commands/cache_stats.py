@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from theatre.cache_metrics import (
+    CACHE_NAMESPACES,
+    collect_cache_stats,
+    reset_cache_stats,
+)
+from theatre.caching import require_shared_cache
+
+
+class Command(BaseCommand):
+    """
+    Custom management command to report, per cache namespace,
+    hit, miss and stale counts, hit ratio, average miss latency,
+    entry count and approximate memory, and evictions
+    of the cache backend where it reports them.
+    """
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--namespace",
+            action="append",
+            choices=list(CACHE_NAMESPACES),
+            help="Cache namespace to report, all by default.",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Reset hit, miss and stale counters after reporting.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        require_shared_cache()
+        namespaces = options["namespace"] or list(CACHE_NAMESPACES)
+        stats = collect_cache_stats(namespaces)
+        for namespace, report in stats["namespaces"].items():
+            ratio = (report["hit_ratio"] or 0) * 100
+            self.stdout.write(
+                f"{namespace}: hit {report['hit']}, miss {report['miss']}, "
+                f"stale {report['stale']}, hit ratio {ratio:.1f}%, "
+                f"miss latency {self.format(report['miss_latency_ms'])}ms, "
+                f"entries {self.format(report['entries'])}, "
+                f"memory {self.format(report['memory'])} bytes"
+            )
+        self.stdout.write(
+            f"{stats['backend']}: evictions {self.format(stats['evictions'])}"
+        )
+        if options["reset"]:
+            reset_cache_stats(namespaces)
+            self.stdout.write(self.style.SUCCESS("Counters reset"))
+
+    @staticmethod
+    def format(value) -> str:
+        return "n/a" if value is None else str(value)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from theatre.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    """
+    Custom management command to delete expired idempotency keys
+    in batches, so the purge does not hold long locks on the table.
+    """
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of keys deleted per statement.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        purged = 0
+        while True:
+            expired_ids = list(
+                IdempotencyKey.objects.filter(
+                    expires_at__lte=timezone.now()
+                ).values_list("id", flat=True)[:options["batch_size"]]
+            )
+            if not expired_ids:
+                break
+            purged += IdempotencyKey.objects.filter(
+                id__in=expired_ids
+            ).delete()[0]
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Purged {purged} expired idempotency keys")
+        )
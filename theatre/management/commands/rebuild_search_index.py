@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from theatre.models import Play
+from theatre.search import index_plays, prune_plays, rebuild_artist_index
+
+
+class Command(BaseCommand):
+    """
+    Custom management command to rebuild the play search documents
+    and the artist search index, e.g. after bulk writes that bypass
+    model signals. Plays are reindexed in chunks, one transaction each.
+    """
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of plays reindexed per transaction.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        chunk_size = options["chunk_size"]
+        last_id, indexed = 0, 0
+
+        while True:
+            play_ids = list(
+                Play.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:chunk_size]
+            )
+            if not play_ids:
+                break
+            with transaction.atomic():
+                index_plays(play_ids)
+            indexed += len(play_ids)
+            last_id = play_ids[-1]
+
+        prune_plays()
+        rebuild_artist_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} plays"))
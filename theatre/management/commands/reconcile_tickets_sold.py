@@ -0,0 +1,120 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from theatre.booking import release_expired_holds
+from theatre.caching import bump_versions, require_shared_cache
+from theatre.models import Performance, SeatHold, Ticket
+
+
+class Command(BaseCommand):
+    """
+    Custom management command to recompute the denormalized
+    Performance.tickets_sold and Performance.seats_held counters
+    from the ticket and seat hold tables. Expired holds are released
+    before active holds are counted (unless it is a dry run).
+    Performances are processed in chunks, every chunk is locked
+    while it is recounted so concurrent bookings are not lost.
+    """
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of performances recounted per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drift without fixing the counters.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        require_shared_cache()
+        chunk_size = options["chunk_size"]
+        dry_run = options["dry_run"]
+        last_id, checked, drifted = 0, 0, 0
+
+        while True:
+            with transaction.atomic():
+                performances = list(
+                    Performance.objects.select_for_update()
+                    .filter(id__gt=last_id)
+                    .order_by("id")
+                    .only("id", "tickets_sold", "seats_held")[:chunk_size]
+                )
+                if not performances:
+                    break
+                performance_ids = [
+                    performance.id for performance in performances
+                ]
+                if not dry_run and release_expired_holds(performance_ids):
+                    seats_held = dict(
+                        Performance.objects.filter(
+                            id__in=performance_ids
+                        ).values_list("id", "seats_held")
+                    )
+                    for performance in performances:
+                        performance.seats_held = seats_held[performance.id]
+
+                actual_counts = {
+                    "tickets_sold": self.count_per_performance(
+                        Ticket, performance_ids
+                    ),
+                    "seats_held": self.count_per_performance(
+                        SeatHold, performance_ids
+                    ),
+                }
+                to_fix = []
+                for performance in performances:
+                    drifted_counters = False
+                    for counter_name, counts in actual_counts.items():
+                        stored = getattr(performance, counter_name)
+                        actual = counts.get(performance.id, 0)
+                        if stored != actual:
+                            self.stdout.write(
+                                f"Performance {performance.id}: "
+                                f"{counter_name} stored {stored}, "
+                                f"actual {actual}"
+                            )
+                            setattr(performance, counter_name, actual)
+                            drifted_counters = True
+                    if drifted_counters:
+                        to_fix.append(performance)
+
+                if to_fix and not dry_run:
+                    Performance.objects.bulk_update(
+                        to_fix, ["tickets_sold", "seats_held"]
+                    )
+                    bump_versions(
+                        [
+                            "performances",
+                            *[
+                                f"performance:{performance.id}"
+                                for performance in to_fix
+                            ],
+                        ]
+                    )
+
+            checked += len(performances)
+            drifted += len(to_fix)
+            last_id = performances[-1].id
+
+        message = f"Checked {checked} performances, {drifted} with drift"
+        if drifted and dry_run:
+            self.stdout.write(self.style.WARNING(f"{message} (not fixed)"))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
+
+    @staticmethod
+    def count_per_performance(
+            model: type[Ticket | SeatHold], performance_ids: list[int]
+    ) -> dict[int, int]:
+        return dict(
+            model.objects.filter(performance_id__in=performance_ids)
+            .order_by()
+            .values("performance_id")
+            .annotate(count=Count("id"))
+            .values_list("performance_id", "count")
+        )
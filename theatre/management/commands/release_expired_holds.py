@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from theatre.booking import release_expired_holds
+from theatre.caching import require_shared_cache
+
+
+class Command(BaseCommand):
+    """
+    Custom management command to release expired seat holds in bulk.
+    With --loop the command keeps sweeping every --interval seconds
+    and can be run as a background worker.
+    """
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of holds deleted per transaction.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep sweeping until the process is stopped.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=10,
+            help="Seconds between sweeps in loop mode.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        require_shared_cache()
+        while True:
+            released = release_expired_holds(
+                batch_size=options["batch_size"]
+            )
+            self.stdout.write(f"Released {released} expired seat holds")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
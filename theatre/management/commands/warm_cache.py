@@ -0,0 +1,195 @@
+import math
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+from theatre.caching import require_shared_cache
+from theatre.models import Artist, Performance, Play
+from theatre.views import (
+    ArtistViewSet,
+    GenreViewSet,
+    PerformanceViewSet,
+    PlayViewSet,
+)
+
+
+class Command(BaseCommand):
+    """
+    Custom management command to warm the response cache
+    after a deploy or a cache flush.
+
+    Renders the first pages of the performance list for every
+    upcoming date, details of the plays and artists with most
+    tickets sold for upcoming performances and the genre list.
+    Pages are rendered concurrently, bypassing throttling,
+    for the host clients use, since cache keys include it.
+    Reports the status, size and time of every page.
+    """
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--base-url",
+            default="http://localhost:8000",
+            help="Scheme and host clients request the API with.",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=14,
+            help="Number of upcoming dates with performances to warm.",
+        )
+        parser.add_argument(
+            "--pages",
+            type=int,
+            default=2,
+            help="Performance list pages warmed for every date.",
+        )
+        parser.add_argument(
+            "--plays",
+            type=int,
+            default=20,
+            help="Number of hot play details to warm.",
+        )
+        parser.add_argument(
+            "--artists",
+            type=int,
+            default=20,
+            help="Number of hot artist details to warm.",
+        )
+        parser.add_argument("--workers", type=int, default=4)
+
+    def handle(self, *args, **options) -> None:
+        require_shared_cache()
+        base_url = urlsplit(options["base_url"])
+        self.factory = RequestFactory(
+            HTTP_HOST=base_url.netloc,
+            **{"wsgi.url_scheme": base_url.scheme or "http"},
+        )
+        pages = self.collect_pages(options)
+
+        started = time.perf_counter()
+        if options["workers"] > 1:
+            with ThreadPoolExecutor(options["workers"]) as executor:
+                results = list(executor.map(self.render_in_thread, pages))
+        else:
+            results = [self.render(page) for page in pages]
+        elapsed = time.perf_counter() - started
+
+        for url, status_code, size, duration in results:
+            self.stdout.write(
+                f"{status_code} {url} {size} bytes {duration * 1000:.1f}ms"
+            )
+        failed = sum(1 for _, status_code, *_ in results if status_code != 200)
+        durations = [duration for *_, duration in results] or [0]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Warmed {len(results) - failed} of {len(results)} pages "
+                f"in {elapsed:.2f}s, "
+                f"{sum(size for _, _, size, _ in results)} bytes, "
+                f"p50 {statistics.median(durations) * 1000:.1f}ms, "
+                f"max {max(durations) * 1000:.1f}ms"
+            )
+        )
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{failed} pages failed"))
+
+    def collect_pages(self, options: dict) -> list[tuple]:
+        """Views, urls and kwargs of all pages to render."""
+        now = timezone.now()
+        upcoming = Q(performances__show_time__gte=now)
+        performance_list = PerformanceViewSet.as_view(
+            {"get": "list"}, throttle_classes=()
+        )
+        play_detail = PlayViewSet.as_view(
+            {"get": "retrieve"}, throttle_classes=()
+        )
+        artist_detail = ArtistViewSet.as_view(
+            {"get": "retrieve"}, throttle_classes=()
+        )
+        genre_list = GenreViewSet.as_view(
+            {"get": "list"}, throttle_classes=()
+        )
+
+        pages = [(genre_list, reverse("theatre:genre-list"), {})]
+        page_size = PerformanceViewSet().pagination_class.page_size
+        dates = (
+            Performance.objects.filter(show_time__gte=now)
+            .annotate(date=TruncDate("show_time"))
+            .values("date")
+            .annotate(count=Count("id"))
+            .order_by("date")
+            .values_list("date", "count")[:options["days"]]
+        )
+        for date, count in dates:
+            last_page = min(options["pages"], math.ceil(count / page_size))
+            for page in range(1, last_page + 1):
+                query = f"date={date.isoformat()}"
+                if page > 1:
+                    query += f"&page={page}"
+                pages.append(
+                    (
+                        performance_list,
+                        f"{reverse('theatre:performance-list')}?{query}",
+                        {},
+                    )
+                )
+
+        hot_plays = (
+            Play.objects.filter(upcoming)
+            .annotate(sold=Sum("performances__tickets_sold"))
+            .order_by("-sold", "id")
+            .values_list("id", flat=True)[:options["plays"]]
+        )
+        for play_id in hot_plays:
+            pages.append(
+                (
+                    play_detail,
+                    reverse("theatre:play-detail", args=[play_id]),
+                    {"pk": str(play_id)},
+                )
+            )
+
+        hot_artists = (
+            Artist.objects.filter(
+                plays__performances__show_time__gte=now
+            )
+            .annotate(sold=Sum("plays__performances__tickets_sold"))
+            .order_by("-sold", "id")
+            .values_list("id", flat=True)[:options["artists"]]
+        )
+        for artist_id in hot_artists:
+            pages.append(
+                (
+                    artist_detail,
+                    reverse("theatre:artist-detail", args=[artist_id]),
+                    {"pk": str(artist_id)},
+                )
+            )
+        return pages
+
+    def render(self, page: tuple) -> tuple[str, int, int, float]:
+        view, url, kwargs = page
+        started = time.perf_counter()
+        response = view(self.factory.get(url), **kwargs)
+        response.render()
+        return (
+            url,
+            response.status_code,
+            len(response.content),
+            time.perf_counter() - started,
+        )
+
+    def render_in_thread(self, page: tuple) -> tuple[str, int, int, float]:
+        try:
+            return self.render(page)
+        finally:
+            connection.close()
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-18 12:51
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_tickets_sold(apps, schema_editor):
+    Performance = apps.get_model("theatre", "Performance")
+    Ticket = apps.get_model("theatre", "Ticket")
+    sold = (
+        Ticket.objects.filter(performance=OuterRef("pk"))
+        .order_by()
+        .values("performance")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Performance.objects.update(tickets_sold=Coalesce(Subquery(sold), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("theatre", "0014_alter_performance_image"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="performance",
+            name="tickets_sold",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_tickets_sold, migrations.RunPython.noop),
+    ]
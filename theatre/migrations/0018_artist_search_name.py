@@ -0,0 +1,100 @@
+# Generated by Django 5.0.1 on 2026-10-18 13:27
+
+import django.db.models.functions.text
+import theatre.models
+from django.db import migrations, models
+
+SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE theatre_artist_search USING fts5(
+        search_name,
+        content='theatre_artist',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER theatre_artist_search_insert
+    AFTER INSERT ON theatre_artist BEGIN
+        INSERT INTO theatre_artist_search (rowid, search_name)
+        VALUES (new.id, new.search_name);
+    END
+    """,
+    """
+    CREATE TRIGGER theatre_artist_search_delete
+    AFTER DELETE ON theatre_artist BEGIN
+        INSERT INTO theatre_artist_search
+            (theatre_artist_search, rowid, search_name)
+        VALUES ('delete', old.id, old.search_name);
+    END
+    """,
+    """
+    CREATE TRIGGER theatre_artist_search_update
+    AFTER UPDATE OF first_name, last_name ON theatre_artist BEGIN
+        INSERT INTO theatre_artist_search
+            (theatre_artist_search, rowid, search_name)
+        VALUES ('delete', old.id, old.search_name);
+        INSERT INTO theatre_artist_search (rowid, search_name)
+        VALUES (new.id, new.search_name);
+    END
+    """,
+    """
+    INSERT INTO theatre_artist_search (theatre_artist_search)
+    VALUES ('rebuild')
+    """,
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS theatre_artist_search_insert",
+    "DROP TRIGGER IF EXISTS theatre_artist_search_delete",
+    "DROP TRIGGER IF EXISTS theatre_artist_search_update",
+    "DROP TABLE IF EXISTS theatre_artist_search",
+]
+POSTGRESQL_CREATE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX theatre_artist_search_name_trgm
+    ON theatre_artist USING gin (search_name gin_trgm_ops)
+    """,
+]
+POSTGRESQL_DROP = ["DROP INDEX IF EXISTS theatre_artist_search_name_trgm"]
+
+
+def create_search_index(apps, schema_editor):
+    statements = {
+        "sqlite": SQLITE_CREATE,
+        "postgresql": POSTGRESQL_CREATE,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    statements = {
+        "sqlite": SQLITE_DROP,
+        "postgresql": POSTGRESQL_DROP,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("theatre", "0017_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="artist",
+            name="search_name",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.functions.text.Lower(
+                    theatre.models.ConcatText(
+                        "first_name", models.Value(" "), "last_name"
+                    )
+                ),
+                output_field=models.CharField(max_length=511),
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,93 @@
+from django.db import migrations
+
+SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE theatre_play_search USING fts5(
+        title,
+        description,
+        genres,
+        artists,
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+]
+SQLITE_INSERT = """
+    INSERT INTO theatre_play_search
+        (rowid, title, description, genres, artists)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+SQLITE_DROP = ["DROP TABLE IF EXISTS theatre_play_search"]
+POSTGRESQL_CREATE = [
+    """
+    CREATE TABLE theatre_play_search (
+        play_id bigint PRIMARY KEY,
+        document tsvector NOT NULL
+    )
+    """,
+    """
+    CREATE INDEX theatre_play_search_document
+    ON theatre_play_search USING gin (document)
+    """,
+]
+POSTGRESQL_INSERT = """
+    INSERT INTO theatre_play_search (play_id, document)
+    VALUES (
+        %s,
+        setweight(to_tsvector('english', %s), 'A')
+        || setweight(to_tsvector('english', %s), 'C')
+        || setweight(to_tsvector('english', %s), 'B')
+        || setweight(to_tsvector('english', %s), 'B')
+    )
+"""
+POSTGRESQL_DROP = ["DROP TABLE IF EXISTS theatre_play_search"]
+
+
+def create_search_documents(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {
+        "sqlite": SQLITE_CREATE,
+        "postgresql": POSTGRESQL_CREATE,
+    }.get(vendor)
+    if statements is None:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+    Play = apps.get_model("theatre", "Play")
+    documents = [
+        (
+            play.id,
+            play.title,
+            play.description,
+            " ".join(genre.name for genre in play.genres.all()),
+            " ".join(
+                f"{artist.first_name} {artist.last_name}"
+                for artist in play.artists.all()
+            ),
+        )
+        for play in Play.objects.prefetch_related("genres", "artists")
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            SQLITE_INSERT if vendor == "sqlite" else POSTGRESQL_INSERT,
+            documents,
+        )
+
+
+def drop_search_documents(apps, schema_editor):
+    statements = {
+        "sqlite": SQLITE_DROP,
+        "postgresql": POSTGRESQL_DROP,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("theatre", "0018_artist_search_name"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_documents, drop_search_documents),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+# unaccent() is only STABLE, so it is wrapped with a fixed dictionary
+# into an IMMUTABLE function that can be indexed.
+POSTGRESQL_CREATE = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    CREATE OR REPLACE FUNCTION theatre_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """,
+    "DROP INDEX IF EXISTS theatre_artist_search_name_trgm",
+    """
+    CREATE INDEX theatre_artist_search_name_trgm
+    ON theatre_artist USING gin (theatre_unaccent(search_name) gin_trgm_ops)
+    """,
+]
+POSTGRESQL_DROP = [
+    "DROP INDEX IF EXISTS theatre_artist_search_name_trgm",
+    """
+    CREATE INDEX theatre_artist_search_name_trgm
+    ON theatre_artist USING gin (search_name gin_trgm_ops)
+    """,
+    "DROP FUNCTION IF EXISTS theatre_unaccent(text)",
+]
+
+
+def create_unaccent_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in POSTGRESQL_CREATE:
+            schema_editor.execute(statement)
+
+
+def drop_unaccent_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in POSTGRESQL_DROP:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("theatre", "0019_play_search"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_unaccent_index, drop_unaccent_index),
+    ]
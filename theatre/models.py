@@ -1,11 +1,19 @@
 import os
+import threading
 import uuid
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Lower
+from django.utils.functional import cached_property
 from django.utils.text import slugify
 
+from theatre.caching import bump_versions
+from theatre.registry import theatre_halls
+from theatre.seating import SeatMap
+
 
 def object_image_file_path(
         instance: models.Model,
@@ -22,11 +30,28 @@ def object_image_file_path(
     return os.path.join("uploads", directory, filename)
 
 
+class ConcatText(models.Func):
+    """
+    Concatenate text expressions with the || operator. Unlike CONCAT(),
+    which is only STABLE on PostgreSQL, it may define a generated column.
+    """
+
+    arg_joiner = " || "
+    template = "(%(expressions)s)"
+    output_field = models.CharField()
+
+
 class Artist(models.Model):
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
     about = models.TextField(blank=True)
     image = models.ImageField(upload_to=object_image_file_path, null=True)
+    # Full name as one column, indexed for search (see theatre.search).
+    search_name = models.GeneratedField(
+        expression=Lower(ConcatText("first_name", Value(" "), "last_name")),
+        output_field=models.CharField(max_length=511),
+        db_persist=True,
+    )
 
     @property
     def full_name(self) -> str:
@@ -57,6 +82,32 @@ class Play(models.Model):
     class Meta:
         ordering = ("title",)
 
+    @cached_property
+    def genre_ids(self) -> list[int]:
+        """
+        Ids of the play genres read from the m2m table only,
+        genres themselves are resolved from theatre.registry.genres.
+        """
+        return list(
+            Play.genres.through.objects.filter(play_id=self.pk)
+            .order_by("id")
+            .values_list("genre_id", flat=True)
+        )
+
+    @staticmethod
+    def load_genre_ids(plays: list["Play"]) -> None:
+        """Set genre_ids of many plays with a single query."""
+        genre_ids = {play.pk: [] for play in plays}
+        through_rows = (
+            Play.genres.through.objects.filter(play_id__in=genre_ids)
+            .order_by("id")
+            .values_list("play_id", "genre_id")
+        )
+        for play_id, genre_id in through_rows:
+            genre_ids[play_id].append(genre_id)
+        for play in plays:
+            play.genre_ids = genre_ids[play.pk]
+
     def __str__(self) -> str:
         return self.title
 
@@ -85,10 +136,61 @@ class Performance(models.Model):
     image = models.ImageField(
         upload_to=object_image_file_path, null=True
     )
+    tickets_sold = models.PositiveIntegerField(default=0)
+    seats_held = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ("-show_time",)
 
+    @property
+    def hall(self) -> TheatreHall:
+        """Theatre hall from the in-process registry, without a query."""
+        return theatre_halls.get(self.theatre_hall_id)
+
+    @property
+    def tickets_available(self) -> int:
+        return self.hall.capacity - self.tickets_sold - self.seats_held
+
+    @staticmethod
+    def shift_counter(
+            counter_name: str, deltas_by_performance: dict[int, int]
+    ) -> None:
+        """
+        Shift a denormalized counter (tickets_sold or seats_held)
+        of many performances by the given deltas
+        with a single UPDATE statement.
+        Seat maps change with the counters, so cached versions
+        of the performances are bumped as well.
+        """
+        deltas_by_performance = {
+            performance_id: delta
+            for performance_id, delta in deltas_by_performance.items()
+            if delta
+        }
+        if not deltas_by_performance:
+            return
+        Performance.objects.filter(id__in=deltas_by_performance).update(
+            **{
+                counter_name: F(counter_name) + Case(
+                    *[
+                        When(id=performance_id, then=delta)
+                        for performance_id, delta
+                        in deltas_by_performance.items()
+                    ],
+                    default=0,
+                )
+            }
+        )
+        bump_versions(
+            [
+                "performances",
+                *[
+                    f"performance:{performance_id}"
+                    for performance_id in deltas_by_performance
+                ],
+            ]
+        )
+
     def __str__(self):
         return f"{self.play.title} {self.show_time}"
 
@@ -108,6 +210,66 @@ class Reservation(models.Model):
         ordering = ("-created_at",)
 
 
+class TicketValidationContext:
+    """
+    Context for validating a batch of tickets saved one by one.
+
+    Hall dimensions are cached per performance for the whole batch,
+    so Ticket.clean does not lazy-load performance and theatre hall
+    for every ticket. Trusted bulk paths can set trust_db_constraints
+    to skip the foreign key and unique_together SELECTs of full_clean
+    and rely on the database constraints instead.
+
+    Usage:
+        with TicketValidationContext(trust_db_constraints=True) as context:
+            context.load_halls(performance_ids)
+            for ticket in tickets:
+                ticket.save()
+    """
+
+    _local = threading.local()
+
+    def __init__(self, trust_db_constraints: bool = False) -> None:
+        self.trust_db_constraints = trust_db_constraints
+        self.halls: dict[int, SeatMap] = {}
+
+    def __enter__(self) -> "TicketValidationContext":
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        self._local.stack.append(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._local.stack.pop()
+
+    @classmethod
+    def current(cls) -> "TicketValidationContext | None":
+        stack = getattr(cls._local, "stack", None)
+        return stack[-1] if stack else None
+
+    def load_halls(self, performance_ids: list[int]) -> None:
+        """Cache hall dimensions of many performances with one query."""
+        missing_ids = set(performance_ids) - set(self.halls)
+        if not missing_ids:
+            return
+        hall_ids = Performance.objects.filter(
+            id__in=missing_ids
+        ).values_list("id", "theatre_hall_id")
+        for performance_id, theatre_hall_id in hall_ids:
+            self.halls[performance_id] = SeatMap.for_hall(
+                theatre_halls.get(theatre_hall_id)
+            )
+
+    def get_hall(self, performance_id: int) -> SeatMap:
+        if performance_id not in self.halls:
+            self.load_halls([performance_id])
+        if performance_id not in self.halls:
+            raise ValidationError(
+                {"performance": f"Invalid performance id {performance_id}"}
+            )
+        return self.halls[performance_id]
+
+
 class Ticket(models.Model):
     row = models.IntegerField()
     seat = models.IntegerField()
@@ -122,9 +284,13 @@ class Ticket(models.Model):
     def validate_tickets(
             row: int,
             seat: int,
-            theater_hall: TheatreHall,
+            theater_hall: TheatreHall | SeatMap,
             error_to_raise: ValidationError
     ) -> None:
+        """
+        Check that the seat is inside the theatre hall.
+        When a SeatMap is given, the seat must also be free.
+        """
         for ticket_attr_value, ticket_attr_name, theater_hall_attr_name in [
             (row, "row", "rows"),
             (seat, "seat", "seats_in_row")
@@ -138,12 +304,23 @@ class Ticket(models.Model):
                         f"(1, {count_attrs})"
                     }
                 )
+        if isinstance(theater_hall, SeatMap) and theater_hall.is_taken(
+                row, seat
+        ):
+            raise error_to_raise(
+                {"seat": f"seat {seat} in row {row} is already taken"}
+            )
 
     def clean(self) -> None:
+        context = TicketValidationContext.current()
         Ticket.validate_tickets(
             self.row,
             self.seat,
-            self.performance.theatre_hall,
+            (
+                context.get_hall(self.performance_id)
+                if context
+                else self.performance.hall
+            ),
             ValidationError
         )
 
@@ -154,10 +331,17 @@ class Ticket(models.Model):
             using=None,
             update_fields=None
     ) -> models.Model:
-        self.full_clean()
-        return super(Ticket, self).save(
-            force_insert, force_update, using, update_fields
-        )
+        context = TicketValidationContext.current()
+        if context and context.trust_db_constraints:
+            self.full_clean(
+                exclude=["performance", "reservation"], validate_unique=False
+            )
+        else:
+            self.full_clean()
+        with transaction.atomic():
+            return super(Ticket, self).save(
+                force_insert, force_update, using, update_fields
+            )
 
     class Meta:
         unique_together = (
@@ -172,3 +356,72 @@ class Ticket(models.Model):
 
     def __str__(self):
         return f"{str(self.performance)} (row: {self.row}, seat: {self.seat})"
+
+
+class SeatHold(models.Model):
+    """
+    Seat temporarily held by a user before the reservation is confirmed.
+    Seats held together share the same token.
+    """
+
+    token = models.UUIDField(default=uuid.uuid4, db_index=True)
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    performance = models.ForeignKey(
+        Performance, on_delete=models.CASCADE, related_name="seat_holds"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds"
+    )
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = (
+            "performance",
+            "row",
+            "seat",
+        )
+        ordering = (
+            "row",
+            "seat",
+        )
+
+    def __str__(self):
+        return (
+            f"{str(self.performance)} (row: {self.row}, seat: {self.seat}) "
+            f"held until {self.expires_at}"
+        )
+
+
+class IdempotencyKey(models.Model):
+    """
+    Response of a request sent with an Idempotency-Key header.
+    The response is empty while the first request is in flight.
+    """
+
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys"
+    )
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = (
+            "user",
+            "key",
+        )
+
+    @property
+    def is_completed(self) -> bool:
+        return self.response_status is not None
+
+    def __str__(self):
+        return f"{self.key} ({self.user})"
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import time
+from functools import cached_property, partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+
+from theatre.cache_metrics import count_cache_event, count_cache_miss
+from theatre.caching import get_validators
+
+COUNT_KEY_PREFIX = "theatre:count"
+
+
+def estimate_count(queryset: QuerySet) -> int | None:
+    """
+    Row estimate of the query planner, None when
+    the database cannot provide one (only PostgreSQL does).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator caching the total count under the given key.
+
+    Counts above THEATRE_PAGINATION_ESTIMATE_THRESHOLD are taken
+    from planner estimates instead of COUNT(*) where available.
+    Cached counts are reported in the "counts" cache namespace.
+    """
+
+    def __init__(self, *args, count_key: str = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self) -> int:
+        if self.count_key:
+            count = cache.get(self.count_key)
+            if count is not None:
+                count_cache_event("counts", "hit")
+                return count
+
+        started = time.monotonic()
+        count = None
+        if isinstance(self.object_list, QuerySet):
+            estimate = estimate_count(self.object_list)
+            if (
+                estimate is not None
+                and estimate > settings.THEATRE_PAGINATION_ESTIMATE_THRESHOLD
+            ):
+                count = estimate
+        if count is None:
+            count = super().count
+
+        if self.count_key:
+            count_cache_miss("counts", time.monotonic() - started)
+            cache.set(
+                self.count_key,
+                count,
+                timeout=settings.THEATRE_PAGINATION_COUNT_CACHE_TTL,
+            )
+        return count
+
+
+class UncountedPaginator(Paginator):
+    """
+    Paginator that never counts, a page fetches one extra row
+    to find out whether there is a next page.
+    """
+
+    count = None
+    # Unknown, 0 keeps the page controls of the browsable API hidden.
+    num_pages = 0
+
+    def validate_number(self, number) -> int:
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise EmptyPage("That page number is not an integer")
+        if number < 1:
+            raise EmptyPage("That page number is less than 1")
+        return number
+
+    def page(self, number) -> Page:
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(
+            self.object_list[bottom:bottom + self.per_page + 1]
+        )
+        if not object_list and number > 1:
+            raise EmptyPage("That page contains no results")
+        page = UncountedPage(object_list[:self.per_page], number, self)
+        page.has_more = len(object_list) > self.per_page
+        return page
+
+
+class UncountedPage(Page):
+    has_more = False
+
+    def has_next(self) -> bool:
+        return self.has_more
+
+
+class CachedCountPagination(PageNumberPagination):
+    """
+    Page number pagination without a COUNT(*) on every page.
+
+    Counts are cached per filtered query and the versions
+    of the data the view depends on (see ConditionalGetMixin),
+    so all pages of the same filter set share a single count.
+    Views without versions are counted exactly every time.
+    Clients can skip counting with ?count=false, the count
+    is null then and only next and previous links are returned.
+    """
+
+    count_query_param = "count"
+
+    def paginate_queryset(
+            self, queryset: QuerySet, request: Request, view=None
+    ) -> list | None:
+        if request.query_params.get(self.count_query_param) == "false":
+            self.django_paginator_class = UncountedPaginator
+        else:
+            self.django_paginator_class = partial(
+                CachedCountPaginator,
+                count_key=self.get_count_key(queryset, view),
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count_key(self, queryset: QuerySet, view) -> str | None:
+        if not hasattr(view, "get_cache_versions"):
+            return None
+        versions, _ = get_validators(view.get_cache_versions())
+        sql, params = queryset.order_by().query.sql_with_params()
+        raw_key = "|".join(
+            [
+                sql,
+                repr(params),
+                ",".join(
+                    f"{name}={version}"
+                    for name, version in sorted(versions.items())
+                ),
+            ]
+        )
+        digest = hashlib.md5(raw_key.encode()).hexdigest()
+        return f"{COUNT_KEY_PREFIX}:{digest}"
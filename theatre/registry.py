@@ -0,0 +1,101 @@
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+
+from theatre.caching import get_validators
+
+
+class LookupRegistry:
+    """
+    Process-local, fully preloaded copy of a tiny read-mostly table.
+
+    All rows are loaded with a single query and looked up by id
+    or by name without touching the database. The table is reloaded
+    when its shared version (the same version names the response
+    cache uses) changes, which is checked at most every
+    THEATRE_REGISTRY_CHECK_INTERVAL seconds. Writes in this process
+    invalidate the registry immediately through model signals.
+    Loaded objects are shared between threads and must not be modified.
+
+    Usage:
+        theatre_halls = LookupRegistry("TheatreHall", "theatre_halls")
+        theatre_halls.get(theatre_hall_id)
+    """
+
+    def __init__(
+            self, model_name: str, version_name: str, name_field: str = "name"
+    ) -> None:
+        self.model_name = model_name
+        self.version_name = version_name
+        self.name_field = name_field
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._by_id: dict[int, models.Model] = {}
+        self._by_name: dict[str, models.Model] = {}
+
+    @property
+    def model(self) -> type[models.Model]:
+        return apps.get_model("theatre", self.model_name)
+
+    def invalidate(self) -> None:
+        self._version = None
+
+    def _shared_version(self) -> int:
+        versions, _ = get_validators([self.version_name])
+        return versions[self.version_name]
+
+    def _reload(self, version: int) -> None:
+        objects = list(self.model.objects.order_by("id"))
+        by_name = {}
+        for obj in reversed(objects):
+            by_name[getattr(obj, self.name_field)] = obj
+        self._by_id = {obj.id: obj for obj in objects}
+        self._by_name = by_name
+        self._version = version
+
+    def _ensure_loaded(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if (
+            not force
+            and self._version is not None
+            and now - self._checked_at
+            < settings.THEATRE_REGISTRY_CHECK_INTERVAL
+        ):
+            return
+        with self._lock:
+            version = self._shared_version()
+            if force or version != self._version:
+                self._reload(version)
+            self._checked_at = now
+
+    def _lookup(self, table_name: str, key) -> models.Model:
+        self._ensure_loaded()
+        obj = getattr(self, table_name).get(key)
+        if obj is None:
+            # Created by another process and not announced yet.
+            self._ensure_loaded(force=True)
+            obj = getattr(self, table_name).get(key)
+        if obj is None:
+            raise self.model.DoesNotExist(
+                f"{self.model_name} {key!r} does not exist"
+            )
+        return obj
+
+    def get(self, pk: int) -> models.Model:
+        return self._lookup("_by_id", pk)
+
+    def get_by_name(self, name: str) -> models.Model:
+        """First object (by id) with the given name."""
+        return self._lookup("_by_name", name)
+
+    def all(self) -> list[models.Model]:
+        self._ensure_loaded()
+        return list(self._by_id.values())
+
+
+genres = LookupRegistry("Genre", "genres")
+theatre_halls = LookupRegistry("TheatreHall", "theatre_halls")
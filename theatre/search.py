@@ -0,0 +1,287 @@
+import re
+from functools import reduce
+from operator import and_, or_
+from typing import Iterable
+
+from django.db import connections
+from django.db.models import F, Func, Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+
+from theatre.models import Artist, Play
+
+TOKEN_PATTERN = re.compile(r"\w+")
+PLAY_SEARCH_TABLE = "theatre_play_search"
+# bm25 weights of title, description, genres and artists on SQLite.
+PLAY_SEARCH_WEIGHTS = (10.0, 1.0, 4.0, 4.0)
+# Insert (or replace) the document of a play on PostgreSQL,
+# tsvector weights A to D rank title matches first.
+PLAY_SEARCH_UPSERT = f"""
+    INSERT INTO {PLAY_SEARCH_TABLE} (play_id, document)
+    VALUES (
+        %s,
+        setweight(to_tsvector('english', %s), 'A')
+        || setweight(to_tsvector('english', %s), 'C')
+        || setweight(to_tsvector('english', %s), 'B')
+        || setweight(to_tsvector('english', %s), 'B')
+    )
+    ON CONFLICT (play_id) DO UPDATE SET document = EXCLUDED.document
+"""
+
+
+def search_tokens(query: str) -> list[str]:
+    """Lowercased words of a search query, punctuation is dropped."""
+    return TOKEN_PATTERN.findall(query.lower())
+
+
+def fts5_query(tokens: list[str]) -> str:
+    """FTS5 query matching documents with a word starting with every token."""
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_artists(queryset: QuerySet, query: str) -> QuerySet:
+    """
+    Filter artists whose full name has a word starting
+    with every token of the query, in any order, best matches first.
+
+    Searches the search_name column, the lowercased full name,
+    with diacritics removed, through the index of the database:
+    an FTS5 table kept in sync by triggers on SQLite, ranked by bm25,
+    and a trigram index of the unaccented name on PostgreSQL,
+    matched by word start regexes and ranked by word similarity.
+    Other databases fall back to unindexed, accent sensitive
+    substring matching ordered by id.
+    The indexes are created in migrations 0018 and 0020, SQLite drops
+    its triggers when a later migration rebuilds the artist
+    table, so such migrations have to recreate them.
+    """
+    tokens = search_tokens(query)
+    if not tokens:
+        return queryset
+    vendor = connections[queryset.db].vendor
+
+    if vendor == "sqlite":
+        return queryset.extra(
+            tables=["theatre_artist_search"],
+            where=[
+                "theatre_artist_search.rowid = theatre_artist.id",
+                "theatre_artist_search MATCH %s",
+            ],
+            params=[fts5_query(tokens)],
+            select={"search_rank": "bm25(theatre_artist_search)"},
+            order_by=["search_rank", "id"],
+        )
+
+    if vendor == "postgresql":
+        from django.contrib.postgres.search import (
+            TrigramSimilarity,
+            TrigramWordSimilarity,
+        )
+
+        # Tokens are word characters only, so they are safe in a regex,
+        # matched case insensitively as LOWER() of the column follows
+        # the database locale. Names matching the query words equally
+        # well are ranked by the similarity of the whole name.
+        query_text = Func(Value(" ".join(tokens)), function="theatre_unaccent")
+        name_text = Func(F("search_name"), function="theatre_unaccent")
+        return (
+            queryset.extra(
+                where=[
+                    "theatre_unaccent(theatre_artist.search_name) "
+                    "~* ('\\m' || theatre_unaccent(%s))"
+                ]
+                * len(tokens),
+                params=tokens,
+            )
+            .annotate(
+                search_rank=TrigramWordSimilarity(query_text, name_text),
+                search_similarity=TrigramSimilarity(query_text, name_text),
+            )
+            .order_by("-search_rank", "-search_similarity", "id")
+        )
+
+    queryset = queryset.filter(
+        reduce(and_, (Q(search_name__contains=token) for token in tokens))
+    )
+    return queryset.order_by("id")
+
+
+def play_documents(play_ids: Iterable[int]) -> list[tuple]:
+    """Id, title, description, genre and artist names of every play."""
+    play_ids = list(play_ids)
+    play_genres = Play.genres.through.objects.filter(play_id__in=play_ids)
+    play_artists = Play.artists.through.objects.filter(play_id__in=play_ids)
+    genre_names, artist_names = {}, {}
+    for play_id, name in play_genres.values_list("play_id", "genre__name"):
+        genre_names.setdefault(play_id, []).append(name)
+    for play_id, first_name, last_name in play_artists.values_list(
+        "play_id", "artist__first_name", "artist__last_name"
+    ):
+        artist_names.setdefault(play_id, []).append(
+            f"{first_name} {last_name}"
+        )
+    return [
+        (
+            play_id,
+            title,
+            description,
+            " ".join(genre_names.get(play_id, [])),
+            " ".join(artist_names.get(play_id, [])),
+        )
+        for play_id, title, description in Play.objects.filter(
+            id__in=play_ids
+        ).values_list("id", "title", "description")
+    ]
+
+
+def remove_plays(play_ids: Iterable[int]) -> None:
+    """Drop search documents of the given plays."""
+    connection = connections[Play.objects.db]
+    if connection.vendor not in ("sqlite", "postgresql"):
+        return
+    column = "rowid" if connection.vendor == "sqlite" else "play_id"
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {PLAY_SEARCH_TABLE} WHERE {column} = %s",
+            [(play_id,) for play_id in play_ids],
+        )
+
+
+def prune_plays() -> None:
+    """Drop search documents of plays that no longer exist."""
+    connection = connections[Play.objects.db]
+    if connection.vendor not in ("sqlite", "postgresql"):
+        return
+    column = "rowid" if connection.vendor == "sqlite" else "play_id"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {PLAY_SEARCH_TABLE} WHERE {column} "
+            f"NOT IN (SELECT id FROM {Play._meta.db_table})"
+        )
+
+
+def rebuild_artist_index() -> None:
+    """
+    Rebuild the SQLite FTS5 artist table from the artist table,
+    PostgreSQL maintains its trigram index itself.
+    """
+    connection = connections[Artist.objects.db]
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO theatre_artist_search (theatre_artist_search) "
+                "VALUES ('rebuild')"
+            )
+
+
+def index_plays(play_ids: Iterable[int]) -> None:
+    """
+    Rebuild search documents of the given plays from their title,
+    description, genre and artist names. Called from model signals,
+    bulk writes have to be followed by rebuild_search_index.
+    """
+    connection = connections[Play.objects.db]
+    play_ids = list(play_ids)
+    if not play_ids or connection.vendor not in ("sqlite", "postgresql"):
+        return
+    documents = play_documents(play_ids)
+    if connection.vendor == "sqlite":
+        remove_plays(play_ids)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {PLAY_SEARCH_TABLE} "
+                "(rowid, title, description, genres, artists) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                documents,
+            )
+    else:
+        with connection.cursor() as cursor:
+            cursor.executemany(PLAY_SEARCH_UPSERT, documents)
+
+
+def search_plays(
+        queryset: QuerySet, query: str, ranked: bool = True
+) -> QuerySet:
+    """
+    Filter plays whose title, description, genre or artist names
+    have a word starting with every token of the query,
+    most relevant first, title matches weigh most.
+
+    Searches one document per play (see index_plays): an FTS5 table
+    on SQLite ranked by weighted bm25, a tsvector with a GIN index
+    on PostgreSQL ranked by ts_rank. Being joined one to one,
+    the search never duplicates plays. Other databases fall back
+    to unindexed substring matching ordered by id.
+    Unranked searches filter by a subquery of matching ids instead
+    of a join, so the queryset can itself be used as a subquery.
+    """
+    tokens = search_tokens(query)
+    if not tokens:
+        return queryset
+    vendor = connections[queryset.db].vendor
+
+    if not ranked and vendor in ("sqlite", "postgresql"):
+        if vendor == "sqlite":
+            sql = (
+                f"SELECT rowid FROM {PLAY_SEARCH_TABLE} "
+                f"WHERE {PLAY_SEARCH_TABLE} MATCH %s"
+            )
+            params = [fts5_query(tokens)]
+        else:
+            sql = (
+                f"SELECT play_id FROM {PLAY_SEARCH_TABLE} "
+                "WHERE document @@ to_tsquery('english', %s)"
+            )
+            params = [" & ".join(f"{token}:*" for token in tokens)]
+        return queryset.filter(id__in=RawSQL(sql, params))
+
+    if vendor == "sqlite":
+        weights = ", ".join(str(weight) for weight in PLAY_SEARCH_WEIGHTS)
+        return queryset.extra(
+            tables=[PLAY_SEARCH_TABLE],
+            where=[
+                f"{PLAY_SEARCH_TABLE}.rowid = theatre_play.id",
+                f"{PLAY_SEARCH_TABLE} MATCH %s",
+            ],
+            params=[fts5_query(tokens)],
+            select={
+                "search_rank": f"bm25({PLAY_SEARCH_TABLE}, {weights})"
+            },
+            order_by=["search_rank", "id"],
+        )
+
+    if vendor == "postgresql":
+        tsquery = " & ".join(f"{token}:*" for token in tokens)
+        return queryset.extra(
+            tables=[PLAY_SEARCH_TABLE],
+            where=[
+                f"{PLAY_SEARCH_TABLE}.play_id = theatre_play.id",
+                f"{PLAY_SEARCH_TABLE}.document "
+                "@@ to_tsquery('english', %s)",
+            ],
+            params=[tsquery],
+            select={
+                "search_rank": f"ts_rank({PLAY_SEARCH_TABLE}.document, "
+                "to_tsquery('english', %s))"
+            },
+            select_params=[tsquery],
+            order_by=["-search_rank", "id"],
+        )
+
+    matching = Play.objects.all()
+    for token in tokens:
+        matching = matching.filter(
+            reduce(
+                or_,
+                (
+                    Q(**{f"{field}__icontains": token})
+                    for field in (
+                        "title",
+                        "description",
+                        "genres__name",
+                        "artists__first_name",
+                        "artists__last_name",
+                    )
+                ),
+            )
+        )
+    return queryset.filter(id__in=matching.values("id")).order_by("id")
@@ -0,0 +1,271 @@
+import base64
+from typing import Iterable, Iterator
+
+from django.apps import apps
+from django.db import models
+from django.utils import timezone
+
+
+class SeatMap:
+    """
+    Compact occupancy bitmap of a theatre hall for a single performance.
+
+    Every seat of the hall is represented by one bit of an integer,
+    seat (row, seat) lives in bit ``(row - 1) * seats_in_row + seat - 1``.
+    Sold seats and seats held by active seat holds are both marked taken.
+    The map exposes ``rows`` and ``seats_in_row`` so it can be used
+    everywhere a TheatreHall is expected for range checks.
+    """
+
+    __slots__ = ("rows", "seats_in_row", "_taken")
+
+    def __init__(self, rows: int, seats_in_row: int, taken: int = 0) -> None:
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+        self._taken = taken
+
+    @classmethod
+    def for_hall(cls, theatre_hall: models.Model) -> "SeatMap":
+        return cls(theatre_hall.rows, theatre_hall.seats_in_row)
+
+    @staticmethod
+    def occupied_seats(performance_ids: Iterable[int]) -> models.QuerySet:
+        """
+        Sold and actively held seats of the given performances
+        as (performance_id, row, seat) tuples, read with a single query.
+        """
+        performance_ids = list(performance_ids)
+        ticket_model = apps.get_model("theatre", "Ticket")
+        seat_hold_model = apps.get_model("theatre", "SeatHold")
+        fields = ("performance_id", "row", "seat")
+        sold = ticket_model.objects.filter(
+            performance_id__in=performance_ids
+        ).order_by().values_list(*fields)
+        held = seat_hold_model.objects.filter(
+            performance_id__in=performance_ids, expires_at__gt=timezone.now()
+        ).order_by().values_list(*fields)
+        return sold.union(held, all=True)
+
+    @classmethod
+    def for_performance(cls, performance: models.Model) -> "SeatMap":
+        """Build the seat map with a single values_list scan."""
+        return cls.for_performances([performance])[performance.id]
+
+    @classmethod
+    def for_performances(
+            cls, performances: Iterable[models.Model]
+    ) -> dict[int, "SeatMap"]:
+        """
+        Build seat maps for several performances
+        with a single values_list scan of tickets and seat holds.
+        Halls are resolved from the in-process registry.
+        """
+        seat_maps = {
+            performance.id: cls.for_hall(performance.hall)
+            for performance in performances
+        }
+        if seat_maps:
+            for performance_id, row, seat in cls.occupied_seats(seat_maps):
+                seat_maps[performance_id].take(row, seat)
+        return seat_maps
+
+    @property
+    def capacity(self) -> int:
+        return self.rows * self.seats_in_row
+
+    @property
+    def taken_count(self) -> int:
+        return self._taken.bit_count()
+
+    @property
+    def available(self) -> int:
+        return self.capacity - self.taken_count
+
+    def contains(self, row: int, seat: int) -> bool:
+        return 1 <= row <= self.rows and 1 <= seat <= self.seats_in_row
+
+    def _bit(self, row: int, seat: int) -> int:
+        return 1 << ((row - 1) * self.seats_in_row + seat - 1)
+
+    def is_taken(self, row: int, seat: int) -> bool:
+        return bool(self._taken & self._bit(row, seat))
+
+    def take(self, row: int, seat: int) -> None:
+        """Mark a seat as taken, seats outside the hall are ignored."""
+        if self.contains(row, seat):
+            self._taken |= self._bit(row, seat)
+
+    def take_many(self, seats: Iterable[tuple[int, int]]) -> None:
+        for row, seat in seats:
+            self.take(row, seat)
+
+    def release(self, row: int, seat: int) -> None:
+        if self.contains(row, seat):
+            self._taken &= ~self._bit(row, seat)
+
+    def iter_taken(self) -> Iterator[tuple[int, int]]:
+        """Yield taken seats ordered by row and seat."""
+        taken = self._taken
+        while taken:
+            lowest = taken & -taken
+            index = lowest.bit_length() - 1
+            taken ^= lowest
+            yield index // self.seats_in_row + 1, index % self.seats_in_row + 1
+
+    def taken_places(self) -> list[dict]:
+        return [{"row": row, "seat": seat} for row, seat in self.iter_taken()]
+
+    def row_bitmaps(self) -> list[str]:
+        """
+        Taken seats of every row as a hex encoded bit mask,
+        bit 0 is the first seat of the row.
+        """
+        full_row = (1 << self.seats_in_row) - 1
+        return [format(~free & full_row, "x") for free in self.free_rows()]
+
+    def free_ranges(self) -> list[list[list[int]]]:
+        """
+        Run-length encoded free seats:
+        for every row a list of [first_seat, last_seat] free ranges.
+        """
+        ranges = []
+        for free in self.free_rows():
+            row_ranges, consumed = [], 0
+            while free:
+                gap = (free & -free).bit_length() - 1
+                free >>= gap
+                length = (~free & (free + 1)).bit_length() - 1
+                first_seat = consumed + gap + 1
+                row_ranges.append([first_seat, first_seat + length - 1])
+                consumed += gap + length
+                free >>= length
+            ranges.append(row_ranges)
+        return ranges
+
+    def to_base64(self) -> str:
+        """
+        Base64 of the whole taken bitmap as little-endian bytes,
+        seat (row, seat) is bit ``(row - 1) * seats_in_row + seat - 1``.
+        """
+        return base64.b64encode(
+            self._taken.to_bytes((self.capacity + 7) // 8, "little")
+        ).decode()
+
+    def free_rows(self) -> list[int]:
+        """Free seats of every row as bit masks, bit 0 is the first seat."""
+        full_row = (1 << self.seats_in_row) - 1
+        taken, masks = self._taken, []
+        for _ in range(self.rows):
+            masks.append(~taken & full_row)
+            taken >>= self.seats_in_row
+        return masks
+
+    def _row_order(self) -> list[int]:
+        """Rows from the middle of the hall outwards, front rows first."""
+        return sorted(
+            range(1, self.rows + 1),
+            key=lambda row: (abs(2 * row - self.rows - 1), row),
+        )
+
+    @staticmethod
+    def _block_starts(free: int, size: int) -> int:
+        """
+        Bit mask of positions where size adjacent free seats start.
+        The run length doubles every step, so only log2(size)
+        big integer operations are needed.
+        """
+        starts, length = free, 1
+        while length < size:
+            step = min(length, size - length)
+            starts &= starts >> step
+            length += step
+        return starts
+
+    @staticmethod
+    def _nearest_bit(mask: int, position: int) -> int:
+        """Index of the set bit of a non-empty mask nearest to position."""
+        candidates = []
+        below = mask & ((1 << (position + 1)) - 1)
+        if below:
+            candidates.append(below.bit_length() - 1)
+        above = mask >> position
+        if above:
+            candidates.append(position + (above & -above).bit_length() - 1)
+        return min(
+            candidates, key=lambda index: (abs(index - position), index)
+        )
+
+    def find_block(
+            self, size: int, free_rows: list[int] = None
+    ) -> tuple[int, int] | None:
+        """
+        Find the best block of size adjacent free seats.
+        Rows closer to the middle of the hall are preferred,
+        within a row the block closest to its centre is chosen.
+        Return row and first seat of the block or None.
+        """
+        if not 1 <= size <= self.seats_in_row:
+            return None
+        if free_rows is None:
+            free_rows = self.free_rows()
+        centre = (self.seats_in_row - size) // 2
+        for row in self._row_order():
+            starts = self._block_starts(free_rows[row - 1], size)
+            if starts:
+                return row, self._nearest_bit(starts, centre) + 1
+        return None
+
+    def best_seats(self, count: int) -> list[tuple[int, int]] | None:
+        """
+        Pick the count best free seats.
+        One block of adjacent seats is preferred, otherwise seats
+        are split into the largest available blocks: the free blocks
+        are collected in one pass over the rows and taken whole,
+        largest and best placed first, the rest of the count goes to
+        the best block that can hold it.
+        Return None when fewer than count seats are free.
+        """
+        if not 1 <= count <= self.available:
+            return None
+
+        free_rows = self.free_rows()
+        block = self.find_block(count, free_rows)
+        if block is not None:
+            row, first_seat = block
+            return [
+                (row, seat) for seat in range(first_seat, first_seat + count)
+            ]
+
+        # Same preference as find_block: middle rows first, then
+        # blocks closest to the centre of their row.
+        row_rank = {row: rank for rank, row in enumerate(self._row_order())}
+        blocks = sorted(
+            (
+                (last_seat - first_seat + 1, row, first_seat)
+                for row, row_ranges in enumerate(self.free_ranges(), start=1)
+                for first_seat, last_seat in row_ranges
+            ),
+            key=lambda block: (
+                -block[0],
+                row_rank[block[1]],
+                abs(block[2] - 1 - (self.seats_in_row - block[0]) // 2),
+                block[2],
+            ),
+        )
+        seats, remaining = [], count
+        for size, row, first_seat in blocks:
+            if size > remaining:
+                break
+            free_rows[row - 1] &= ~(((1 << size) - 1) << (first_seat - 1))
+            seats.extend(
+                (row, seat) for seat in range(first_seat, first_seat + size)
+            )
+            remaining -= size
+            if not remaining:
+                return seats
+
+        row, first_seat = self.find_block(remaining, free_rows)
+        seats.extend(
+            (row, seat) for seat in range(first_seat, first_seat + remaining)
+        )
+        return seats
@@ -1,8 +1,11 @@
-from django.db import transaction
+from django.conf import settings
 from django.db.models import Model
 from rest_framework import serializers
-from rest_framework.exceptions import ValidationError
+from drf_spectacular.utils import extend_schema_field
 
+from theatre.booking import book_tickets
+from theatre.caching import FragmentCacheMixin, FragmentListSerializer
+from theatre.registry import genres
 from theatre.models import (
     Artist,
     Genre,
@@ -12,6 +15,7 @@ from theatre.models import (
     TheatreHall,
     Ticket,
 )
+from theatre.seating import SeatMap
 
 
 class GenreSerializer(serializers.ModelSerializer):
@@ -36,7 +40,9 @@ class ArtistSerializer(serializers.ModelSerializer):
         )
 
 
-class ArtistListSerializer(serializers.ModelSerializer):
+class ArtistListSerializer(FragmentCacheMixin, serializers.ModelSerializer):
+    fragment_version = "artist"
+
     class Meta:
         model = Artist
         fields = (
@@ -44,6 +50,7 @@ class ArtistListSerializer(serializers.ModelSerializer):
             "full_name",
             "image",
         )
+        list_serializer_class = FragmentListSerializer
 
 
 class PlaySerializer(serializers.ModelSerializer):
@@ -59,10 +66,26 @@ class PlaySerializer(serializers.ModelSerializer):
         )
 
 
-class PlayListSerializer(serializers.ModelSerializer):
-    genres = serializers.SlugRelatedField(
-        many=True, read_only=True, slug_field="name"
-    )
+class PlayGenresMixin:
+    """
+    Genres of plays are resolved from the in-process registry,
+    only the m2m table is read, once for all missing fragments.
+    """
+
+    def prefetch_fragments(self, plays: list[Play]) -> None:
+        super().prefetch_fragments(plays)
+        Play.load_genre_ids(plays)
+
+    @staticmethod
+    def play_genres(play: Play) -> list[Genre]:
+        return [genres.get(genre_id) for genre_id in play.genre_ids]
+
+
+class PlayListSerializer(
+    PlayGenresMixin, FragmentCacheMixin, serializers.ModelSerializer
+):
+    genres = serializers.SerializerMethodField()
+    fragment_version = "play"
 
     class Meta:
         model = Play
@@ -72,13 +95,22 @@ class PlayListSerializer(serializers.ModelSerializer):
             "genres",
             "acts",
         )
+        list_serializer_class = FragmentListSerializer
+
+    @extend_schema_field(serializers.ListField(child=serializers.CharField()))
+    def get_genres(self, play: Play) -> list[str]:
+        return [genre.name for genre in self.play_genres(play)]
 
 
-class PlayDetailSerializer(serializers.ModelSerializer):
-    genres = GenreSerializer(many=True, read_only=True)
+class PlayDetailSerializer(
+    PlayGenresMixin, FragmentCacheMixin, serializers.ModelSerializer
+):
+    genres = serializers.SerializerMethodField()
     artists = serializers.SlugRelatedField(
         many=True, read_only=True, slug_field="full_name"
     )
+    fragment_version = "play"
+    fragment_prefetch = ("artists",)
 
     class Meta:
         model = Play
@@ -91,6 +123,10 @@ class PlayDetailSerializer(serializers.ModelSerializer):
             "artists",
         )
 
+    @extend_schema_field(GenreSerializer(many=True))
+    def get_genres(self, play: Play) -> list[dict]:
+        return GenreSerializer(self.play_genres(play), many=True).data
+
 
 class PlayListForArtistSerializer(serializers.ModelSerializer):
 
@@ -99,10 +135,14 @@ class PlayListForArtistSerializer(serializers.ModelSerializer):
         fields = ("id", "title", )
 
 
-class ArtistDetailSerializer(serializers.ModelSerializer):
+class ArtistDetailSerializer(
+    FragmentCacheMixin, serializers.ModelSerializer
+):
     plays = PlayListForArtistSerializer(
         many=True, read_only=True
     )
+    fragment_version = "artist"
+    fragment_prefetch = ("plays",)
 
     class Meta:
         model = Artist
@@ -139,9 +179,11 @@ class PerformanceSerializer(serializers.ModelSerializer):
 class PerformanceListSerializer(serializers.ModelSerializer):
     play_title = serializers.CharField(source="play.title", read_only=True)
     theatre_hall_name = serializers.CharField(
-        source="theatre_hall.name", read_only=True
+        source="hall.name", read_only=True
+    )
+    theatre_hall_capacity = serializers.IntegerField(
+        source="hall.capacity", read_only=True
     )
-    theatre_hall_capacity = serializers.IntegerField(read_only=True)
     tickets_available = serializers.IntegerField(read_only=True)
 
     class Meta:
@@ -157,6 +199,16 @@ class PerformanceListSerializer(serializers.ModelSerializer):
         )
 
 
+class PerformanceAvailabilitySerializer(serializers.ModelSerializer):
+    capacity = serializers.IntegerField(read_only=True)
+    sold = serializers.IntegerField(read_only=True)
+    available = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Performance
+        fields = ("id", "capacity", "sold", "available", )
+
+
 class TheatreHallSerializer(serializers.ModelSerializer):
     class Meta:
         model = TheatreHall
@@ -164,20 +216,18 @@ class TheatreHallSerializer(serializers.ModelSerializer):
 
 
 class TicketSerializer(serializers.ModelSerializer):
+    """
+    Ticket serializer used for booking.
+    Performance is accepted as a plain id, existence and seat availability
+    are validated for the whole reservation at once by the booking module.
+    """
+
+    performance = serializers.IntegerField(source="performance_id")
 
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "performance", )
-
-    def validate(self, attrs: dict) -> dict:
-        data = super(TicketSerializer, self).validate(attrs)
-        Ticket.validate_tickets(
-            attrs["row"],
-            attrs["seat"],
-            attrs["performance"].theatre_hall,
-            ValidationError
-        )
-        return data
+        validators = []
 
 
 class TicketListSerializer(TicketSerializer):
@@ -190,11 +240,83 @@ class TicketSeatsSerializer(serializers.ModelSerializer):
         fields = ("row", "seat", )
 
 
+class SeatHoldSerializer(serializers.Serializer):
+    """
+    Hold either the listed seats
+    or the count best seats chosen by the server.
+    """
+
+    token = serializers.UUIDField(read_only=True)
+    seats = TicketSeatsSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=settings.THEATRE_SEAT_HOLD_MAX_SEATS,
+        required=False,
+    )
+    count = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.THEATRE_SEAT_HOLD_MAX_SEATS,
+        required=False,
+        write_only=True,
+    )
+    ttl = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.THEATRE_SEAT_HOLD_MAX_TTL,
+        default=settings.THEATRE_SEAT_HOLD_TTL,
+        write_only=True,
+    )
+    expires_at = serializers.DateTimeField(read_only=True)
+
+    def validate(self, attrs: dict) -> dict:
+        if ("seats" in attrs) == ("count" in attrs):
+            raise serializers.ValidationError(
+                "Provide either seats or count."
+            )
+        return attrs
+
+
+class BestSeatsSerializer(serializers.Serializer):
+    count = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.THEATRE_SEAT_HOLD_MAX_SEATS,
+        write_only=True,
+    )
+    seats = TicketSeatsSerializer(many=True, read_only=True)
+    contiguous = serializers.SerializerMethodField()
+
+    def get_contiguous(self, instance: dict) -> bool:
+        """Whether all seats form one block of adjacent seats in a row."""
+        seats = instance["seats"]
+        # Blocks of one row may be picked in any order.
+        numbers = sorted(seat["seat"] for seat in seats)
+        return len({seat["row"] for seat in seats}) == 1 and all(
+            following - number == 1
+            for number, following in zip(numbers, numbers[1:])
+        )
+
+
+SEAT_MAP_ENCODINGS = {
+    "rows": SeatMap.row_bitmaps,
+    "ranges": SeatMap.free_ranges,
+    "base64": SeatMap.to_base64,
+}
+
+
 class PerformanceDetailSerializer(serializers.ModelSerializer):
-    taken_places = TicketSeatsSerializer(
-        source="tickets", many=True, read_only=True
+    """
+    Performance detail with its taken seats.
+    With the seat_map query parameter the list of taken places
+    is replaced by a compact seat map in the requested encoding:
+        - rows: hex bit mask of taken seats for every row;
+        - ranges: [first_seat, last_seat] free ranges for every row;
+        - base64: the whole taken bitmap as base64 encoded bytes.
+    """
+
+    taken_places = serializers.SerializerMethodField()
+    seat_map = serializers.SerializerMethodField()
+    theatre_hall = TheatreHallSerializer(
+        source="hall", many=False, read_only=True
     )
-    theatre_hall = TheatreHallSerializer(many=False, read_only=True)
     play = PlayListSerializer(many=False, read_only=True)
 
     class Meta:
@@ -206,28 +328,57 @@ class PerformanceDetailSerializer(serializers.ModelSerializer):
             "play",
             "theatre_hall",
             "taken_places",
+            "seat_map",
         )
 
+    @property
+    def seat_map_encoding(self) -> str | None:
+        request = self.context.get("request")
+        encoding = request.query_params.get("seat_map") if request else None
+        if encoding is not None and encoding not in SEAT_MAP_ENCODINGS:
+            raise serializers.ValidationError(
+                {
+                    "seat_map": [
+                        "Encoding must be one of: "
+                        f"{', '.join(SEAT_MAP_ENCODINGS)}"
+                    ]
+                }
+            )
+        return encoding
+
+    def get_fields(self) -> dict:
+        fields = super().get_fields()
+        if self.seat_map_encoding is None:
+            del fields["seat_map"]
+        else:
+            del fields["taken_places"]
+        return fields
+
+    @extend_schema_field(TicketSeatsSerializer(many=True))
+    def get_taken_places(self, performance: Performance) -> list[dict]:
+        return SeatMap.for_performance(performance).taken_places()
+
+    def get_seat_map(self, performance: Performance) -> dict:
+        seat_map = SeatMap.for_performance(performance)
+        encoding = self.seat_map_encoding
+        return {
+            "encoding": encoding,
+            "available": seat_map.available,
+            "data": SEAT_MAP_ENCODINGS[encoding](seat_map),
+        }
+
 
 class ReservationSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(
-        many=True, read_only=True, allow_empty=False
-    )
+    tickets = TicketSerializer(many=True, allow_empty=False)
 
     class Meta:
         model = Reservation
         fields = ("id", "tickets", "created_at", )
 
     def create(self, validated_data: dict) -> Reservation:
-        with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            reservation = validated_data.pop("reservation")
-            ticket_instances = [
-                Ticket(**ticket_data)
-                for ticket_data in tickets_data
-            ]
-            Ticket.objects.bulk_create(ticket_instances)
-            return reservation
+        return book_tickets(
+            validated_data["user"], validated_data["tickets"]
+        )
 
 
 class ReservationListSerializer(ReservationSerializer):
@@ -0,0 +1,326 @@
+from collections import Counter
+
+from django.db import models, transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from theatre.autocomplete import artists_autocomplete, plays_autocomplete
+from theatre.caching import bump_versions
+from theatre.registry import genres, theatre_halls
+from theatre.search import index_plays, remove_plays
+from theatre.models import (
+    Artist,
+    Genre,
+    Performance,
+    Play,
+    Reservation,
+    SeatHold,
+    TheatreHall,
+    Ticket,
+)
+
+
+# Denormalized Performance counters of the rows of these models.
+COUNTERS = {Ticket: "tickets_sold", SeatHold: "seats_held"}
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_save, sender=SeatHold)
+def increment_counter(
+        sender: type[Ticket | SeatHold],
+        instance: Ticket | SeatHold,
+        created: bool,
+        **kwargs
+) -> None:
+    if created:
+        Performance.shift_counter(
+            COUNTERS[sender], {instance.performance_id: 1}
+        )
+
+
+@receiver(pre_delete, sender=Ticket)
+@receiver(pre_delete, sender=SeatHold)
+def collect_decrements(
+        sender: type[Ticket | SeatHold],
+        instance: Ticket | SeatHold,
+        origin,
+        **kwargs
+) -> None:
+    """
+    A delete sends pre_delete for every object before deleting any,
+    so decrements are summed per counter and performance on the origin
+    of the delete (an object, a queryset or e.g. a cascading user)
+    and every counter is shifted once by the first post_delete.
+    """
+    if not hasattr(origin, "_counter_decrements"):
+        origin._counter_decrements = Counter()
+    origin._counter_decrements[COUNTERS[sender], instance.performance_id] -= 1
+
+
+@receiver(post_delete, sender=Ticket)
+@receiver(post_delete, sender=SeatHold)
+def apply_decrements(
+        sender: type[Ticket | SeatHold],
+        instance: Ticket | SeatHold,
+        origin,
+        **kwargs
+) -> None:
+    decrements = getattr(origin, "_counter_decrements", None)
+    if not decrements:
+        return
+    del origin._counter_decrements
+    for counter_name in set(COUNTERS.values()):
+        Performance.shift_counter(
+            counter_name,
+            {
+                performance_id: delta
+                for (name, performance_id), delta in decrements.items()
+                if name == counter_name
+            },
+        )
+
+
+def _versions(prefix: str, ids) -> list[str]:
+    return [f"{prefix}:{pk}" for pk in ids]
+
+
+def genre_versions(instance: Genre, created: bool = False) -> list[str]:
+    """Genre names are shown in genre and play lists and play details."""
+    play_ids = [] if created else instance.plays.values_list("id", flat=True)
+    return ["genres", "plays", *_versions("play", play_ids)]
+
+
+def artist_versions(instance: Artist, created: bool = False) -> list[str]:
+    """
+    Artist names are shown in play details and, through artist facets
+    and search documents, in play lists of the plays of the artist.
+    """
+    play_ids = (
+        [] if created else list(instance.plays.values_list("id", flat=True))
+    )
+    return [
+        "artists",
+        f"artist:{instance.pk}",
+        *(["plays"] if play_ids else []),
+        *_versions("play", play_ids),
+    ]
+
+
+def play_versions(instance: Play, created: bool = False) -> list[str]:
+    """
+    Play titles are also shown in details of its artists.
+    Reservation histories check play versions on read.
+    """
+    if created:
+        return ["plays", f"play:{instance.pk}"]
+    return [
+        "plays",
+        f"play:{instance.pk}",
+        *_versions("artist", instance.artists.values_list("id", flat=True)),
+    ]
+
+
+def performance_versions(
+        instance: Performance, created: bool = False
+) -> list[str]:
+    return ["performances", f"performance:{instance.pk}"]
+
+
+def theatre_hall_versions(
+        instance: TheatreHall, created: bool = False
+) -> list[str]:
+    """Hall names and capacities are shown in every performance."""
+    return ["theatre_halls"]
+
+
+CACHE_VERSIONS = {
+    Genre: genre_versions,
+    Artist: artist_versions,
+    Play: play_versions,
+    Performance: performance_versions,
+    TheatreHall: theatre_hall_versions,
+}
+REGISTRIES = {Genre: genres, TheatreHall: theatre_halls}
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Artist)
+@receiver(post_save, sender=Play)
+@receiver(post_save, sender=Performance)
+@receiver(post_save, sender=TheatreHall)
+def invalidate_saved(
+        sender: type, instance: models.Model, created: bool, **kwargs
+) -> None:
+    if sender in REGISTRIES:
+        REGISTRIES[sender].invalidate()
+    bump_versions(CACHE_VERSIONS[sender](instance, created))
+
+
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Artist)
+@receiver(pre_delete, sender=Play)
+@receiver(pre_delete, sender=Performance)
+@receiver(pre_delete, sender=TheatreHall)
+def collect_deleted(sender: type, instance: models.Model, **kwargs) -> None:
+    """
+    Relations are gone after the delete,
+    so versions to bump are collected beforehand.
+    """
+    instance._cache_versions = CACHE_VERSIONS[sender](instance)
+
+
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Artist)
+@receiver(post_delete, sender=Play)
+@receiver(post_delete, sender=Performance)
+@receiver(post_delete, sender=TheatreHall)
+def invalidate_deleted(sender: type, instance: models.Model, **kwargs) -> None:
+    if sender in REGISTRIES:
+        REGISTRIES[sender].invalidate()
+    bump_versions(getattr(instance, "_cache_versions", []))
+
+
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+def invalidate_reservation(
+        sender: type[Reservation], instance: Reservation, **kwargs
+) -> None:
+    bump_versions([f"reservations:{instance.user_id}"])
+
+
+@receiver(m2m_changed, sender=Play.genres.through)
+def invalidate_play_genres(
+        sender: type,
+        instance: Play | Genre,
+        action: str,
+        reverse: bool,
+        pk_set: set | None,
+        **kwargs
+) -> None:
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        play_ids = [instance.pk]
+    elif pk_set is not None:
+        play_ids = pk_set
+    else:
+        play_ids = instance.plays.values_list("id", flat=True)
+    bump_versions(["plays", *_versions("play", play_ids)])
+
+
+@receiver(m2m_changed, sender=Play.artists.through)
+def invalidate_play_artists(
+        sender: type,
+        instance: Play | Artist,
+        action: str,
+        reverse: bool,
+        pk_set: set | None,
+        **kwargs
+) -> None:
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        artist_ids = [instance.pk]
+        play_ids = (
+            pk_set
+            if pk_set is not None
+            else instance.plays.values_list("id", flat=True)
+        )
+    else:
+        play_ids = [instance.pk]
+        artist_ids = (
+            pk_set
+            if pk_set is not None
+            else instance.artists.values_list("id", flat=True)
+        )
+    bump_versions(
+        [
+            "plays",
+            *_versions("play", play_ids),
+            *_versions("artist", artist_ids),
+        ]
+    )
+
+
+def search_play_ids(instance: Play | Genre | Artist) -> list[int]:
+    """Plays whose search documents show the instance."""
+    if isinstance(instance, Play):
+        return [instance.pk]
+    return list(instance.plays.values_list("id", flat=True))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Artist)
+@receiver(post_save, sender=Play)
+def index_saved(
+        sender: type, instance: models.Model, created: bool, **kwargs
+) -> None:
+    if sender is Play or not created:
+        index_plays(search_play_ids(instance))
+
+
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Artist)
+def collect_deleted_plays(
+        sender: type, instance: models.Model, **kwargs
+) -> None:
+    instance._search_play_ids = search_play_ids(instance)
+
+
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Artist)
+@receiver(post_delete, sender=Play)
+def index_deleted(sender: type, instance: models.Model, **kwargs) -> None:
+    if sender is Play:
+        remove_plays([instance.pk])
+    else:
+        index_plays(getattr(instance, "_search_play_ids", []))
+
+
+@receiver(m2m_changed, sender=Play.genres.through)
+@receiver(m2m_changed, sender=Play.artists.through)
+def index_play_relations(
+        sender: type,
+        instance: Play | Genre | Artist,
+        action: str,
+        reverse: bool,
+        pk_set: set | None,
+        **kwargs
+) -> None:
+    if action == "pre_clear" and reverse:
+        # Plays of a cleared genre or artist are unknown afterwards.
+        instance._search_play_ids = search_play_ids(instance)
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        play_ids = [instance.pk]
+    elif pk_set is not None:
+        play_ids = pk_set
+    else:
+        play_ids = getattr(instance, "_search_play_ids", [])
+    index_plays(play_ids)
+
+
+AUTOCOMPLETE = {Play: plays_autocomplete, Artist: artists_autocomplete}
+
+
+@receiver(post_save, sender=Play)
+@receiver(post_save, sender=Artist)
+def autocomplete_saved(
+        sender: type, instance: models.Model, **kwargs
+) -> None:
+    transaction.on_commit(lambda: AUTOCOMPLETE[sender].update(instance))
+
+
+@receiver(post_delete, sender=Play)
+@receiver(post_delete, sender=Artist)
+def autocomplete_deleted(
+        sender: type, instance: models.Model, **kwargs
+) -> None:
+    pk = instance.pk
+    transaction.on_commit(lambda: AUTOCOMPLETE[sender].remove(pk))
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from theatre.models import Performance, Play, Reservation, TheatreHall
+
+
+def sample_play(**params) -> Play:
+    defaults = {"title": "Sample play", "description": "Sample"}
+    defaults.update(**params)
+    return Play.objects.create(**defaults)
+
+
+def sample_performance(
+        rows: int = 10, seats_in_row: int = 20, **params
+) -> Performance:
+    theatre_hall = TheatreHall.objects.create(
+        name="Sample hall", rows=rows, seats_in_row=seats_in_row
+    )
+    defaults = {
+        "play": sample_play(),
+        "theatre_hall": theatre_hall,
+        "show_time": datetime(2024, 1, 10, 19, 0),
+    }
+    defaults.update(**params)
+    return Performance.objects.create(**defaults)
+
+
+def sample_reservation(email: str = "test@test.com") -> Reservation:
+    user = get_user_model().objects.create_user(email, "test1234")
+    return Reservation.objects.create(user=user)
+
+
+def reported_counts(namespace: str) -> dict[str, int]:
+    """Hit, miss and stale counts reported by the cache stats endpoint."""
+    client = APIClient()
+    client.force_authenticate(
+        get_user_model().objects.get_or_create(
+            email="admin@test.com", defaults={"is_staff": True}
+        )[0]
+    )
+    response = client.get(
+        reverse("theatre:cache-stats-list"), {"namespace": namespace}
+    )
+    report = response.data["namespaces"][namespace]
+    return {event: report[event] for event in ("hit", "miss", "stale")}
@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
@@ -27,6 +28,7 @@ def detail_artist_url(artist_id) -> str:
 
 class UnauthenticatedArtistsApiTests(TestCase):
     def setUp(self) -> None:
+        cache.clear()
         self.client = APIClient()
 
     def test_artists_list(self) -> None:
@@ -101,6 +103,66 @@ class UnauthenticatedArtistsApiTests(TestCase):
         self.assertIn(serializer1.data, response.data["results"])
         self.assertIn(serializer2.data, response.data["results"])
 
+    def test_artist_search_any_number_of_tokens(self) -> None:
+        artist = sample_artist(first_name="Anna Maria", last_name="Smith")
+        sample_artist(first_name="Anna", last_name="Smith")
+
+        response = self.client.get(
+            ARTISTS_BASE_URL, {"search_by": "smi, mar ann"}
+        )
+
+        self.assertEqual(
+            [result["id"] for result in response.data["results"]],
+            [artist.id],
+        )
+
+    def test_artist_search_ranks_best_matches_first(self) -> None:
+        longer = sample_artist(
+            first_name="Anna Maria Louisa", last_name="Smith-Jones"
+        )
+        shorter = sample_artist(first_name="Anna", last_name="Li")
+
+        response = self.client.get(ARTISTS_BASE_URL, {"search_by": "anna"})
+
+        self.assertEqual(
+            [result["id"] for result in response.data["results"]],
+            [shorter.id, longer.id],
+        )
+
+    def test_artist_search_ignores_case_and_diacritics(self) -> None:
+        artist = sample_artist(first_name="Zoë", last_name="Ólafsdóttir")
+
+        response = self.client.get(
+            ARTISTS_BASE_URL, {"search_by": "ZOE olaf"}
+        )
+
+        self.assertEqual(response.data["results"][0]["id"], artist.id)
+
+    def test_artist_search_matches_word_starts_only(self) -> None:
+        sample_artist(first_name="Marina", last_name="Abramovic")
+
+        middle = self.client.get(ARTISTS_BASE_URL, {"search_by": "bra"})
+        start = self.client.get(ARTISTS_BASE_URL, {"search_by": "abra"})
+
+        self.assertEqual(middle.data["results"], [])
+        self.assertEqual(len(start.data["results"]), 1)
+
+    def test_artist_search_follows_bulk_writes(self) -> None:
+        artist = sample_artist(first_name="First", last_name="Last")
+        Artist.objects.filter(id=artist.id).update(last_name="Renamed")
+        Artist.objects.bulk_create(
+            [Artist(first_name="New", last_name="Last")]
+        )
+
+        renamed = self.client.get(ARTISTS_BASE_URL, {"search_by": "renamed"})
+        last = self.client.get(ARTISTS_BASE_URL, {"search_by": "last"})
+
+        self.assertEqual(renamed.data["results"][0]["id"], artist.id)
+        self.assertEqual(
+            [result["full_name"] for result in last.data["results"]],
+            ["New Last"],
+        )
+
     def test_retrieve_artist_detail(self) -> None:
         artist = sample_artist()
 
@@ -125,6 +187,7 @@ class UnauthenticatedArtistsApiTests(TestCase):
 
 class AuthenticatedArtistsApiTests(UnauthenticatedArtistsApiTests):
     def setUp(self) -> None:
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             "test@test.com", "test1234"
@@ -144,6 +207,7 @@ class AuthenticatedArtistsApiTests(UnauthenticatedArtistsApiTests):
 
 class AdminArtistsApiTests(TestCase):
     def setUp(self) -> None:
+        cache.clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             "admin@test.com", "admin1234", is_staff=True
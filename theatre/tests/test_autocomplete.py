@@ -0,0 +1,121 @@
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from theatre.autocomplete import (
+    AutocompleteIndex,
+    artists_autocomplete,
+    normalize,
+    plays_autocomplete,
+)
+from theatre.caching import bump_versions
+from theatre.models import Artist, Play
+from theatre.tests.factories import sample_play
+
+AUTOCOMPLETE_URL = reverse("theatre:autocomplete-list")
+
+
+class AutocompleteIndexTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.tempest = sample_play(title="The Tempest")
+        self.temple = sample_play(title="Temple")
+        self.artist = Artist.objects.create(
+            first_name="Zoë", last_name="Wanamaker"
+        )
+        self.index = AutocompleteIndex("Play", "plays", ("title",))
+
+    def test_normalize(self) -> None:
+        self.assertEqual(normalize("  Zoë, O'Neil! "), "zoe o neil")
+
+    def test_lookup_without_queries(self) -> None:
+        self.index.lookup("tem")
+
+        with self.assertNumQueries(0):
+            results = self.index.lookup("TEMP")
+
+        self.assertEqual(
+            results,
+            [(self.tempest.id, "The Tempest"), (self.temple.id, "Temple")],
+        )
+
+    def test_lookup_any_word_order(self) -> None:
+        self.assertEqual(
+            self.index.lookup("temp th"), [(self.tempest.id, "The Tempest")]
+        )
+        self.assertEqual(self.index.lookup("tempest x"), [])
+        self.assertEqual(self.index.lookup("!!"), [])
+
+    def test_limit(self) -> None:
+        self.assertEqual(len(self.index.lookup("tem", limit=1)), 1)
+
+    def test_incremental_updates(self) -> None:
+        self.index.lookup("tem")
+        self.tempest.title = "Storm"
+        self.index.update(self.tempest)
+        self.index.remove(self.temple.id)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.index.lookup("tem"), [])
+            self.assertEqual(
+                self.index.lookup("sto"), [(self.tempest.id, "Storm")]
+            )
+
+    @override_settings(THEATRE_REGISTRY_CHECK_INTERVAL=0)
+    def test_shared_version_change_reloads_index(self) -> None:
+        self.index.lookup("tem")
+        # Written by another process, only the shared version is bumped.
+        Play.objects.filter(id=self.temple.id).update(title="Othello")
+        bump_versions(["plays"])
+
+        self.assertEqual(
+            self.index.lookup("oth"), [(self.temple.id, "Othello")]
+        )
+
+    def test_endpoint(self) -> None:
+        response = APIClient().get(AUTOCOMPLETE_URL, {"q": "zoe wan"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["artists"],
+            [{"id": self.artist.id, "full_name": "Zoë Wanamaker"}],
+        )
+        self.assertEqual(response.data["plays"], [])
+
+    def test_endpoint_invalid_limit(self) -> None:
+        response = APIClient().get(
+            AUTOCOMPLETE_URL, {"q": "tem", "limit": "many"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AutocompleteSignalTests(TransactionTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.play = sample_play(title="Hamlet")
+        self.artist = Artist.objects.create(
+            first_name="Laurence", last_name="Olivier"
+        )
+        plays_autocomplete.lookup("ham")
+        artists_autocomplete.lookup("oli")
+
+    def test_writes_are_applied_incrementally(self) -> None:
+        self.play.title = "Macbeth"
+        self.play.save()
+        othello = sample_play(title="Othello")
+        self.artist.delete()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(plays_autocomplete.lookup("ham"), [])
+            self.assertEqual(
+                plays_autocomplete.lookup("mac"),
+                [(self.play.id, "Macbeth")],
+            )
+            self.assertEqual(
+                plays_autocomplete.lookup("oth"), [(othello.id, "Othello")]
+            )
+            self.assertEqual(artists_autocomplete.lookup("oli"), [])
@@ -0,0 +1,188 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from theatre.cache_metrics import (
+    CACHE_NAMESPACES,
+    collect_cache_stats,
+    reset_cache_stats,
+    stats_buffer,
+)
+from theatre.caching import CachedResponseMixin
+from theatre.tests.factories import reported_counts, sample_play
+
+CACHE_STATS_URL = reverse("theatre:cache-stats-list")
+PLAYS_BASE_URL = reverse("theatre:play-list")
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+
+class CacheStatusHeaderTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        reset_cache_stats(CACHE_NAMESPACES)
+        self.client = APIClient()
+        self.play = sample_play()
+        self.url = reverse("theatre:play-detail", args=[self.play.id])
+
+    def test_miss_then_hit(self) -> None:
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(self.url)["X-Cache"], "HIT")
+
+    def test_stale(self) -> None:
+        self.client.get(self.url)
+        self.play.title = "New title"
+        self.play.save()
+
+        with mock.patch.object(
+            CachedResponseMixin, "acquire_lock", return_value=False
+        ):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response["X-Cache"], "STALE")
+
+    def test_not_modified_is_a_hit(self) -> None:
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(
+            reported_counts("catalog"),
+            {"hit": 1, "miss": 1, "stale": 0},
+        )
+
+    @override_settings(THEATRE_CACHE_STATS_FLUSH_INTERVAL=60)
+    def test_events_are_buffered_until_reported(self) -> None:
+        stats_buffer.flush()
+
+        with mock.patch.object(cache, "incr") as incr:
+            self.client.get(self.url)
+            self.client.get(self.url)
+
+        incr.assert_not_called()
+        self.assertEqual(
+            reported_counts("catalog"),
+            {"hit": 1, "miss": 1, "stale": 0},
+        )
+
+    def test_reservation_history(self) -> None:
+        user = get_user_model().objects.create_user(
+            "test@test.com", "test1234"
+        )
+        self.client.force_authenticate(user)
+        url = reverse("theatre:reservation-list")
+
+        self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+
+class CacheStatsApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        reset_cache_stats(CACHE_NAMESPACES)
+        self.client = APIClient()
+        for i in range(15):
+            sample_play(title=f"Play {i}")
+
+    def test_staff_only(self) -> None:
+        response = self.client.get(CACHE_STATS_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        user = get_user_model().objects.create_user(
+            "test@test.com", "test1234"
+        )
+        self.client.force_authenticate(user)
+        response = self.client.get(CACHE_STATS_URL)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_namespaces_report(self) -> None:
+        self.client.get(PLAYS_BASE_URL)
+        self.client.get(PLAYS_BASE_URL)
+        self.client.get(PLAYS_BASE_URL, {"page": 2})
+        admin = get_user_model().objects.create_user(
+            "admin@test.com", "admin1234", is_staff=True
+        )
+        self.client.force_authenticate(admin)
+
+        response = self.client.get(CACHE_STATS_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["backend"], "LocMemCache")
+        namespaces = response.data["namespaces"]
+        self.assertEqual(
+            set(namespaces),
+            {
+                "catalog",
+                "performances",
+                "fragments",
+                "counts",
+                "facets",
+                "reservations",
+            },
+        )
+        catalog = namespaces["catalog"]
+        self.assertEqual((catalog["hit"], catalog["miss"]), (1, 2))
+        self.assertAlmostEqual(catalog["hit_ratio"], 1 / 3, places=3)
+        self.assertIsNotNone(catalog["miss_latency_ms"])
+        self.assertEqual(catalog["entries"], 2)
+        self.assertGreater(catalog["memory"], 0)
+        self.assertEqual(
+            (namespaces["counts"]["hit"], namespaces["counts"]["miss"]),
+            (1, 1),
+        )
+        self.assertEqual(namespaces["fragments"]["miss"], 15)
+        self.assertEqual(namespaces["fragments"]["entries"], 15)
+        self.assertIsNone(namespaces["reservations"]["hit_ratio"])
+
+    def test_unknown_namespace(self) -> None:
+        admin = get_user_model().objects.create_user(
+            "admin@test.com", "admin1234", is_staff=True
+        )
+        self.client.force_authenticate(admin)
+
+        response = self.client.get(CACHE_STATS_URL, {"namespace": "other"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_command_reports_and_resets(self) -> None:
+        self.client.get(PLAYS_BASE_URL)
+        out = StringIO()
+
+        call_command(
+            "cache_stats", namespace=["catalog"], reset=True, stdout=out
+        )
+
+        self.assertIn("catalog: hit 0, miss 1", out.getvalue())
+        self.assertIn("entries n/a", out.getvalue())
+        self.assertIn("FileBasedCache: evictions n/a", out.getvalue())
+        self.assertEqual(
+            collect_cache_stats(["catalog"])["namespaces"]["catalog"]["miss"],
+            0,
+        )
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_commands_refuse_process_local_cache(self) -> None:
+        for command in (
+            "cache_stats",
+            "warm_cache",
+            "release_expired_holds",
+            "reconcile_tickets_sold",
+        ):
+            with self.subTest(command=command):
+                with self.assertRaisesMessage(
+                    CommandError, "LocMemCache) is local to this process"
+                ):
+                    call_command(command, stdout=StringIO())
@@ -0,0 +1,304 @@
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from theatre.cache_metrics import CACHE_NAMESPACES, reset_cache_stats
+from theatre.caching import (
+    MODIFIED_KEY_PREFIX,
+    VERSION_KEY_PREFIX,
+    CachedResponseMixin,
+)
+from theatre.models import Artist, Genre, Play
+from theatre.serializers import PlayDetailSerializer, PlayListSerializer
+from theatre.tests.factories import reported_counts, sample_play
+
+GENRES_BASE_URL = reverse("theatre:genre-list")
+PLAYS_BASE_URL = reverse("theatre:play-list")
+
+
+def detail_play_url(play_id) -> str:
+    return reverse("theatre:play-detail", args=[play_id])
+
+
+def detail_artist_url(artist_id) -> str:
+    return reverse("theatre:artist-detail", args=[artist_id])
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.play = sample_play()
+        self.artist = Artist.objects.create(
+            first_name="First", last_name="Last", about="About"
+        )
+
+    def test_cached_list_runs_no_queries(self) -> None:
+        first = self.client.get(PLAYS_BASE_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(PLAYS_BASE_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+
+    def test_play_detail_conditional_get(self) -> None:
+        etag = self.client.get(detail_play_url(self.play.id))["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                detail_play_url(self.play.id), HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.play.title = "New title"
+        self.play.save()
+
+        response = self.client.get(
+            detail_play_url(self.play.id), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_zero_padded_lookup_depends_on_object_version(self) -> None:
+        url = f"{PLAYS_BASE_URL}0{self.play.id}/"
+        etag = self.client.get(url)["ETag"]
+
+        self.play.title = "New title"
+        self.play.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "New title")
+
+    def test_invalid_lookup_creates_no_versions(self) -> None:
+        with self.assertNumQueries(0):
+            response = self.client.get(f"{PLAYS_BASE_URL}garbage/")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIsNone(cache.get(f"{VERSION_KEY_PREFIX}:play:garbage"))
+        self.assertIsNone(cache.get(f"{MODIFIED_KEY_PREFIX}:play:garbage"))
+
+    def test_query_parameters_are_part_of_key(self) -> None:
+        sample_play(title="Other play")
+
+        response = self.client.get(PLAYS_BASE_URL, {"title": "Other"})
+        self.client.get(PLAYS_BASE_URL)
+
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_save_invalidates_list_and_detail(self) -> None:
+        self.client.get(PLAYS_BASE_URL)
+        self.client.get(detail_play_url(self.play.id))
+
+        self.play.title = "New title"
+        self.play.save()
+
+        response = self.client.get(PLAYS_BASE_URL)
+        self.assertEqual(response.data["results"][0]["title"], "New title")
+        response = self.client.get(detail_play_url(self.play.id))
+        self.assertEqual(response.data["title"], "New title")
+
+    def test_delete_invalidates_list(self) -> None:
+        self.client.get(PLAYS_BASE_URL)
+
+        self.play.delete()
+
+        response = self.client.get(PLAYS_BASE_URL)
+        self.assertEqual(response.data["results"], [])
+
+    def test_m2m_change_invalidates_related_details(self) -> None:
+        self.client.get(detail_play_url(self.play.id))
+        self.client.get(detail_artist_url(self.artist.id))
+
+        self.play.artists.add(self.artist)
+
+        response = self.client.get(detail_play_url(self.play.id))
+        self.assertEqual(len(response.data["artists"]), 1)
+        response = self.client.get(detail_artist_url(self.artist.id))
+        self.assertEqual(len(response.data["plays"]), 1)
+
+    def test_related_rename_invalidates_play_detail(self) -> None:
+        genre = Genre.objects.create(name="Drama")
+        self.play.genres.add(genre)
+        self.client.get(GENRES_BASE_URL)
+        self.client.get(detail_play_url(self.play.id))
+
+        genre.name = "Comedy"
+        genre.save()
+
+        response = self.client.get(GENRES_BASE_URL)
+        self.assertEqual(response.data[0]["name"], "Comedy")
+        response = self.client.get(detail_play_url(self.play.id))
+        self.assertEqual(response.data["genres"][0]["name"], "Comedy")
+
+    def test_deleted_artist_invalidates_play_detail(self) -> None:
+        self.play.artists.add(self.artist)
+        self.client.get(detail_play_url(self.play.id))
+
+        self.artist.delete()
+
+        response = self.client.get(detail_play_url(self.play.id))
+        self.assertEqual(response.data["artists"], [])
+
+
+class StaleWhileRevalidateTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        reset_cache_stats(CACHE_NAMESPACES)
+        self.client = APIClient()
+        self.play = sample_play()
+        self.url = detail_play_url(self.play.id)
+
+    def test_stale_response_served_while_locked(self) -> None:
+        first = self.client.get(self.url)
+        self.play.title = "New title"
+        self.play.save()
+
+        with mock.patch.object(
+            CachedResponseMixin, "acquire_lock", return_value=False
+        ):
+            with self.assertNumQueries(0):
+                stale = self.client.get(self.url)
+
+        self.assertEqual(stale.data["title"], "Sample play")
+        self.assertEqual(stale["ETag"], first["ETag"])
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["title"], "New title")
+        self.assertNotEqual(response["ETag"], first["ETag"])
+        self.assertEqual(
+            reported_counts("catalog"),
+            {"hit": 0, "miss": 2, "stale": 1},
+        )
+
+    @override_settings(THEATRE_CACHE_LOCK_TIMEOUT=0)
+    def test_miss_computed_when_lock_holder_is_gone(self) -> None:
+        with mock.patch.object(
+            CachedResponseMixin, "acquire_lock", return_value=False
+        ):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "Sample play")
+
+    @override_settings(THEATRE_CACHE_LOCK_TIMEOUT=3)
+    def test_waiting_stops_when_lock_is_released_without_entry(self) -> None:
+        def held_by_another_request(lock_key: str) -> bool:
+            cache.add(lock_key, True)
+            threading.Timer(0.1, cache.delete, [lock_key]).start()
+            return False
+
+        with mock.patch.object(
+            CachedResponseMixin,
+            "acquire_lock",
+            side_effect=held_by_another_request,
+        ):
+            started = time.monotonic()
+            response = self.client.get(PLAYS_BASE_URL, {"match": "other"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_early_expiry_probability(self) -> None:
+        entry = {"expires_at": time.time() + 1, "delta": 10}
+
+        with mock.patch("random.random", return_value=0.01):
+            self.assertTrue(CachedResponseMixin.expires_early(entry))
+        with mock.patch("random.random", return_value=0.99):
+            self.assertFalse(CachedResponseMixin.expires_early(entry))
+
+    def test_cache_stats_command(self) -> None:
+        self.client.get(self.url)
+        self.client.get(self.url)
+        out = StringIO()
+
+        call_command("cache_stats", namespace=["catalog"], stdout=out)
+
+        self.assertIn(
+            "catalog: hit 1, miss 1, stale 0, hit ratio 50.0%", out.getvalue()
+        )
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.genre = Genre.objects.create(name="Drama")
+        self.plays = [sample_play(title=f"Play {i}") for i in range(3)]
+        for play in self.plays:
+            play.genres.add(self.genre)
+
+    def test_only_missing_fragments_are_fetched(self) -> None:
+        PlayListSerializer(self.plays[:2], many=True).data
+        plays = list(Play.objects.order_by("id"))
+
+        # Genres of the single missing play are prefetched.
+        with self.assertNumQueries(1):
+            data = PlayListSerializer(plays, many=True).data
+        with self.assertNumQueries(0):
+            PlayListSerializer(plays, many=True).data
+
+        self.assertEqual(
+            [play["genres"] for play in data], [["Drama"]] * 3
+        )
+
+    def test_fragments_are_reused_between_responses(self) -> None:
+        self.client.get(PLAYS_BASE_URL)
+
+        # Count and page queries only, nothing is prefetched.
+        with self.assertNumQueries(2):
+            response = self.client.get(PLAYS_BASE_URL, {"title": "Play"})
+
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_related_rename_invalidates_fragment(self) -> None:
+        play = self.plays[0]
+        PlayDetailSerializer(play).data
+
+        self.genre.name = "Comedy"
+        self.genre.save()
+
+        data = PlayDetailSerializer(Play.objects.get(id=play.id)).data
+        self.assertEqual(data["genres"][0]["name"], "Comedy")
+
+
+class FileBasedCatalogCacheTests(TestCase):
+    def setUp(self) -> None:
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.cache_settings = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": (
+                        "django.core.cache.backends.filebased.FileBasedCache"
+                    ),
+                    "LOCATION": self.cache_dir.name,
+                }
+            }
+        )
+        self.cache_settings.enable()
+        self.client = APIClient()
+
+    def tearDown(self) -> None:
+        self.cache_settings.disable()
+        self.cache_dir.cleanup()
+
+    def test_list_is_cached_and_invalidated(self) -> None:
+        play = sample_play()
+        self.client.get(PLAYS_BASE_URL)
+
+        with self.assertNumQueries(0):
+            self.client.get(PLAYS_BASE_URL)
+
+        play.title = "New title"
+        play.save()
+
+        response = self.client.get(PLAYS_BASE_URL)
+        self.assertEqual(response.data["results"][0]["title"], "New title")
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from theatre.models import Play
+
+
+def cache_control(response) -> set[str]:
+    return {
+        directive.strip() for directive in response["Cache-Control"].split(",")
+    }
+
+
+class HttpCacheHeadersTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.play = Play.objects.create(title="Play", description="Play")
+        self.url = reverse("theatre:play-detail", args=[self.play.id])
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "test1234"
+        )
+
+    def authenticate(self) -> None:
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_anonymous_catalog_read_is_public(self) -> None:
+        response = self.client.get(self.url)
+
+        self.assertEqual(
+            cache_control(response), {"public", "max-age=60", "s-maxage=300"}
+        )
+        self.assertIn("Authorization", response["Vary"])
+        self.assertIn("Accept", response["Vary"])
+        self.assertEqual(response["Surrogate-Key"], f"play:{self.play.id}")
+
+    def test_not_modified_keeps_policy(self) -> None:
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertIn("s-maxage=300", cache_control(response))
+
+    def test_authenticated_catalog_read_is_private(self) -> None:
+        self.authenticate()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(cache_control(response), {"private", "max-age=60"})
+        self.assertNotIn("Surrogate-Key", response)
+
+    def test_performance_list_short_ttl(self) -> None:
+        response = self.client.get(reverse("theatre:performance-list"))
+
+        self.assertEqual(
+            cache_control(response), {"public", "max-age=5", "s-maxage=10"}
+        )
+
+    def test_reservations_are_not_stored(self) -> None:
+        self.authenticate()
+
+        response = self.client.get(reverse("theatre:reservation-list"))
+
+        self.assertEqual(cache_control(response), {"private", "no-store"})
+
+    def test_errors_are_not_public(self) -> None:
+        response = self.client.get(
+            reverse("theatre:play-detail", args=[self.play.id + 1])
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn("Cache-Control", response)
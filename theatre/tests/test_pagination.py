@@ -0,0 +1,77 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from theatre.models import Artist, Play
+from theatre.pagination import estimate_count
+
+ARTISTS_BASE_URL = reverse("theatre:artist-list")
+
+
+def sample_artists(count: int) -> None:
+    Artist.objects.bulk_create(
+        Artist(first_name=f"First{i}", last_name="Last", about="About")
+        for i in range(count)
+    )
+
+
+class CachedCountPaginationTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        sample_artists(15)
+
+    def test_pages_share_cached_count(self) -> None:
+        self.client.get(ARTISTS_BASE_URL, {"page": 1})
+
+        # The page query only, the count is cached.
+        with self.assertNumQueries(1):
+            response = self.client.get(ARTISTS_BASE_URL, {"page": 2})
+
+        self.assertEqual(response.data["count"], 15)
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_count_follows_writes(self) -> None:
+        self.client.get(ARTISTS_BASE_URL)
+
+        sample_artists(1)
+        Artist.objects.create(first_name="New", last_name="Artist")
+        response = self.client.get(ARTISTS_BASE_URL, {"page": 2})
+
+        self.assertEqual(response.data["count"], 17)
+
+    def test_count_can_be_skipped(self) -> None:
+        with self.assertNumQueries(1):
+            response = self.client.get(ARTISTS_BASE_URL, {"count": "false"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["count"])
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertIn("page=2", response.data["next"])
+
+        response = self.client.get(
+            ARTISTS_BASE_URL, {"count": "false", "page": 2}
+        )
+
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertIsNone(response.data["next"])
+        self.assertIsNotNone(response.data["previous"])
+
+    def test_uncounted_page_out_of_range(self) -> None:
+        response = self.client.get(
+            ARTISTS_BASE_URL, {"count": "false", "page": 5}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_shared_pagination_class_is_not_modified(self) -> None:
+        self.client.get(ARTISTS_BASE_URL)
+
+        self.assertIsNone(PageNumberPagination.page_size)
+
+    def test_no_estimate_without_postgresql(self) -> None:
+        self.assertIsNone(estimate_count(Play.objects.all()))
@@ -0,0 +1,266 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from theatre.models import (
+    Artist,
+    Performance,
+    Ticket,
+)
+from theatre.tests.factories import sample_performance, sample_reservation
+
+PERFORMANCES_BASE_URL = reverse("theatre:performance-list")
+AVAILABILITY_URL = reverse("theatre:performance-availability")
+
+
+class TicketsSoldCounterTests(TestCase):
+    def setUp(self) -> None:
+        self.performance = sample_performance()
+        self.reservation = sample_reservation()
+
+    def test_ticket_create_and_delete_update_counter(self) -> None:
+        ticket = Ticket.objects.create(
+            row=1,
+            seat=1,
+            performance=self.performance,
+            reservation=self.reservation,
+        )
+        Ticket.objects.create(
+            row=1,
+            seat=2,
+            performance=self.performance,
+            reservation=self.reservation,
+        )
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 2)
+
+        ticket.delete()
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 1)
+
+        self.reservation.delete()
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 0)
+
+    def test_reservation_delete_shifts_counter_once(self) -> None:
+        query_counts = []
+        for count in (2, 100):
+            reservation = sample_reservation(f"user{count}@test.com")
+            Ticket.objects.bulk_create(
+                [
+                    Ticket(
+                        row=seat // 20 + 1,
+                        seat=seat % 20 + 1,
+                        performance=self.performance,
+                        reservation=reservation,
+                    )
+                    for seat in range(count)
+                ]
+            )
+            Performance.objects.update(tickets_sold=count)
+
+            with CaptureQueriesContext(connection) as queries:
+                reservation.delete()
+
+            query_counts.append(len(queries))
+            self.performance.refresh_from_db()
+            self.assertEqual(self.performance.tickets_sold, 0)
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_performance_delete_keeps_tickets_of_others(self) -> None:
+        other = sample_performance()
+        for performance in (self.performance, other):
+            Ticket.objects.create(
+                row=1,
+                seat=1,
+                performance=performance,
+                reservation=self.reservation,
+            )
+
+        self.performance.delete()
+
+        other.refresh_from_db()
+        self.assertEqual(other.tickets_sold, 1)
+
+    def test_reconcile_command_fixes_drift(self) -> None:
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            performance=self.performance,
+            reservation=self.reservation,
+        )
+        Performance.objects.update(tickets_sold=7)
+        out = StringIO()
+
+        call_command("reconcile_tickets_sold", chunk_size=1, stdout=out)
+
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 1)
+        self.assertIn("stored 7, actual 1", out.getvalue())
+
+    def test_reconcile_command_dry_run(self) -> None:
+        Performance.objects.update(tickets_sold=3)
+
+        call_command("reconcile_tickets_sold", dry_run=True, stdout=StringIO())
+
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 3)
+
+
+class PerformanceListApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+
+    def test_list_reads_tickets_available_from_counter(self) -> None:
+        performance = sample_performance()
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            performance=performance,
+            reservation=sample_reservation(),
+        )
+
+        response = self.client.get(PERFORMANCES_BASE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result = response.data["results"][0]
+        self.assertEqual(result["theatre_hall_capacity"], 200)
+        self.assertEqual(result["tickets_available"], 199)
+
+
+class PerformanceAvailabilityApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+
+    def test_batch_availability(self) -> None:
+        first = sample_performance()
+        second = sample_performance()
+        Ticket.objects.create(
+            row=1, seat=1, performance=second, reservation=sample_reservation()
+        )
+        ids = f"{second.id},{first.id},999"
+
+        with self.assertNumQueries(1):
+            response = self.client.get(AVAILABILITY_URL, {"ids": ids})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            [
+                {"id": second.id, "capacity": 200, "sold": 1, "available": 199},
+                {"id": first.id, "capacity": 200, "sold": 0, "available": 200},
+            ],
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get(AVAILABILITY_URL, {"ids": ids})
+        self.assertEqual(len(response.data), 2)
+
+        with self.assertNumQueries(0):
+            self.client.get(AVAILABILITY_URL, {"ids": f"{first.id}"})
+
+    def test_invalid_ids(self) -> None:
+        response = self.client.get(AVAILABILITY_URL, {"ids": "1,two"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(THEATRE_AVAILABILITY_MAX_IDS=2)
+    def test_too_many_ids(self) -> None:
+        response = self.client.get(AVAILABILITY_URL, {"ids": "1,2,3"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PerformanceConditionalGetTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.performance = sample_performance()
+        self.detail_url = reverse(
+            "theatre:performance-detail", args=[self.performance.id]
+        )
+
+    def test_unchanged_list_returns_not_modified(self) -> None:
+        response = self.client.get(PERFORMANCES_BASE_URL)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                PERFORMANCES_BASE_URL, HTTP_IF_NONE_MATCH=etag
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_booking_changes_detail_etag(self) -> None:
+        etag = self.client.get(self.detail_url)["ETag"]
+
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            performance=self.performance,
+            reservation=sample_reservation(),
+        )
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["taken_places"], [{"row": 1, "seat": 1}])
+
+    def test_query_parameters_change_etag(self) -> None:
+        etag = self.client.get(self.detail_url)["ETag"]
+
+        response = self.client.get(
+            self.detail_url, {"seat_map": "rows"}, HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self) -> None:
+        last_modified = self.client.get(self.detail_url)["Last-Modified"]
+
+        response = self.client.get(
+            self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class WarmCacheCommandTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.show_time = datetime.now() + timedelta(days=1)
+        self.performance = sample_performance(show_time=self.show_time)
+        self.artist = Artist.objects.create(first_name="A", last_name="B")
+        self.performance.play.artists.add(self.artist)
+        sample_performance(show_time=datetime(2020, 1, 1, 19, 0))
+
+    def test_warm_cache_renders_pages(self) -> None:
+        out = StringIO()
+
+        call_command(
+            "warm_cache", base_url="http://testserver", workers=1, stdout=out
+        )
+
+        # Genre list, the only page of the upcoming date, play and artist.
+        self.assertIn("Warmed 4 of 4 pages", out.getvalue())
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                PERFORMANCES_BASE_URL,
+                {"date": self.show_time.date().isoformat()},
+            )
+            self.client.get(
+                reverse("theatre:artist-detail", args=[self.artist.id])
+            )
+        self.assertEqual(len(response.data["results"]), 1)
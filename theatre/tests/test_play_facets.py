@@ -0,0 +1,134 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from theatre.models import Artist, Genre
+from theatre.tests.factories import sample_play
+
+PLAYS_BASE_URL = reverse("theatre:play-list")
+
+
+class PlayFacetsTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.drama = Genre.objects.create(name="Drama")
+        self.comedy = Genre.objects.create(name="Comedy")
+        self.artist = Artist.objects.create(
+            first_name="First", last_name="Last"
+        )
+        for i in range(3):
+            play = sample_play(title=f"Drama {i}")
+            play.genres.add(self.drama)
+            play.artists.add(self.artist)
+        play = sample_play(title="Comedy")
+        play.genres.add(self.comedy, self.drama)
+
+    def test_facet_counts(self) -> None:
+        response = self.client.get(
+            PLAYS_BASE_URL, {"facets": "genres,artists"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 4)
+        self.assertEqual(
+            response.data["facets"],
+            {
+                "genres": [
+                    {"id": self.drama.id, "name": "Drama", "count": 4},
+                    {"id": self.comedy.id, "name": "Comedy", "count": 1},
+                ],
+                "artists": [
+                    {"id": self.artist.id, "full_name": "First Last",
+                     "count": 3},
+                ],
+            },
+        )
+
+    def test_artist_rename_refreshes_cached_facets(self) -> None:
+        first = self.client.get(PLAYS_BASE_URL, {"facets": "artists"})
+
+        self.artist.last_name = "Newname"
+        self.artist.save()
+
+        response = self.client.get(
+            PLAYS_BASE_URL,
+            {"facets": "artists"},
+            HTTP_IF_NONE_MATCH=first["ETag"],
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(
+            response.data["facets"]["artists"][0]["full_name"],
+            "First Newname",
+        )
+
+    def test_facets_follow_filters(self) -> None:
+        response = self.client.get(
+            PLAYS_BASE_URL,
+            {"facets": "genres", "genres": f"{self.comedy.id}"},
+        )
+
+        self.assertEqual(
+            [(facet["name"], facet["count"])
+             for facet in response.data["facets"]["genres"]],
+            [("Drama", 1), ("Comedy", 1)],
+        )
+        self.assertNotIn("artists", response.data["facets"])
+
+    def test_facets_of_search_results(self) -> None:
+        response = self.client.get(
+            PLAYS_BASE_URL, {"facets": "genres", "search": "comedy"}
+        )
+
+        self.assertEqual(
+            [(facet["name"], facet["count"])
+             for facet in response.data["facets"]["genres"]],
+            [("Drama", 1), ("Comedy", 1)],
+        )
+
+    def test_one_grouped_query_per_dimension(self) -> None:
+        self.client.get(PLAYS_BASE_URL, {"page": 1})
+
+        # Page query and a grouped query per facet, the count is cached.
+        with self.assertNumQueries(3):
+            self.client.get(
+                PLAYS_BASE_URL, {"facets": "genres,artists", "page": 1}
+            )
+
+    def test_facets_cached_per_normalized_filters(self) -> None:
+        self.client.get(
+            PLAYS_BASE_URL,
+            {
+                "facets": "genres",
+                "genres": f"{self.drama.id},{self.comedy.id}",
+            },
+        )
+
+        # The page query only, the count and facets are cached.
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                PLAYS_BASE_URL,
+                {
+                    "facets": "genres",
+                    "genres": f"{self.comedy.id},{self.drama.id}",
+                },
+            )
+
+        self.assertEqual(response.data["facets"]["genres"][0]["count"], 4)
+
+    def test_facets_follow_writes(self) -> None:
+        self.client.get(PLAYS_BASE_URL, {"facets": "genres"})
+
+        sample_play(title="Drama 4").genres.add(self.drama)
+        response = self.client.get(PLAYS_BASE_URL, {"facets": "genres"})
+
+        self.assertEqual(response.data["facets"]["genres"][0]["count"], 5)
+
+    def test_unknown_facet(self) -> None:
+        response = self.client.get(PLAYS_BASE_URL, {"facets": "halls"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
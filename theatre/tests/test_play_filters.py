@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from theatre.models import Artist, Genre
+from theatre.tests.factories import sample_play
+
+PLAYS_BASE_URL = reverse("theatre:play-list")
+
+
+class PlayRelationFilterTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.drama = Genre.objects.create(name="Drama")
+        self.comedy = Genre.objects.create(name="Comedy")
+        self.first = Artist.objects.create(first_name="A", last_name="A")
+        self.second = Artist.objects.create(first_name="B", last_name="B")
+        self.both = sample_play(title="Both")
+        self.both.genres.add(self.drama, self.comedy)
+        self.both.artists.add(self.first, self.second)
+        self.drama_only = sample_play(title="Drama only")
+        self.drama_only.genres.add(self.drama)
+        self.drama_only.artists.add(self.first)
+
+    def filter(self, **params) -> list[int]:
+        response = self.client.get(PLAYS_BASE_URL, params)
+        return [play["id"] for play in response.data["results"]]
+
+    def test_any_of_genres(self) -> None:
+        self.assertEqual(
+            self.filter(genres=f"{self.drama.id},{self.comedy.id}"),
+            [self.both.id, self.drama_only.id],
+        )
+
+    def test_all_of_genres(self) -> None:
+        self.assertEqual(
+            self.filter(
+                genres=f"{self.drama.id},{self.comedy.id}", match="all"
+            ),
+            [self.both.id],
+        )
+        self.assertEqual(
+            self.filter(genres=f"{self.drama.id},{self.drama.id}",
+                        match="all"),
+            [self.both.id, self.drama_only.id],
+        )
+
+    def test_all_of_artists_and_genres(self) -> None:
+        self.assertEqual(
+            self.filter(
+                artists=f"{self.first.id},{self.second.id}",
+                genres=f"{self.drama.id}",
+                match="all",
+            ),
+            [self.both.id],
+        )
+
+    def test_filters_do_not_join_or_deduplicate(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            self.filter(
+                genres=f"{self.drama.id},{self.comedy.id}",
+                artists=f"{self.first.id},{self.second.id}",
+            )
+
+        play_queries = [
+            query["sql"]
+            for query in queries
+            if 'FROM "theatre_play" ' in query["sql"]
+        ]
+        self.assertEqual(len(play_queries), 2)
+        for sql in play_queries:
+            self.assertNotIn("DISTINCT", sql)
+            self.assertNotIn("JOIN", sql)
+
+    def test_invalid_match(self) -> None:
+        response = self.client.get(PLAYS_BASE_URL, {"match": "some"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
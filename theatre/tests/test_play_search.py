@@ -0,0 +1,100 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from theatre.models import Artist, Genre, Play
+from theatre.tests.factories import sample_play
+
+PLAYS_BASE_URL = reverse("theatre:play-list")
+
+
+class PlaySearchTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.genre = Genre.objects.create(name="Tragedy")
+        self.artist = Artist.objects.create(
+            first_name="Laurence", last_name="Olivier"
+        )
+        self.hamlet = sample_play(
+            title="Hamlet", description="The prince of Denmark"
+        )
+        self.hamlet.genres.add(self.genre)
+        self.hamlet.artists.add(self.artist)
+
+    def search(self, query: str, **params) -> list[int]:
+        response = self.client.get(PLAYS_BASE_URL, {"search": query, **params})
+        return [play["id"] for play in response.data["results"]]
+
+    def test_search_title_description_genres_and_artists(self) -> None:
+        for query in ("haml", "denmark prince", "tragedies", "olivier"):
+            self.assertEqual(self.search(query), [self.hamlet.id], query)
+        self.assertEqual(self.search("comedy"), [])
+
+    def test_title_matches_rank_first(self) -> None:
+        in_description = sample_play(
+            title="Another play", description="Inspired by Hamlet"
+        )
+
+        self.assertEqual(
+            self.search("hamlet"), [self.hamlet.id, in_description.id]
+        )
+
+    def test_documents_follow_relation_changes(self) -> None:
+        self.genre.name = "Drama"
+        self.genre.save()
+        self.assertEqual(self.search("drama"), [self.hamlet.id])
+
+        self.hamlet.artists.clear()
+        self.assertEqual(self.search("olivier"), [])
+
+        self.genre.delete()
+        self.assertEqual(self.search("drama"), [])
+
+        self.hamlet.delete()
+        self.assertEqual(self.search("denmark"), [])
+
+    def test_artist_rename_refreshes_cached_search(self) -> None:
+        params = {"search": "newname", "facets": "artists"}
+        first = self.client.get(PLAYS_BASE_URL, params)
+        self.assertEqual(first.data["count"], 0)
+
+        self.artist.last_name = "Newname"
+        self.artist.save()
+
+        response = self.client.get(
+            PLAYS_BASE_URL, params, HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [play["id"] for play in response.data["results"]],
+            [self.hamlet.id],
+        )
+        self.assertEqual(
+            response.data["facets"]["artists"][0]["full_name"],
+            "Laurence Newname",
+        )
+
+    def test_search_with_genre_filter_is_not_duplicated(self) -> None:
+        comedy = Genre.objects.create(name="Comedy")
+        self.hamlet.genres.add(comedy)
+
+        self.assertEqual(
+            self.search("hamlet", genres=f"{self.genre.id},{comedy.id}"),
+            [self.hamlet.id],
+        )
+
+    def test_rebuild_after_bulk_writes(self) -> None:
+        Play.objects.filter(id=self.hamlet.id).update(title="Macbeth")
+        out = StringIO()
+
+        call_command("rebuild_search_index", stdout=out)
+
+        self.assertIn("Indexed 1 plays", out.getvalue())
+        self.assertEqual(self.search("macbeth"), [self.hamlet.id])
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from theatre.caching import bump_versions
+from theatre.models import Genre, Performance, Play, TheatreHall
+from theatre.registry import genres, theatre_halls
+
+
+class LookupRegistryTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.hall = TheatreHall.objects.create(
+            name="Main", rows=10, seats_in_row=20
+        )
+        self.genre = Genre.objects.create(name="Drama")
+
+    def test_lookups_without_queries(self) -> None:
+        theatre_halls.get(self.hall.id)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(theatre_halls.get(self.hall.id).capacity, 200)
+            self.assertEqual(theatre_halls.get_by_name("Main"), self.hall)
+
+    def test_local_write_reloads_registry(self) -> None:
+        genres.get(self.genre.id)
+
+        self.genre.name = "Comedy"
+        self.genre.save()
+
+        self.assertEqual(genres.get(self.genre.id).name, "Comedy")
+        self.assertEqual(genres.get_by_name("Comedy"), self.genre)
+
+    @override_settings(THEATRE_REGISTRY_CHECK_INTERVAL=0)
+    def test_shared_version_change_reloads_registry(self) -> None:
+        theatre_halls.get(self.hall.id)
+        # Written by another process, only the shared version is bumped.
+        TheatreHall.objects.filter(id=self.hall.id).update(rows=5)
+        bump_versions(["theatre_halls"])
+
+        self.assertEqual(theatre_halls.get(self.hall.id).rows, 5)
+
+    def test_unknown_id_raises_does_not_exist(self) -> None:
+        with self.assertRaises(TheatreHall.DoesNotExist):
+            theatre_halls.get(self.hall.id + 1)
+
+    def test_performance_list_does_not_join_halls(self) -> None:
+        play = Play.objects.create(title="Play", description="Play")
+        play.genres.add(self.genre)
+        for hour in range(3):
+            Performance.objects.create(
+                play=play,
+                theatre_hall=self.hall,
+                show_time=datetime(2024, 1, 10, hour),
+            )
+        theatre_halls.get(self.hall.id)
+
+        # Count and page queries only.
+        with self.assertNumQueries(2):
+            response = APIClient().get(reverse("theatre:performance-list"))
+
+        self.assertEqual(
+            response.data["results"][0]["theatre_hall_name"], "Main"
+        )
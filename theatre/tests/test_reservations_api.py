@@ -0,0 +1,387 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from theatre.booking import PESSIMISTIC, book_tickets
+from theatre.caching import VERSION_KEY_PREFIX
+from theatre.models import (
+    IdempotencyKey,
+    Performance,
+    Reservation,
+    Ticket,
+)
+from theatre.tests.factories import sample_performance
+
+RESERVATIONS_BASE_URL = reverse("theatre:reservation-list")
+
+
+def tickets_payload(performance: Performance, seats: list) -> list[dict]:
+    return [
+        {"row": row, "seat": seat, "performance": performance.id}
+        for row, seat in seats
+    ]
+
+
+class UnauthenticatedReservationApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+
+    def test_auth_required(self) -> None:
+        response = self.client.get(RESERVATIONS_BASE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedReservationApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "test1234"
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance()
+
+    def test_create_reservation_with_many_performances(self) -> None:
+        other_performance = sample_performance()
+        payload = {
+            "tickets": (
+                tickets_payload(self.performance, [(1, 1), (1, 2)])
+                + tickets_payload(other_performance, [(1, 1)])
+            )
+        }
+
+        response = self.client.post(
+            RESERVATIONS_BASE_URL, payload, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        reservation = Reservation.objects.get(id=response.data["id"])
+        self.assertEqual(reservation.user, self.user)
+        self.assertEqual(reservation.tickets.count(), 3)
+        self.performance.refresh_from_db()
+        other_performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 2)
+        self.assertEqual(other_performance.tickets_sold, 1)
+
+    def test_create_reservation_constant_queries(self) -> None:
+        def count_queries(seats: list) -> int:
+            payload = {"tickets": tickets_payload(self.performance, seats)}
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(
+                    RESERVATIONS_BASE_URL, payload, format="json"
+                )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(context.captured_queries)
+
+        # The first booking also loads the theatre hall registry.
+        count_queries([(3, 3)])
+        few = count_queries([(1, 1), (1, 2)])
+        many = count_queries([(row, 5) for row in range(1, 11)])
+
+        self.assertEqual(few, many)
+
+    def test_taken_seat_returns_conflict(self) -> None:
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create(
+            row=2, seat=3, performance=self.performance, reservation=reservation
+        )
+        payload = {
+            "tickets": tickets_payload(self.performance, [(2, 3), (2, 4)])
+        }
+
+        response = self.client.post(
+            RESERVATIONS_BASE_URL, payload, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            response.data["conflicts"],
+            [{"performance": self.performance.id, "row": 2, "seat": 3}],
+        )
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_seat_out_of_range_returns_error(self) -> None:
+        payload = {"tickets": tickets_payload(self.performance, [(11, 1)])}
+
+        response = self.client.post(
+            RESERVATIONS_BASE_URL, payload, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("row", response.data["tickets"][0])
+
+    def test_duplicated_seat_returns_error(self) -> None:
+        payload = {
+            "tickets": tickets_payload(self.performance, [(1, 1), (1, 1)])
+        }
+
+        response = self.client.post(
+            RESERVATIONS_BASE_URL, payload, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_unknown_performance_returns_error(self) -> None:
+        payload = {"tickets": [{"row": 1, "seat": 1, "performance": 999}]}
+
+        response = self.client.post(
+            RESERVATIONS_BASE_URL, payload, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_empty_tickets_returns_error(self) -> None:
+        response = self.client.post(
+            RESERVATIONS_BASE_URL, {"tickets": []}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BookingConcurrencyTests(TestCase):
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "test1234"
+        )
+        self.performance = sample_performance()
+
+    def tickets(self, seats: list) -> list[dict]:
+        return [
+            {"performance_id": self.performance.id, "row": row, "seat": seat}
+            for row, seat in seats
+        ]
+
+    @override_settings(THEATRE_BOOKING_CONCURRENCY=PESSIMISTIC)
+    def test_pessimistic_booking(self) -> None:
+        reservation = book_tickets(self.user, self.tickets([(1, 1), (1, 2)]))
+
+        self.assertEqual(reservation.tickets.count(), 2)
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.tickets_sold, 2)
+
+    def test_unknown_concurrency_mode(self) -> None:
+        with self.assertRaises(ImproperlyConfigured):
+            book_tickets(self.user, self.tickets([(1, 1)]), "unknown")
+
+
+class IdempotentReservationApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "test1234"
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance()
+        self.payload = {
+            "tickets": tickets_payload(self.performance, [(1, 1), (1, 2)])
+        }
+
+    def post(self, payload: dict, key: str = "key-1"):
+        return self.client.post(
+            RESERVATIONS_BASE_URL,
+            payload,
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_first_response(self) -> None:
+        first = self.post(self.payload)
+
+        with self.assertNumQueries(1):
+            retry = self.post(self.payload)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_error_response_is_replayed(self) -> None:
+        payload = {"tickets": tickets_payload(self.performance, [(99, 1)])}
+
+        first = self.post(payload)
+        retry = self.post(payload)
+
+        self.assertEqual(first.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(retry.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+
+    def test_key_reused_with_different_body(self) -> None:
+        self.post(self.payload)
+        payload = {"tickets": tickets_payload(self.performance, [(2, 1)])}
+
+        response = self.post(payload)
+
+        self.assertEqual(
+            response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    @override_settings(THEATRE_IDEMPOTENCY_WAIT_TIMEOUT=0)
+    def test_in_flight_duplicate_conflict(self) -> None:
+        self.post(self.payload)
+        IdempotencyKey.objects.update(response_status=None)
+
+        response = self.post(self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_expired_key_can_be_reused(self) -> None:
+        self.post(self.payload)
+        IdempotencyKey.objects.update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        payload = {"tickets": tickets_payload(self.performance, [(2, 1)])}
+
+        response = self.post(payload)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Reservation.objects.count(), 2)
+
+    def test_purge_idempotency_keys_command(self) -> None:
+        self.post(self.payload)
+        self.post(self.payload, key="key-2")
+        IdempotencyKey.objects.filter(key="key-1").update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        call_command("purge_idempotency_keys", stdout=StringIO())
+
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)),
+            ["key-2"],
+        )
+
+
+class ReservationHistoryCacheTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "test1234"
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance()
+        book_tickets(self.user, self.tickets([(1, 1)]))
+
+    def tickets(self, seats: list) -> list[dict]:
+        return [
+            {"performance_id": self.performance.id, "row": row, "seat": seat}
+            for row, seat in seats
+        ]
+
+    def test_repeated_view_runs_no_queries(self) -> None:
+        first = self.client.get(RESERVATIONS_BASE_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(RESERVATIONS_BASE_URL)
+
+        self.assertEqual(second.data, first.data)
+
+    def test_list_queries_do_not_grow_with_reservations(self) -> None:
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(RESERVATIONS_BASE_URL)
+        for seat in range(2, 6):
+            book_tickets(self.user, self.tickets([(2, seat)]))
+
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(RESERVATIONS_BASE_URL)
+
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+
+    def test_own_booking_invalidates_history(self) -> None:
+        self.client.get(RESERVATIONS_BASE_URL)
+
+        self.client.post(
+            RESERVATIONS_BASE_URL,
+            {"tickets": tickets_payload(self.performance, [(3, 3)])},
+            format="json",
+        )
+        response = self.client.get(RESERVATIONS_BASE_URL)
+
+        self.assertEqual(response.data["count"], 2)
+
+    def test_other_users_booking_keeps_history_cached(self) -> None:
+        other_performance = sample_performance()
+        self.client.get(RESERVATIONS_BASE_URL)
+        other_user = get_user_model().objects.create_user(
+            "other@test.com", "test1234"
+        )
+        book_tickets(
+            other_user,
+            [{"performance_id": other_performance.id, "row": 4, "seat": 4}],
+        )
+
+        with self.assertNumQueries(0):
+            self.client.get(RESERVATIONS_BASE_URL)
+
+    def test_other_users_booking_refreshes_availability(self) -> None:
+        self.client.get(RESERVATIONS_BASE_URL)
+        other_user = get_user_model().objects.create_user(
+            "other@test.com", "test1234"
+        )
+        book_tickets(other_user, self.tickets([(4, 4)]))
+        response = self.client.get(RESERVATIONS_BASE_URL)
+
+        performance = response.data["results"][0]["tickets"][0]["performance"]
+        self.assertEqual(performance["tickets_available"], 198)
+
+    def test_play_rename_invalidates_history_without_user_bump(self) -> None:
+        self.client.get(RESERVATIONS_BASE_URL)
+        user_version = f"{VERSION_KEY_PREFIX}:reservations:{self.user.id}"
+        version = cache.get(user_version)
+
+        self.performance.play.title = "Renamed play"
+        self.performance.play.save()
+        response = self.client.get(RESERVATIONS_BASE_URL)
+
+        performance = response.data["results"][0]["tickets"][0]["performance"]
+        self.assertEqual(performance["play_title"], "Renamed play")
+        self.assertEqual(cache.get(user_version), version)
+
+    def test_hall_rename_invalidates_history_without_user_bump(self) -> None:
+        self.client.get(RESERVATIONS_BASE_URL)
+        user_version = f"{VERSION_KEY_PREFIX}:reservations:{self.user.id}"
+        version = cache.get(user_version)
+
+        self.performance.theatre_hall.name = "Renamed hall"
+        self.performance.theatre_hall.save()
+        response = self.client.get(RESERVATIONS_BASE_URL)
+
+        performance = response.data["results"][0]["tickets"][0]["performance"]
+        self.assertEqual(performance["theatre_hall_name"], "Renamed hall")
+        self.assertEqual(cache.get(user_version), version)
+
+    def test_performance_change_invalidates_history(self) -> None:
+        self.client.get(RESERVATIONS_BASE_URL)
+
+        self.performance.show_time = datetime(2024, 2, 1, 19, 0)
+        self.performance.save()
+        response = self.client.get(RESERVATIONS_BASE_URL)
+
+        performance = response.data["results"][0]["tickets"][0]["performance"]
+        self.assertEqual(performance["show_time"], "2024-02-01T19:00:00")
+
+    def test_cancelled_reservation_invalidates_history(self) -> None:
+        self.client.get(RESERVATIONS_BASE_URL)
+
+        Reservation.objects.filter(user=self.user).get().delete()
+        response = self.client.get(RESERVATIONS_BASE_URL)
+
+        self.assertEqual(response.data["count"], 0)
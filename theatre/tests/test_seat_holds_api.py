@@ -0,0 +1,271 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from theatre.models import (
+    Performance,
+    Reservation,
+    SeatHold,
+    Ticket,
+)
+from theatre.seating import SeatMap
+from theatre.tests.factories import sample_performance
+
+RESERVATIONS_BASE_URL = reverse("theatre:reservation-list")
+PERFORMANCES_BASE_URL = reverse("theatre:performance-list")
+AVAILABILITY_URL = reverse("theatre:performance-availability")
+
+
+def hold_url(performance_id: int) -> str:
+    return reverse("theatre:performance-hold", args=[performance_id])
+
+
+def confirm_hold_url(performance_id: int, token: str) -> str:
+    return reverse(
+        "theatre:performance-confirm-seat-hold", args=[performance_id, token]
+    )
+
+
+def release_hold_url(performance_id: int, token: str) -> str:
+    return reverse(
+        "theatre:performance-release-seat-hold", args=[performance_id, token]
+    )
+
+
+class SeatHoldApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "test1234"
+        )
+        self.client.force_authenticate(self.user)
+        self.performance = sample_performance(rows=5, seats_in_row=10)
+
+    def hold(self, seats: list, **payload) -> dict:
+        payload["seats"] = [{"row": row, "seat": seat} for row, seat in seats]
+        return self.client.post(
+            hold_url(self.performance.id), payload, format="json"
+        )
+
+    def test_hold_marks_seats_taken(self) -> None:
+        response = self.hold([(1, 1), (1, 2)], ttl=60)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["seats"]), 2)
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.seats_held, 2)
+        self.assertEqual(self.performance.tickets_available, 48)
+
+        detail = self.client.get(
+            reverse("theatre:performance-detail", args=[self.performance.id])
+        )
+        self.assertEqual(
+            detail.data["taken_places"],
+            [{"row": 1, "seat": 1}, {"row": 1, "seat": 2}],
+        )
+
+    def test_hold_best_seats_by_count(self) -> None:
+        response = self.client.post(
+            hold_url(self.performance.id), {"count": 3}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            response.data["seats"],
+            [{"row": 3, "seat": seat} for seat in range(4, 7)],
+        )
+
+    def test_hold_count_is_bounded(self) -> None:
+        response = self.client.post(
+            hold_url(self.performance.id),
+            {"count": settings.THEATRE_SEAT_HOLD_MAX_SEATS + 1},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("count", response.data)
+
+    def test_hold_requires_seats_or_count(self) -> None:
+        response = self.client.post(
+            hold_url(self.performance.id),
+            {"count": 1, "seats": [{"row": 1, "seat": 1}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_held_seat_cannot_be_booked_or_held(self) -> None:
+        self.hold([(2, 2)])
+        payload = {
+            "tickets": [
+                {"row": 2, "seat": 2, "performance": self.performance.id}
+            ]
+        }
+
+        booking = self.client.post(
+            RESERVATIONS_BASE_URL, payload, format="json"
+        )
+        second_hold = self.hold([(2, 2)])
+
+        self.assertEqual(booking.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(second_hold.status_code, status.HTTP_409_CONFLICT)
+
+    def test_confirm_hold_creates_reservation(self) -> None:
+        token = self.hold([(3, 1), (3, 2)]).data["token"]
+
+        response = self.client.post(
+            confirm_hold_url(self.performance.id, token)
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        reservation = Reservation.objects.get(id=response.data["id"])
+        self.assertEqual(reservation.tickets.count(), 2)
+        self.assertFalse(SeatHold.objects.exists())
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.seats_held, 0)
+        self.assertEqual(self.performance.tickets_sold, 2)
+
+    def test_confirm_expired_hold_not_found(self) -> None:
+        token = self.hold([(3, 1)]).data["token"]
+        SeatHold.objects.update(expires_at=timezone.now() - timedelta(1))
+
+        response = self.client.post(
+            confirm_hold_url(self.performance.id, token)
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_release_hold(self) -> None:
+        token = self.hold([(4, 4)]).data["token"]
+
+        response = self.client.delete(
+            release_hold_url(self.performance.id, token)
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_expired_hold_does_not_block_seat(self) -> None:
+        self.hold([(5, 5)])
+        SeatHold.objects.update(expires_at=timezone.now() - timedelta(1))
+
+        response = self.hold([(5, 5)])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.seats_held, 1)
+
+    def test_expired_holds_are_released_on_read(self) -> None:
+        self.hold([(1, 1), (1, 2)])
+        SeatHold.objects.update(expires_at=timezone.now() - timedelta(1))
+
+        listed = self.client.get(PERFORMANCES_BASE_URL)
+        availability = self.client.get(
+            AVAILABILITY_URL, {"ids": self.performance.id}
+        )
+
+        self.assertEqual(listed.data["results"][0]["tickets_available"], 50)
+        self.assertEqual(availability.data[0]["available"], 50)
+        self.assertFalse(SeatHold.objects.exists())
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.seats_held, 0)
+
+    def test_booking_rechecks_seats_held_meanwhile(self) -> None:
+        self.hold([(3, 3)])
+        payload = {
+            "tickets": [
+                {"row": 3, "seat": 3, "performance": self.performance.id}
+            ]
+        }
+
+        # Validation reads seat maps from before the hold was committed.
+        with mock.patch(
+            "theatre.booking.load_seat_maps",
+            return_value={
+                self.performance.id: SeatMap.for_hall(self.performance.hall)
+            },
+        ):
+            response = self.client.post(
+                RESERVATIONS_BASE_URL, payload, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_release_expired_holds_command(self) -> None:
+        self.hold([(1, 1), (1, 2)])
+        self.hold([(2, 1)], ttl=600)
+        SeatHold.objects.filter(row=1).update(
+            expires_at=timezone.now() - timedelta(1)
+        )
+        out = StringIO()
+
+        call_command("release_expired_holds", stdout=out)
+
+        self.assertIn("Released 2", out.getvalue())
+        self.assertEqual(SeatHold.objects.count(), 1)
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.seats_held, 1)
+
+    def test_holds_deleted_with_user_release_seats(self) -> None:
+        self.hold([(1, 1), (1, 2)])
+
+        self.user.delete()
+
+        self.assertFalse(SeatHold.objects.exists())
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.seats_held, 0)
+        self.assertEqual(self.performance.tickets_available, 50)
+
+    def test_holds_saved_and_deleted_directly_update_counter(self) -> None:
+        hold = SeatHold.objects.create(
+            row=1,
+            seat=1,
+            performance=self.performance,
+            user=self.user,
+            expires_at=timezone.now() + timedelta(minutes=5),
+        )
+        self.hold([(2, 1), (2, 2)])
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.seats_held, 3)
+
+        hold.delete()
+        SeatHold.objects.filter(row=2).delete()
+
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.seats_held, 0)
+
+    def test_reconcile_command_recounts_active_holds(self) -> None:
+        self.hold([(1, 1), (1, 2)])
+        self.hold([(2, 1)])
+        SeatHold.objects.filter(row=1).update(
+            expires_at=timezone.now() - timedelta(1)
+        )
+        Performance.objects.update(seats_held=7)
+        out = StringIO()
+
+        call_command("reconcile_tickets_sold", stdout=out)
+
+        self.assertEqual(SeatHold.objects.count(), 1)
+        self.performance.refresh_from_db()
+        self.assertEqual(self.performance.seats_held, 1)
+        self.assertIn("seats_held stored 5, actual 1", out.getvalue())
+
+    def test_hold_requires_authentication(self) -> None:
+        self.client.force_authenticate(None)
+
+        response = self.hold([(1, 1)])
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
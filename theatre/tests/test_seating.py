@@ -0,0 +1,273 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from theatre.models import (
+    Reservation,
+    Ticket,
+)
+from theatre.seating import SeatMap
+from theatre.tests.factories import sample_performance
+
+
+class SeatMapTests(TestCase):
+    def test_take_and_release(self) -> None:
+        seat_map = SeatMap(rows=3, seats_in_row=4)
+
+        seat_map.take(2, 3)
+        seat_map.take(1, 1)
+
+        self.assertTrue(seat_map.is_taken(2, 3))
+        self.assertFalse(seat_map.is_taken(3, 2))
+        self.assertEqual(seat_map.taken_count, 2)
+        self.assertEqual(seat_map.available, 10)
+        self.assertEqual(
+            seat_map.taken_places(),
+            [{"row": 1, "seat": 1}, {"row": 2, "seat": 3}],
+        )
+
+        seat_map.release(2, 3)
+
+        self.assertFalse(seat_map.is_taken(2, 3))
+        self.assertEqual(seat_map.taken_count, 1)
+
+    def test_seats_outside_hall_are_ignored(self) -> None:
+        seat_map = SeatMap(rows=2, seats_in_row=2)
+
+        seat_map.take(1, 3)
+
+        self.assertEqual(seat_map.taken_count, 0)
+
+    def test_for_performance_reads_tickets(self) -> None:
+        performance = sample_performance(rows=5, seats_in_row=8)
+        user = get_user_model().objects.create_user(
+            "test@test.com", "test1234"
+        )
+        reservation = Reservation.objects.create(user=user)
+        Ticket.objects.create(
+            row=2, seat=5, performance=performance, reservation=reservation
+        )
+
+        with self.assertNumQueries(1):
+            seat_map = SeatMap.for_performance(performance)
+
+        self.assertTrue(seat_map.is_taken(2, 5))
+        self.assertEqual(seat_map.available, 39)
+
+    def test_validate_tickets_rejects_taken_seat(self) -> None:
+        seat_map = SeatMap(rows=2, seats_in_row=2)
+        seat_map.take(1, 2)
+
+        with self.assertRaises(ValidationError):
+            Ticket.validate_tickets(1, 2, seat_map, ValidationError)
+
+        Ticket.validate_tickets(2, 2, seat_map, ValidationError)
+
+
+class SeatMapEncodingTests(TestCase):
+    def setUp(self) -> None:
+        self.seat_map = SeatMap(rows=3, seats_in_row=10)
+        self.seat_map.take_many(
+            [(1, 1), (1, 2), (1, 5), (2, 10), (3, 4), (3, 5), (3, 6)]
+        )
+
+    def test_row_bitmaps(self) -> None:
+        self.assertEqual(self.seat_map.row_bitmaps(), ["13", "200", "38"])
+
+    def test_free_ranges(self) -> None:
+        self.assertEqual(
+            self.seat_map.free_ranges(),
+            [[[3, 4], [6, 10]], [[1, 9]], [[1, 3], [7, 10]]],
+        )
+
+    def test_base64(self) -> None:
+        self.assertEqual(self.seat_map.to_base64(), "EwCIAw==")
+
+
+class BestSeatsTests(TestCase):
+    def test_block_in_middle_of_hall(self) -> None:
+        seat_map = SeatMap(rows=5, seats_in_row=10)
+
+        self.assertEqual(
+            seat_map.best_seats(4), [(3, 4), (3, 5), (3, 6), (3, 7)]
+        )
+
+    def test_next_best_row_when_middle_row_is_full(self) -> None:
+        seat_map = SeatMap(rows=5, seats_in_row=10)
+        seat_map.take_many([(3, seat) for seat in range(3, 9)])
+
+        self.assertEqual(seat_map.find_block(4), (2, 4))
+
+    def test_split_when_no_block_is_free(self) -> None:
+        seat_map = SeatMap(rows=1, seats_in_row=5)
+        seat_map.take(1, 3)
+
+        self.assertEqual(
+            sorted(seat_map.best_seats(4)), [(1, 1), (1, 2), (1, 4), (1, 5)]
+        )
+
+    def test_split_takes_largest_blocks_first(self) -> None:
+        seat_map = SeatMap(rows=3, seats_in_row=6)
+        seat_map.take_many(
+            [(1, 2), (1, 5), (2, 4)] + [(3, seat) for seat in range(1, 7)]
+        )
+
+        self.assertEqual(
+            seat_map.best_seats(7),
+            [(2, 1), (2, 2), (2, 3), (2, 5), (2, 6), (1, 3), (1, 4)],
+        )
+
+    def test_split_on_large_fragmented_hall(self) -> None:
+        seat_map = SeatMap(rows=200, seats_in_row=250)
+        seat_map.take_many(
+            (row, seat)
+            for row in range(1, 201)
+            for seat in range(1 + row % 2, 251, 2)
+        )
+
+        seats = seat_map.best_seats(10000)
+
+        self.assertEqual(len(set(seats)), 10000)
+        self.assertFalse(any(seat_map.is_taken(*seat) for seat in seats))
+
+    def test_not_enough_free_seats(self) -> None:
+        seat_map = SeatMap(rows=1, seats_in_row=2)
+        seat_map.take(1, 1)
+
+        self.assertIsNone(seat_map.best_seats(2))
+
+
+class PerformanceSeatMapApiTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = APIClient()
+
+    def test_retrieve_performance_taken_places(self) -> None:
+        performance = sample_performance(rows=5, seats_in_row=8)
+        user = get_user_model().objects.create_user(
+            "test@test.com", "test1234"
+        )
+        reservation = Reservation.objects.create(user=user)
+        for row, seat in [(3, 1), (1, 4)]:
+            Ticket.objects.create(
+                row=row,
+                seat=seat,
+                performance=performance,
+                reservation=reservation,
+            )
+
+        response = self.client.get(
+            reverse("theatre:performance-detail", args=[performance.id])
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["taken_places"],
+            [{"row": 1, "seat": 4}, {"row": 3, "seat": 1}],
+        )
+
+    def test_best_seats(self) -> None:
+        performance = sample_performance(rows=3, seats_in_row=6)
+
+        response = self.client.get(
+            reverse("theatre:performance-best-seats", args=[performance.id]),
+            {"count": 2},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            {
+                "seats": [{"row": 2, "seat": 3}, {"row": 2, "seat": 4}],
+                "contiguous": True,
+            },
+        )
+
+    def test_best_seats_split_in_one_row_is_not_contiguous(self) -> None:
+        performance = sample_performance(rows=1, seats_in_row=8)
+        user = get_user_model().objects.create_user(
+            "test@test.com", "test1234"
+        )
+        reservation = Reservation.objects.create(user=user)
+        for seat in (3, 4, 7, 8):
+            Ticket.objects.create(
+                row=1,
+                seat=seat,
+                performance=performance,
+                reservation=reservation,
+            )
+
+        response = self.client.get(
+            reverse("theatre:performance-best-seats", args=[performance.id]),
+            {"count": 4},
+        )
+
+        self.assertEqual(
+            [seat["seat"] for seat in response.data["seats"]], [5, 6, 1, 2]
+        )
+        self.assertFalse(response.data["contiguous"])
+
+    def test_best_seats_requires_count(self) -> None:
+        performance = sample_performance(rows=5, seats_in_row=8)
+
+        response = self.client.get(
+            reverse("theatre:performance-best-seats", args=[performance.id]),
+            {"count": "many"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_best_seats_count_is_bounded(self) -> None:
+        performance = sample_performance(rows=20, seats_in_row=20)
+
+        response = self.client.get(
+            reverse("theatre:performance-best-seats", args=[performance.id]),
+            {"count": settings.THEATRE_SEAT_HOLD_MAX_SEATS + 1},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("count", response.data)
+
+    def test_retrieve_compact_seat_map(self) -> None:
+        performance = sample_performance(rows=2, seats_in_row=4)
+        user = get_user_model().objects.create_user(
+            "test@test.com", "test1234"
+        )
+        Ticket.objects.create(
+            row=1,
+            seat=2,
+            performance=performance,
+            reservation=Reservation.objects.create(user=user),
+        )
+
+        response = self.client.get(
+            reverse("theatre:performance-detail", args=[performance.id]),
+            {"seat_map": "ranges"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("taken_places", response.data)
+        self.assertEqual(
+            response.data["seat_map"],
+            {
+                "encoding": "ranges",
+                "available": 7,
+                "data": [[[1, 1], [3, 4]], [[1, 4]]],
+            },
+        )
+
+    def test_retrieve_unknown_seat_map_encoding(self) -> None:
+        performance = sample_performance(rows=5, seats_in_row=8)
+
+        response = self.client.get(
+            reverse("theatre:performance-detail", args=[performance.id]),
+            {"seat_map": "png"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,116 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.test import TestCase
+from django.urls import reverse
+
+from theatre.models import (
+    Reservation,
+    Ticket,
+    TicketValidationContext,
+)
+from theatre.tests.factories import sample_performance
+
+
+class TicketValidationContextTests(TestCase):
+    def setUp(self) -> None:
+        self.performance = sample_performance(rows=5, seats_in_row=5)
+        user = get_user_model().objects.create_user(
+            "test@test.com", "test1234"
+        )
+        self.reservation = Reservation.objects.create(user=user)
+
+    def sample_ticket(self, row: int, seat: int) -> Ticket:
+        return Ticket(
+            row=row,
+            seat=seat,
+            performance_id=self.performance.id,
+            reservation_id=self.reservation.id,
+        )
+
+    def test_hall_is_loaded_once_per_batch(self) -> None:
+        with TicketValidationContext() as context:
+            for seat in range(1, 4):
+                self.sample_ticket(1, seat).full_clean(
+                    exclude=["performance", "reservation"],
+                    validate_unique=False,
+                )
+
+        self.assertEqual(list(context.halls), [self.performance.id])
+
+    def test_trusted_batch_skips_validation_queries(self) -> None:
+        with TicketValidationContext(trust_db_constraints=True) as context:
+            context.load_halls([self.performance.id])
+            # savepoint, insert, tickets_sold update, savepoint release
+            with self.assertNumQueries(4):
+                self.sample_ticket(1, 1).save()
+
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_trusted_batch_relies_on_unique_constraint(self) -> None:
+        self.sample_ticket(1, 1).save()
+
+        with TicketValidationContext(trust_db_constraints=True):
+            with self.assertRaises(IntegrityError):
+                self.sample_ticket(1, 1).save()
+
+    def test_trusted_batch_validates_range(self) -> None:
+        with TicketValidationContext(trust_db_constraints=True):
+            with self.assertRaises(ValidationError):
+                self.sample_ticket(6, 1).save()
+
+    def test_without_context_unique_is_validated(self) -> None:
+        self.sample_ticket(1, 1).save()
+
+        with self.assertRaises(ValidationError):
+            self.sample_ticket(1, 1).save()
+
+
+class ReservationAdminTests(TestCase):
+    def setUp(self) -> None:
+        self.performance = sample_performance(rows=5, seats_in_row=5)
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com", "admin1234"
+        )
+        self.client.force_login(self.admin)
+
+    def inline_payload(self, seats: list[tuple[int, int]]) -> dict:
+        payload = {
+            "user": self.admin.id,
+            "tickets-TOTAL_FORMS": len(seats),
+            "tickets-INITIAL_FORMS": 0,
+            "tickets-MIN_NUM_FORMS": 0,
+            "tickets-MAX_NUM_FORMS": 1000,
+        }
+        for index, (row, seat) in enumerate(seats):
+            payload[f"tickets-{index}-row"] = row
+            payload[f"tickets-{index}-seat"] = seat
+            payload[f"tickets-{index}-performance"] = self.performance.id
+        return payload
+
+    def test_inline_tickets_load_hall_once(self) -> None:
+        with mock.patch.object(
+            TicketValidationContext,
+            "load_halls",
+            autospec=True,
+            side_effect=TicketValidationContext.load_halls,
+        ) as load_halls:
+            response = self.client.post(
+                reverse("admin:theatre_reservation_add"),
+                self.inline_payload([(1, seat) for seat in range(1, 6)]),
+            )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Ticket.objects.count(), 5)
+        self.assertEqual(load_halls.call_count, 1)
+
+    def test_inline_ticket_outside_hall_is_rejected(self) -> None:
+        response = self.client.post(
+            reverse("admin:theatre_reservation_add"),
+            self.inline_payload([(1, 1), (6, 1)]),
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Reservation.objects.exists())
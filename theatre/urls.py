@@ -3,6 +3,8 @@ from rest_framework import routers
 
 from theatre.views import (
     ArtistViewSet,
+    AutocompleteViewSet,
+    CacheStatsViewSet,
     GenreViewSet,
     PerformanceViewSet,
     PlayViewSet,
@@ -15,6 +17,10 @@ router.register("artists", ArtistViewSet)
 router.register("plays", PlayViewSet)
 router.register("performances", PerformanceViewSet)
 router.register("reservations", ReservationViewSet)
+router.register(
+    "autocomplete", AutocompleteViewSet, basename="autocomplete"
+)
+router.register("cache-stats", CacheStatsViewSet, basename="cache-stats")
 
 urlpatterns = router.urls
 
@@ -1,15 +1,29 @@
-from datetime import datetime
-
-from django.db.models import Count, F, Q
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import AbstractUser
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, OuterRef, Q
 from django.db.models.query import QuerySet
+from django.utils import timezone
 from rest_framework import mixins, status
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import APIException, ValidationError
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.serializers import Serializer
-from rest_framework.viewsets import GenericViewSet, ModelViewSet
-from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.viewsets import GenericViewSet, ModelViewSet, ViewSet
+from rest_framework.permissions import (
+    AllowAny,
+    IsAdminUser,
+    IsAuthenticated,
+)
 from drf_spectacular.utils import (
     extend_schema,
     OpenApiParameter,
@@ -17,14 +31,41 @@ from drf_spectacular.utils import (
     OpenApiExample,
 )
 
-from theatre.models import Artist, Genre, Performance, Play, Reservation
+from theatre.booking import (
+    allocate_best_seats,
+    confirm_hold,
+    hold_seats,
+    release_expired_seats,
+    release_hold,
+)
+from theatre.autocomplete import artists_autocomplete, plays_autocomplete
+from theatre.cache_metrics import CACHE_NAMESPACES, collect_cache_stats
+from theatre.caching import (
+    CachedResponseMixin,
+    HttpCachePolicyMixin,
+    UserCachedResponseMixin,
+)
+from theatre.facets import FACETS, play_facets
+from theatre.pagination import CachedCountPagination
+from theatre.registry import genres, theatre_halls
+from theatre.search import search_artists, search_plays, search_tokens
+from theatre.models import (
+    Artist,
+    Genre,
+    IdempotencyKey,
+    Performance,
+    Play,
+    Reservation,
+)
 
 from theatre.permissions import IsAdminUserOrReadOnly
 from theatre.serializers import (
     ArtistDetailSerializer,
     ArtistListSerializer,
     ArtistSerializer,
+    BestSeatsSerializer,
     GenreSerializer,
+    PerformanceAvailabilitySerializer,
     PerformanceDetailSerializer,
     PerformanceListSerializer,
     PerformanceSerializer,
@@ -33,9 +74,14 @@ from theatre.serializers import (
     PlaySerializer,
     ReservationListSerializer,
     ReservationSerializer,
+    SeatHoldSerializer,
     get_image_serializer,
 )
 
+UUID_PATTERN = (
+    "[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+)
+
 
 class UploadImageMixin:
     upload_image_field = "image"
@@ -62,11 +108,11 @@ class PaginationMixin:
         None
 
     Methods:
-        Create and configure a PageNumberPagination instance:
+        Create and configure a CachedCountPagination class:
             get_pagination(
             page_size: int,
              max_pages: int
-             ) -> PageNumberPagination:
+             ) -> type[CachedCountPagination]:
 
     Usage:
         Inherit from this mixin in a
@@ -76,36 +122,170 @@ class PaginationMixin:
 
     def get_pagination(
         self, page_size: int, max_pages: int
-    ) -> PageNumberPagination:
+    ) -> type[CachedCountPagination]:
         """
-        Create and configure a PageNumberPagination
-        instance with custom settings.
+        Create a CachedCountPagination subclass with custom settings,
+        so the shared pagination class itself is never modified.
 
         Args:
             page_size (int): The number of items per page.
             max_pages (int): The maximum number of pages allowed.
 
         Returns:
-            PageNumberPagination: Configured instance of PageNumberPagination.
+            type[CachedCountPagination]: Configured pagination class.
         """
 
-        paginator = PageNumberPagination
-        paginator.page_size, paginator.max_page_size = page_size, max_pages
+        return type(
+            "Pagination",
+            (CachedCountPagination,),
+            {"page_size": page_size, "max_page_size": max_pages},
+        )
+
 
-        return paginator
+class IdempotentCreateMixin:
+    """
+    Mixin class for replaying responses of retried create requests.
+
+    When a request carries an Idempotency-Key header, its response
+    is stored per user and key and replayed for retries with the same
+    body within THEATRE_IDEMPOTENCY_KEY_TTL seconds, without running
+    validation again. A duplicate sent while the first request is
+    still in flight waits for its response instead of racing it.
+    Reusing a key with a different body is rejected with 422.
+    """
+
+    idempotency_header = "Idempotency-Key"
+
+    def create(self, request: Request, *args, **kwargs) -> Response:
+        key = request.headers.get(self.idempotency_header)
+        if not key:
+            return super().create(request, *args, **kwargs)
+
+        request_hash = hashlib.sha256(
+            json.dumps(
+                [request.path, request.data],
+                sort_keys=True,
+                cls=DjangoJSONEncoder,
+            ).encode()
+        ).hexdigest()
+        record, created = self.claim_idempotency_key(
+            request.user, key[:255], request_hash
+        )
+        if not created:
+            return self.replay_idempotent_response(record, request_hash)
+
+        try:
+            response = super().create(request, *args, **kwargs)
+        except APIException as exc:
+            response = self.handle_exception(exc)
+        except Exception:
+            record.delete()
+            raise
+
+        record.response_status = response.status_code
+        record.response_body = json.loads(
+            json.dumps(response.data, cls=DjangoJSONEncoder)
+        )
+        record.save(update_fields=["response_status", "response_body"])
+        return response
+
+    @staticmethod
+    def claim_idempotency_key(
+            user: AbstractUser, key: str, request_hash: str
+    ) -> tuple[IdempotencyKey, bool]:
+        """
+        Insert an in-flight record for the key or return the existing one.
+        Expired records are replaced, so the key can be reused.
+        """
+        expires_at = timezone.now() + timedelta(
+            seconds=settings.THEATRE_IDEMPOTENCY_KEY_TTL
+        )
+        while True:
+            record = IdempotencyKey.objects.filter(user=user, key=key).first()
+            if record is not None:
+                if record.expires_at > timezone.now():
+                    return record, False
+                IdempotencyKey.objects.filter(id=record.id).delete()
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=user,
+                        key=key,
+                        request_hash=request_hash,
+                        expires_at=expires_at,
+                    )
+                return record, True
+            except IntegrityError:
+                continue
+
+    @staticmethod
+    def replay_idempotent_response(
+            record: IdempotencyKey, request_hash: str
+    ) -> Response:
+        if record.request_hash != request_hash:
+            return Response(
+                {
+                    "detail": "Idempotency-Key was already used "
+                    "with a different request."
+                },
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+
+        deadline = time.monotonic() + settings.THEATRE_IDEMPOTENCY_WAIT_TIMEOUT
+        while not record.is_completed:
+            if time.monotonic() > deadline:
+                return Response(
+                    {
+                        "detail": "A request with this Idempotency-Key "
+                        "is still in progress."
+                    },
+                    status=status.HTTP_409_CONFLICT,
+                )
+            time.sleep(0.05)
+            record = IdempotencyKey.objects.filter(id=record.id).first()
+            if record is None:
+                return Response(
+                    {
+                        "detail": "The request with this Idempotency-Key "
+                        "failed, retry it."
+                    },
+                    status=status.HTTP_409_CONFLICT,
+                )
+
+        return Response(
+            record.response_body,
+            status=record.response_status,
+            headers={"Idempotent-Replayed": "true"},
+        )
 
 
 class GenreViewSet(
-    mixins.ListModelMixin, mixins.CreateModelMixin, GenericViewSet
+    HttpCachePolicyMixin,
+    CachedResponseMixin,
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
+    GenericViewSet,
 ):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (IsAdminUserOrReadOnly,)
+    list_cache_versions = ("genres",)
+    cache_policies = {"list": "catalog"}
+
+    def get_queryset(self) -> QuerySet | list[Genre]:
+        if self.action == "list":
+            return genres.all()
+        return super().get_queryset()
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        return self.cached_response(super().list, request, *args, **kwargs)
 
 
 class ArtistViewSet(
     UploadImageMixin,
     PaginationMixin,
+    HttpCachePolicyMixin,
+    CachedResponseMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.ListModelMixin,
@@ -123,12 +303,16 @@ class ArtistViewSet(
         - Unauthorised and authorised users have access only to GET.
 
     Filtering:
-        - By first_name or last_name in query parameters.
+        - By any number of first_name and last_name prefixes
+          in query parameters, best matches first.
     """
 
     queryset = Artist.objects.all()
     serializer_class = ArtistSerializer
     permission_classes = (IsAdminUserOrReadOnly,)
+    list_cache_versions = ("artists",)
+    detail_cache_version = "artist"
+    cache_policies = {"list": "catalog", "retrieve": "catalog"}
 
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
@@ -152,28 +336,18 @@ class ArtistViewSet(
         search_by = self.request.query_params.get("search_by")
 
         if search_by:
-            search_by = search_by.split()
-            if len(search_by) == 2:
-                queryset = queryset.filter(
-                    Q(first_name__icontains=search_by[0])
-                    & Q(last_name__icontains=search_by[1])
-                )
-            else:
-                queryset = queryset.filter(
-                    Q(first_name__icontains=search_by[0])
-                    | Q(last_name__icontains=search_by[0])
-                )
+            queryset = search_artists(queryset, search_by)
 
-        if self.action == "retrieve":
-            queryset = queryset.prefetch_related("plays")
-
-        return queryset.distinct()
+        return queryset
 
     @extend_schema(
         parameters=[
             OpenApiParameter(
                 name="search_by",
-                description=("Filter by first_name, last_name or full_name"),
+                description=(
+                    "Filter by prefixes of words in the full_name, "
+                    "in any order, ranked by relevance"
+                ),
                 type=OpenApiTypes.STR,
                 location=OpenApiParameter.QUERY,
                 examples=[
@@ -181,16 +355,16 @@ class ArtistViewSet(
                         name="first_name or last_name",
                         value="abr",
                         description=(
-                            "Search by the content of characters "
-                            "in the first_name or last_name."
+                            "Search by the beginning of "
+                            "the first_name or last_name."
                         ),
                     ),
                     OpenApiExample(
                         name="full_name",
                         value="mik abr",
                         description=(
-                            "Search by the content of characters "
-                            "in the first_name and last_name."
+                            "Search by the beginning of both "
+                            "the first_name and last_name."
                         ),
                     ),
                 ],
@@ -198,11 +372,18 @@ class ArtistViewSet(
         ]
     )
     def list(self, request: Request, *args, **kwargs) -> Response:
-        return super().list(request, *args, **kwargs)
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
 
 
 class PlayViewSet(
     PaginationMixin,
+    HttpCachePolicyMixin,
+    CachedResponseMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.ListModelMixin,
@@ -228,11 +409,22 @@ class PlayViewSet(
           (comma-separated genre ids).
         - Filter plays by artists using the 'artists' query parameter
           (comma-separated artist ids).
+        - Plays match any of the genre and artist ids by default,
+          or all of them with the 'match=all' query parameter.
+        - Search plays by title, description, genre and artist names
+          using the 'search' query parameter, most relevant first.
+
+    Facets:
+        - The 'facets' query parameter (genres, artists) adds play
+          counts per genre and per artist for the current filters.
     """
 
-    queryset = Play.objects.prefetch_related("genres", "artists")
+    queryset = Play.objects.all()
     serializer_class = PlaySerializer
     permission_classes = (IsAdminUserOrReadOnly,)
+    list_cache_versions = ("plays",)
+    detail_cache_version = "play"
+    cache_policies = {"list": "catalog", "retrieve": "catalog"}
 
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
@@ -245,9 +437,18 @@ class PlayViewSet(
 
     def get_queryset(self) -> QuerySet:
         """Retrieve the queryset with filters"""
+        return self.filter_plays()
+
+    def filter_plays(self, ranked: bool = True) -> QuerySet:
+        """
+        Plays matching the filters, ranked by relevance when searched.
+        Unranked querysets can be used as subqueries.
+        """
         title = self.request.query_params.get("title")
         genres = self.request.query_params.get("genres")
         artists = self.request.query_params.get("artists")
+        search = self.request.query_params.get("search")
+        match_all = self.get_match() == "all"
 
         queryset = self.queryset
 
@@ -255,14 +456,75 @@ class PlayViewSet(
             queryset = queryset.filter(title__icontains=title)
 
         if genres:
-            genres_ids = self._params_to_ints(genres)
-            queryset = queryset.filter(genres__id__in=genres_ids)
+            queryset = queryset.filter(
+                self.related_filter(
+                    Play.genres.through, "genre_id", genres, match_all
+                )
+            )
 
         if artists:
-            artists_ids = self._params_to_ints(artists)
-            queryset = queryset.filter(artists__id__in=artists_ids)
+            queryset = queryset.filter(
+                self.related_filter(
+                    Play.artists.through, "artist_id", artists, match_all
+                )
+            )
 
-        return queryset.distinct()
+        if search:
+            queryset = search_plays(queryset, search, ranked=ranked)
+
+        return queryset
+
+    def related_filter(
+            self, through: type, column: str, query: str, match_all: bool
+    ) -> Q:
+        """
+        Filter by related ids without joining the through table,
+        so plays are never duplicated and need no distinct().
+        Any of the ids is a correlated EXISTS, all of them
+        a grouped count of the matching through rows per play.
+        """
+        ids = sorted(set(self._params_to_ints(query)))
+        rows = through.objects.filter(**{f"{column}__in": ids})
+        if match_all:
+            return Q(
+                id__in=rows.values("play_id")
+                .annotate(matched=Count(column))
+                .filter(matched=len(ids))
+                .values("play_id")
+            )
+        return Q(Exists(rows.filter(play_id=OuterRef("pk"))))
+
+    def get_match(self) -> str:
+        match = self.request.query_params.get("match", "any")
+        if match not in ("any", "all"):
+            raise ValidationError({"match": "Must be any or all."})
+        return match
+
+    def get_facet_filters(self) -> dict:
+        """Filters of the request, normalized so equal sets share facets."""
+        params = self.request.query_params
+
+        def ids(name: str) -> list[int]:
+            value = params.get(name)
+            return sorted(set(self._params_to_ints(value))) if value else []
+
+        return {
+            "title": params.get("title", "").lower(),
+            "genres": ids("genres"),
+            "artists": ids("artists"),
+            "match": self.get_match(),
+            "search": search_tokens(params.get("search", "")),
+        }
+
+    def get_facet_dimensions(self) -> list[str]:
+        facets = self.request.query_params.get("facets")
+        if not facets:
+            return []
+        dimensions = facets.split(",")
+        unknown = sorted(set(dimensions) - set(FACETS))
+        if unknown:
+            raise ValidationError({"facets": f"Unknown facets: {unknown}"})
+        return dimensions
 
     def get_serializer_class(self) -> Serializer:
         if self.action == "list":
@@ -281,6 +543,42 @@ class PlayViewSet(
                 type=OpenApiTypes.STR,
                 location=OpenApiParameter.QUERY,
             ),
+            OpenApiParameter(
+                name="match",
+                description=(
+                    "Whether plays have any (default) or all "
+                    "of the given genres and artists"
+                ),
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                enum=["any", "all"],
+            ),
+            OpenApiParameter(
+                name="facets",
+                description=(
+                    "Comma-separated facets (genres, artists) returned "
+                    "with play counts for the current filters"
+                ),
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                examples=[
+                    OpenApiExample(
+                        name="Facets QWERY example",
+                        value="genres,artists",
+                        description="Genre and artist counts.",
+                    )
+                ],
+            ),
+            OpenApiParameter(
+                name="search",
+                description=(
+                    "Full-text search by prefixes of words in the title, "
+                    "description, genre and artist names, "
+                    "ranked by relevance"
+                ),
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+            ),
             OpenApiParameter(
                 name="artists",
                 description="Filtering by artist ids",
@@ -310,11 +608,29 @@ class PlayViewSet(
         ]
     )
     def list(self, request: Request, *args, **kwargs) -> Response:
-        return super().list(request, *args, **kwargs)
+        return self.cached_response(self.list_with_facets, request)
+
+    def list_with_facets(self, request: Request) -> Response:
+        dimensions = self.get_facet_dimensions()
+        response = super().list(request)
+        if dimensions:
+            response.data["facets"] = play_facets(
+                self.filter_plays(ranked=False),
+                dimensions,
+                self.get_facet_filters(),
+            )
+        return response
+
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
 
 
 class PerformanceViewSet(
     PaginationMixin,
+    HttpCachePolicyMixin,
+    CachedResponseMixin,
     ModelViewSet,
     UploadImageMixin,
 ):
@@ -338,19 +654,19 @@ class PerformanceViewSet(
           (format: 'YYYY-MM-DD').
     """
 
-    queryset = (
-        Performance.objects.all()
-        .select_related("play", "theatre_hall")
-        .annotate(
-            tickets_available=(
-                F("theatre_hall__rows")
-                + F("theatre_hall__seats_in_row")
-                - Count("tickets")
-            )
-        )
-    )
+    queryset = Performance.objects.all().select_related("play")
     serializer_class = PerformanceSerializer
     permission_classes = (IsAdminUserOrReadOnly,)
+    cache_namespace = "performances"
+    list_cache_versions = ("performances",)
+    detail_cache_version = "performance"
+    shared_cache_versions = ("plays", "theatre_halls")
+    # Seat maps change with every booking, details are revalidated.
+    cache_policies = {
+        "list": "performances",
+        "availability": "performances",
+        "retrieve": "revalidate",
+    }
 
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
@@ -364,6 +680,10 @@ class PerformanceViewSet(
         if self.action == "upload_image":
             model = self.get_queryset().model
             return get_image_serializer(model)
+        if self.action == "hold":
+            return SeatHoldSerializer
+        if self.action == "best_seats":
+            return BestSeatsSerializer
         return PerformanceSerializer
 
     def get_queryset(self) -> QuerySet:
@@ -381,6 +701,19 @@ class PerformanceViewSet(
 
         return queryset
 
+    def get_object(self) -> Performance:
+        performance = super().get_object()
+        if self.action == "retrieve":
+            release_expired_seats([performance])
+        return performance
+
+    def paginate_queryset(self, queryset: QuerySet) -> list | None:
+        """Counters of the page ignore holds expired since the sweep."""
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            release_expired_seats(page)
+        return page
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -405,11 +738,200 @@ class PerformanceViewSet(
         ]
     )
     def list(self, request: Request, *args, **kwargs) -> Response:
-        return super().list(request, *args, **kwargs)
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="ids",
+                description="Comma-separated performance ids.",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                examples=[
+                    OpenApiExample(
+                        name="Ids example",
+                        value="1,2,3",
+                        description="List of performance ids",
+                    )
+                ],
+            ),
+        ],
+        responses=PerformanceAvailabilitySerializer(many=True),
+    )
+    @action(methods=["GET"], detail=False, url_path="availability")
+    def availability(self, request: Request) -> Response:
+        """
+        Endpoint for availability of many performances at once.
+        Counters are read with a single query for all cache misses
+        and cached for THEATRE_AVAILABILITY_CACHE_TTL seconds,
+        holds expired since the last sweep are released first.
+        """
+        query = request.query_params.get("ids", "")
+        try:
+            ids = list(
+                dict.fromkeys(int(str_id) for str_id in query.split(","))
+            )
+        except ValueError:
+            raise ValidationError(
+                {"ids": ["A comma-separated list of ids is required"]}
+            )
+        if len(ids) > settings.THEATRE_AVAILABILITY_MAX_IDS:
+            raise ValidationError(
+                {
+                    "ids": [
+                        "At most "
+                        f"{settings.THEATRE_AVAILABILITY_MAX_IDS} ids "
+                        "are allowed"
+                    ]
+                }
+            )
+
+        keys = {
+            performance_id: f"theatre:availability:{performance_id}"
+            for performance_id in ids
+        }
+        cached = cache.get_many(keys.values())
+        missing_ids = [
+            performance_id
+            for performance_id, key in keys.items()
+            if key not in cached
+        ]
+        if missing_ids:
+            performances = Performance.objects.filter(
+                id__in=missing_ids
+            ).only("id", "theatre_hall", "tickets_sold", "seats_held")
+            release_expired_seats(performances)
+            fetched = {}
+            for performance in performances:
+                capacity = theatre_halls.get(
+                    performance.theatre_hall_id
+                ).capacity
+                fetched[keys[performance.id]] = {
+                    "id": performance.id,
+                    "capacity": capacity,
+                    "sold": performance.tickets_sold,
+                    "available": (
+                        capacity
+                        - performance.tickets_sold
+                        - performance.seats_held
+                    ),
+                }
+            cache.set_many(
+                fetched, timeout=settings.THEATRE_AVAILABILITY_CACHE_TTL
+            )
+            cached.update(fetched)
+
+        return Response(
+            [cached[keys[pk]] for pk in ids if keys[pk] in cached],
+            status=status.HTTP_200_OK,
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="seat_map",
+                description=(
+                    "Return a compact seat map instead of taken_places."
+                ),
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                enum=["rows", "ranges", "base64"],
+            ),
+        ]
+    )
+    def retrieve(self, request: Request, *args, **kwargs) -> Response:
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    @action(
+        methods=["POST"],
+        detail=True,
+        url_path="holds",
+        permission_classes=[IsAuthenticated],
+    )
+    def hold(self, request: Request, pk: int = None) -> Response:
+        """Endpoint for temporarily holding seats of the performance"""
+        performance = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        seats = serializer.validated_data.get("seats") or (
+            allocate_best_seats(
+                performance, serializer.validated_data["count"]
+            )
+        )
+        holds = hold_seats(
+            request.user, performance, seats, serializer.validated_data["ttl"]
+        )
+        serializer = SeatHoldSerializer(
+            {
+                "token": holds[0].token,
+                "seats": holds,
+                "expires_at": holds[0].expires_at,
+            }
+        )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="count",
+                type=OpenApiTypes.INT,
+                description="Number of seats to pick.",
+                location=OpenApiParameter.QUERY,
+                required=True,
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=True, url_path="best-seats")
+    def best_seats(self, request: Request, pk: int = None) -> Response:
+        """
+        Endpoint for picking the best free seats of the performance.
+        Adjacent seats in the middle of the hall are preferred,
+        POST {"count": n} to holds/ to pick and hold them at once.
+        """
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        seats = allocate_best_seats(
+            self.get_object(), serializer.validated_data["count"]
+        )
+        serializer = self.get_serializer({"seats": seats})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(
+        methods=["POST"],
+        detail=True,
+        url_path=rf"holds/(?P<token>{UUID_PATTERN})/confirm",
+        permission_classes=[IsAuthenticated],
+    )
+    def confirm_seat_hold(
+            self, request: Request, pk: int = None, token: str = None
+    ) -> Response:
+        """Endpoint for turning a seat hold into a reservation"""
+        reservation = confirm_hold(request.user, pk, token)
+        serializer = ReservationSerializer(reservation)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(
+        methods=["DELETE"],
+        detail=True,
+        url_path=rf"holds/(?P<token>{UUID_PATTERN})",
+        permission_classes=[IsAuthenticated],
+    )
+    def release_seat_hold(
+            self, request: Request, pk: int = None, token: str = None
+    ) -> Response:
+        """Endpoint for releasing held seats before they expire"""
+        release_hold(request.user, pk, token)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class ReservationViewSet(
     PaginationMixin,
+    HttpCachePolicyMixin,
+    UserCachedResponseMixin,
+    IdempotentCreateMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
@@ -425,23 +947,57 @@ class ReservationViewSet(
         - Only authenticated users have access to create and list their
           own reservations.
 
+    Idempotency:
+        - Creation accepts an Idempotency-Key header, retries with the same
+          key and body replay the first response.
+
     Filtering:
         - Only retrieves reservations associated with
           the authenticated user.
+
+    Caching:
+        - List pages are cached per user until the user books
+          or cancels a reservation or a referenced performance,
+          its play or theatre hall changes, the versions of those
+          are checked on read instead of being bumped for every user.
     """
 
     serializer_class = ReservationSerializer
     queryset = Reservation.objects.prefetch_related(
-        "tickets__performance__play", "tickets__performance__theatre_hall"
+        "tickets__performance__play"
     )
     permission_classes = (IsAuthenticated,)
+    cache_policies = {"*": "private"}
+    user_cache_version = "reservations"
 
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
         self.pagination_class = self.get_pagination(10, 100)
 
     def get_queryset(self) -> QuerySet:
-        return Reservation.objects.filter(user=self.request.user)
+        return self.queryset.filter(user=self.request.user)
+
+    def paginate_queryset(self, queryset: QuerySet) -> list | None:
+        page = super().paginate_queryset(queryset)
+        if page is not None and self.action == "list":
+            performances = {
+                ticket.performance
+                for reservation in page
+                for ticket in reservation.tickets.all()
+            }
+            self.embed_cache_versions(
+                [
+                    "theatre_halls",
+                    *(f"performance:{item.id}" for item in performances),
+                    *(f"play:{item.play_id}" for item in performances),
+                ]
+            )
+        return page
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        return self.user_cached_response(
+            super().list, request, *args, **kwargs
+        )
 
     def get_serializer_class(self) -> ReservationSerializer:
         if self.action == "list":
@@ -451,3 +1007,105 @@ class ReservationViewSet(
 
     def perform_create(self, serializer: Serializer) -> None:
         serializer.save(user=self.request.user)
+
+
+class CacheStatsViewSet(ViewSet):
+    """
+    ViewSet reporting the state of the cache, staff only.
+
+    Every cache namespace (response caches of the catalog,
+    performances and reservations, serializer fragments,
+    pagination counts and play facets) reports hit, miss and stale counts,
+    hit ratio, average miss latency in milliseconds, entry count
+    and approximate memory in bytes. Evictions are reported for
+    the whole backend, where it tracks them (Redis).
+
+    Filtering:
+        - Namespaces can be selected with repeated namespace
+          query parameters, e.g. ?namespace=catalog&namespace=counts.
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="namespace",
+                description="Cache namespaces to report, all by default.",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                enum=list(CACHE_NAMESPACES),
+                many=True,
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    def list(self, request: Request) -> Response:
+        namespaces = request.query_params.getlist("namespace")
+        unknown = sorted(set(namespaces) - set(CACHE_NAMESPACES))
+        if unknown:
+            raise ValidationError(
+                {"namespace": f"Unknown cache namespaces: {unknown}"}
+            )
+        return Response(collect_cache_stats(namespaces))
+
+
+class AutocompleteViewSet(HttpCachePolicyMixin, ViewSet):
+    """
+    ViewSet suggesting plays and artists while a search box is typed in.
+
+    Answers come from process-local prefix indexes of play titles
+    and artist full names, never from the database (see
+    theatre.autocomplete). Words of the query match beginnings of
+    words in any order, case and diacritics are ignored.
+
+    Filtering:
+        - By the 'q' query parameter, at most 'limit' (default 10,
+          up to 50) plays and artists are returned.
+    """
+
+    permission_classes = (AllowAny,)
+    throttle_classes = (ScopedRateThrottle,)
+    throttle_scope = "autocomplete"
+    cache_policies = {"list": "catalog"}
+    default_limit = 10
+    max_limit = 50
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="q",
+                description="Beginning of words of a title or full name",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+            ),
+            OpenApiParameter(
+                name="limit",
+                description="Maximum number of plays and of artists",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    def list(self, request: Request) -> Response:
+        query = request.query_params.get("q", "")
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            raise ValidationError({"limit": "A valid integer is required."})
+        limit = max(1, min(limit, self.max_limit))
+        return Response(
+            {
+                "plays": [
+                    {"id": pk, "title": title}
+                    for pk, title in plays_autocomplete.lookup(query, limit)
+                ],
+                "artists": [
+                    {"id": pk, "full_name": full_name}
+                    for pk, full_name in artists_autocomplete.lookup(
+                        query, limit
+                    )
+                ],
+            }
+        )
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -87,6 +88,22 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Web processes and management commands (warm_cache, cache_stats,
+# release_expired_holds, reconcile_tickets_sold) must share the cache,
+# it holds the versions invalidating cached responses and seat maps.
+# Files are shared by all processes of one host, docker settings use Redis.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get(
+            "DJANGO_CACHE_DIR",
+            os.path.join(tempfile.gettempdir(), "theatre_service_cache"),
+        ),
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -107,7 +124,12 @@ REST_FRAMEWORK = {
         "rest_framework.throttling.AnonRateThrottle",
         "rest_framework.throttling.UserRateThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "10/min", "user": "30/min"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "10/min",
+        "user": "30/min",
+        # Autocomplete is requested on every keystroke.
+        "autocomplete": "120/min",
+    },
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
@@ -119,6 +141,84 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
 }
 
+# Seat holds
+# Seconds a seat hold lives when the client does not request a ttl
+# and the longest ttl a client can request.
+THEATRE_SEAT_HOLD_TTL = 300
+THEATRE_SEAT_HOLD_MAX_TTL = 900
+# The most seats a single hold or best seats pick may cover.
+THEATRE_SEAT_HOLD_MAX_SEATS = 50
+
+# Booking concurrency
+# "pessimistic" locks the booked performances before validating seats,
+# "optimistic" relies on the unique seat index and retries races
+# with exponential backoff starting at THEATRE_BOOKING_RETRY_BACKOFF seconds.
+THEATRE_BOOKING_CONCURRENCY = "optimistic"
+THEATRE_BOOKING_MAX_RETRIES = 3
+THEATRE_BOOKING_RETRY_BACKOFF = 0.01
+
+# Batch availability lookup
+THEATRE_AVAILABILITY_MAX_IDS = 500
+THEATRE_AVAILABILITY_CACHE_TTL = 5
+
+# Idempotency keys
+# Seconds a stored response is replayed for retries with the same key
+# and the longest a duplicate waits for the in-flight request.
+THEATRE_IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+THEATRE_IDEMPOTENCY_WAIT_TIMEOUT = 10
+
+# Response caching
+# Seconds genre, play and artist responses stay cached,
+# writes invalidate them earlier through model signals.
+THEATRE_CATALOG_CACHE_TTL = 5 * 60
+# Seconds serialized plays and artists stay cached,
+# fragments are keyed by object versions and never go stale.
+THEATRE_FRAGMENT_CACHE_TTL = 60 * 60
+# Seconds pages of a user reservation history stay cached,
+# tickets_available shown in them may lag behind by this much.
+THEATRE_USER_CACHE_TTL = 60
+# Seconds expired or outdated responses are still served
+# while a single request recomputes them.
+THEATRE_CACHE_STALE_TTL = 60
+# Seconds a request may hold the recompute lock of a response.
+THEATRE_CACHE_LOCK_TIMEOUT = 10
+# Seconds version counters are kept after they were last created
+# or bumped, counters of objects nobody requests do not pile up.
+THEATRE_CACHE_VERSION_TTL = 24 * 60 * 60
+# Higher values recompute hot responses earlier before they expire.
+THEATRE_CACHE_EARLY_EXPIRY_BETA = 1.0
+# Seconds hit, miss and stale counts are buffered in every process
+# before they are added to the shared counters cache stats report.
+THEATRE_CACHE_STATS_FLUSH_INTERVAL = 10
+# Keys per namespace whose memory usage Redis measures for cache stats,
+# the memory of larger namespaces is extrapolated from the sample.
+THEATRE_CACHE_STATS_MEMORY_SAMPLE = 1000
+
+# HTTP caching
+# Cache-Control directives of the policies views refer to by name,
+# max_age is for browsers, s_maxage for shared caches like proxies.
+THEATRE_HTTP_CACHE_POLICIES = {
+    "catalog": {"public": True, "max_age": 60, "s_maxage": 5 * 60},
+    "performances": {"public": True, "max_age": 5, "s_maxage": 10},
+    "revalidate": {"public": True, "no_cache": True},
+    "private": {"private": True, "no_store": True},
+}
+
+# Pagination
+# Seconds a count of a filtered list stays cached.
+THEATRE_PAGINATION_COUNT_CACHE_TTL = 5 * 60
+# Lists with more rows than this (by planner estimate)
+# report the estimate instead of counting, PostgreSQL only.
+THEATRE_PAGINATION_ESTIMATE_THRESHOLD = 100_000
+
+# In-process registries
+# Seconds between checks of the shared genre and theatre hall
+# versions, writes of other processes are seen after this delay.
+THEATRE_REGISTRY_CHECK_INTERVAL = 1
+# Seconds after which autocomplete indexes are rebuilt from scratch,
+# bounds how long a write of another process may be missed.
+THEATRE_AUTOCOMPLETE_MAX_AGE = 5 * 60
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/